@@ -0,0 +1,129 @@
+# Compares the array-backed Deck against the old Deck that kept a list of DeckCards, loading, shuffling,
+# dealing a turn's hands and reading the deck back out the way the repositories do
+#
+# Run from the repo root with: PYTHONPATH=src python benchmark/bench_deck.py
+import argparse
+import time
+import tracemalloc
+from random import Random
+from typing import Callable, Dict, List
+
+from common.enums import CardType, DeckType
+from core.base_deck import BaseDeck
+from core.card import Card
+from core.deck import Deck
+from core.deck_card import DeckCard
+from core.hand import Hand
+from core.shuffle_engine import RiffleShuffleEngine
+
+from bench_support import print_comparison, Result
+
+
+# The old Deck, dealing one card at a time from a list
+class ListDeck(BaseDeck):
+    def deal_card(self, target: BaseDeck) -> DeckCard:
+        deck_card: DeckCard = self._cards.pop()
+
+        try:
+            target.add_card(deck_card)
+        except IndexError as err:
+            self._cards.append(deck_card)
+            raise err
+
+        self.mark_dirty_from(len(self._cards))
+
+        return deck_card
+
+    def deal_cards(self, target: BaseDeck, count: int):
+        for i in range(0, count):
+            self.deal_card(target)
+
+    def populate_values(self, cards: List[Card], orbs: bytes, num_uses: bytes):
+        self.populate([DeckCard.hydrate(cards[i], orbs[i], num_uses[i]) for i in range(0, len(cards))])
+
+    def shuffle(self, times=0, engine=None):
+        self._cards = engine.shuffle(self._cards, times)
+        self.mark_dirty_from(0)
+
+
+def time_operation(name: str, operation: Callable, times: int, setup: Callable) -> Result:
+    timings: List[float] = []
+
+    for i in range(0, times):
+        setup()
+        start: float = time.perf_counter()
+        operation()
+        timings.append(time.perf_counter() - start)
+
+    return Result(name, timings, 0)
+
+
+def held_bytes(create: Callable, cards: List[Card]) -> int:
+    tracemalloc.start()
+    deck = create(cards)
+    size: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del deck
+
+    return size
+
+
+def run(type, cards: List[Card], players: int, riffles: int, times: int) -> Dict[str, Result]:
+    state: Dict = {}
+    orbs: bytes = bytes(len(cards))
+
+    def load():
+        state['deck'] = type(DeckType.POWER_DECK)
+        state['deck'].populate_values(cards, orbs, orbs)
+
+    def shuffle():
+        state['deck'].shuffle(riffles, RiffleShuffleEngine(Random(len(cards))))
+
+    def deal():
+        for i in range(0, players):
+            state['deck'].deal_cards(Hand(DeckType.POWER_HAND, 9), min(9, state['deck'].size))
+
+    def read():
+        state['deck'].card_values()
+
+    size: int = len(cards)
+
+    return {"load {}".format(size): time_operation("load", load, times, lambda: None),
+            "shuffle {}".format(size): time_operation("shuffle", shuffle, times, load),
+            "deal {}".format(size): time_operation("deal", deal, times, load),
+            "read {}".format(size): time_operation("read", read, times, load)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Array-backed Deck against the old list Deck")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[84, 250, 999])
+    parser.add_argument("--players", type=int, default=8)
+    parser.add_argument("--riffles", type=int, default=RiffleShuffleEngine.MAX_SHUFFLES)
+    parser.add_argument("--times", type=int, default=200)
+    args = parser.parse_args()
+
+    before: Dict[str, Result] = {}
+    after: Dict[str, Result] = {}
+
+    for size in args.sizes:
+        cards: List[Card] = [Card(i, "card_{}.png".format(i), CardType.POWER) for i in range(0, size)]
+        before.update(run(ListDeck, cards, args.players, args.riffles, args.times))
+        after.update(run(Deck, cards, args.players, args.riffles, args.times))
+
+        def populate(deck_type):
+            def create(values: List[Card]):
+                deck = deck_type(DeckType.POWER_DECK)
+                deck.populate_values(values, bytes(len(values)), bytes(len(values)))
+                return deck
+
+            return create
+
+        print("{} cards held: list {} KB, array {} KB".format(size, held_bytes(populate(ListDeck), cards) // 1024,
+                                                               held_bytes(populate(Deck), cards) // 1024))
+
+    print("list Deck (before) vs array Deck (after)")
+    print_comparison(before, after)
+
+
+if __name__ == "__main__":
+    main()
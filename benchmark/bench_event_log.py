@@ -0,0 +1,104 @@
+# What the game log costs on top of saving the game and players: the same operations with the log turned
+# off (before) and on (after). Each logged operation appends one event, and every SNAPSHOT_INTERVAL events
+# one of them also writes a snapshot, which is included in the averages.
+#
+# Run from the repo root with: PYTHONPATH=src python benchmark/bench_event_log.py
+import argparse
+import tempfile
+from typing import Dict, List
+
+from application.game_service import GameService
+from common.enums import DeckStorageFormat
+from core.game import Game
+from core.game_event import GameEvent
+from core.player import Player
+from domain.game_event_repository import GameEventRepository
+
+from bench_support import create_database, create_game_service, measure, print_comparison, Result
+
+
+# The game service as it was before the log: nothing is appended and no snapshots are taken
+class UnloggedEventRepository(GameEventRepository):
+    def __init__(self, database: str = None):
+        super().__init__(database)
+
+        self._sequence: int = 0
+
+    def append(self, event: GameEvent) -> int:
+        self._sequence = self._sequence + 1
+
+        return self._sequence
+
+    def has_snapshot(self) -> bool:
+        return True
+
+    def save_snapshot(self, sequence: int, game: Game, players: List[Player]):
+        pass
+
+
+def run(logged: bool, num_players: int, times: int, storage_format: DeckStorageFormat) -> Dict[str, Result]:
+    database: str = create_database()
+    event_repository: GameEventRepository = GameEventRepository(database) if logged \
+        else UnloggedEventRepository(database)
+    service: GameService = create_game_service(database, storage_format, event_repository=event_repository)
+
+    for i in range(0, num_players):
+        service.add_player("Player {}".format(i), "avatar.png")
+
+    player_ids: List[str] = [p.id for p in service.players]
+    service.start_new_turn()
+
+    def transfer_card():
+        # Same work as /api/players/<id>/transferCard, there and back so the hand never runs out
+        player: Player = service.get_player(player_ids[0])
+        service.transfer_card(player, "program_hand", 0, player, "registers", 0)
+        player = service.get_player(player_ids[0])
+        service.transfer_card(player, "registers", 0, player, "program_hand", 0)
+
+    def refill_power_deck():
+        if service.game.power_deck.size < 5:
+            service.start_new_game(tempfile.mkdtemp())
+
+    def draw_power_card():
+        service.draw_power_card(service.get_player(player_ids[1]))
+
+    moves = {'count': 0}
+
+    def set_instructions():
+        moves['count'] = moves['count'] + 1
+        service.set_instructions(service.get_player(player_ids[0]), "Move {}".format(moves['count']))
+
+    results: Dict[str, Result] = {}
+    results['inc_damage'] = measure("inc_damage", database,
+                                    lambda: service.inc_damage(service.get_player(player_ids[0])), times)
+    results['dec_damage'] = measure("dec_damage", database,
+                                    lambda: service.dec_damage(service.get_player(player_ids[0])), times)
+    results['transfer_card x2'] = measure("transfer_card x2", database, transfer_card, times)
+    results['draw_power_card'] = measure("draw_power_card", database, draw_power_card, times,
+                                         setup=refill_power_deck)
+    results['set_instructions'] = measure("set_instructions", database, set_instructions, times)
+    results['start_new_turn'] = measure("start_new_turn", database, service.start_new_turn, max(times // 10, 1))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Game service operations without and with the game log")
+    parser.add_argument("--players", type=int, default=8)
+    parser.add_argument("--times", type=int, default=GameService.SNAPSHOT_INTERVAL * 2)
+    parser.add_argument("--format", choices=[x.value for x in DeckStorageFormat],
+                        default=DeckStorageFormat.PACKED.value)
+    args = parser.parse_args()
+
+    storage_format: DeckStorageFormat = DeckStorageFormat(args.format)
+    before: Dict[str, Result] = run(False, args.players, args.times, storage_format)
+    after: Dict[str, Result] = run(True, args.players, args.times, storage_format)
+
+    print("{} players, {} decks, snapshot every {} events".format(args.players, args.format,
+                                                                   GameService.SNAPSHOT_INTERVAL))
+    print("no game log (before) vs game log (after)")
+    print_comparison(before, after)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Times exporting a whole game to a game archive and restoring it, and writes archives to use as fixtures
+#
+# Run from the repo root with: PYTHONPATH=src python benchmark/bench_game_archive.py
+import argparse
+import io
+from typing import List
+
+from application.game_service import GameService
+from common.enums import DeckStorageFormat
+
+from bench_support import create_database, create_game_service, measure, print_results, Result
+
+
+def create_service(database: str, storage_format: DeckStorageFormat) -> GameService:
+    return create_game_service(database, storage_format)
+
+
+def create_game(service: GameService, num_players: int, num_turns: int):
+    for i in range(0, num_players):
+        service.add_player("Player {}".format(i), "avatar.png")
+
+    for i in range(0, num_turns):
+        service.start_new_turn()
+
+        for player in service.players:
+            service.draw_power_card(player)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Game archive export and import")
+    parser.add_argument("--players", type=int, default=8)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--times", type=int, default=50)
+    parser.add_argument("--format", choices=[x.value for x in DeckStorageFormat], default=DeckStorageFormat.ROWS.value)
+    parser.add_argument("--fixture", help="restore this archive instead of playing a new game")
+    parser.add_argument("--save", help="also write the archive to this path")
+    args = parser.parse_args()
+
+    database: str = create_database()
+    service: GameService = create_service(database, DeckStorageFormat(args.format))
+
+    if args.fixture is None:
+        create_game(service, args.players, args.turns)
+    else:
+        with open(args.fixture, "rb") as file:
+            service.import_game(file)
+
+    archive = io.BytesIO()
+    service.export_game(archive)
+
+    if args.save is not None:
+        with open(args.save, "wb") as file:
+            file.write(archive.getvalue())
+
+    results: List[Result] = [
+        measure("export_game", database, lambda: service.export_game(io.BytesIO()), args.times),
+        measure("import_game", database, lambda: service.import_game(io.BytesIO(archive.getvalue())), args.times)]
+
+    print("{} players, {} decks, {} byte archive".format(len(service.players), args.format, len(archive.getvalue())))
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# Compares the incremental game and player saves against the old delete-and-reinsert snapshot saves
+#
+# Run from the repo root with: PYTHONPATH=src python benchmark/bench_game_repository.py
+import argparse
+import tempfile
+from typing import Dict
+
+from common.enums import DeckStorageFormat
+from core.game import Game
+from core.player import Player
+from domain.game_respository import GameRepository
+from domain.player_respository import PlayerRepository
+
+from bench_support import create_database, create_game_service, measure, print_comparison, Result
+
+
+class SnapshotGameRepository(GameRepository):
+    def save(self, game: Game):
+        with self.get_session_begin() as session:
+            self._save_all(game, session)
+
+        game.mark_clean()
+
+
+class SnapshotPlayerRepository(PlayerRepository):
+    def save(self, player: Player):
+        with self.get_session_begin() as session:
+            self._save_all(player, session)
+
+        player.mark_clean()
+
+
+def run(snapshot: bool, num_players: int, times: int,
+        storage_format: DeckStorageFormat = DeckStorageFormat.ROWS) -> Dict[str, Result]:
+    database: str = create_database()
+
+    if snapshot:
+        game_repository = SnapshotGameRepository(database, storage_format)
+        player_repository = SnapshotPlayerRepository(database, storage_format)
+    else:
+        game_repository = GameRepository(database, storage_format)
+        player_repository = PlayerRepository(database, storage_format)
+
+    service = create_game_service(database, storage_format, player_repository=player_repository,
+                                  game_repository=game_repository)
+
+    for i in range(0, num_players):
+        service.add_player("Player {}".format(i), "avatar.png")
+
+    player_ids = [p.id for p in service.players]
+    draws = {'count': 0}
+
+    def draw_power_card():
+        # Same work as /api/players/<id>/drawPowerCard
+        player: Player = service.get_player(player_ids[draws['count'] % len(player_ids)])
+        player.draw_power_card(service.game.power_deck)
+        service.save_game()
+        service.save_player(player)
+        draws['count'] = draws['count'] + 1
+
+    def refill_power_deck():
+        if service.game.power_deck.size < 5:
+            service.start_new_game(tempfile.mkdtemp())
+
+    results: Dict[str, Result] = {}
+    results['start_new_turn'] = measure("start_new_turn", database, service.start_new_turn, times)
+    results['drawPowerCard'] = measure("drawPowerCard", database, draw_power_card, times * 5,
+                                       setup=refill_power_deck)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot vs incremental game and player saves")
+    parser.add_argument("--players", type=int, default=8)
+    parser.add_argument("--times", type=int, default=20)
+    parser.add_argument("--format", choices=[x.value for x in DeckStorageFormat], default=DeckStorageFormat.ROWS.value,
+                        help="Deck storage format for the incremental saves")
+    args = parser.parse_args()
+
+    before: Dict[str, Result] = run(True, args.players, args.times)
+    after: Dict[str, Result] = run(False, args.players, args.times, DeckStorageFormat(args.format))
+
+    print("{} players, snapshot save (before) vs incremental {} save (after)".format(args.players, args.format))
+    print_comparison(before, after)
+
+
+if __name__ == "__main__":
+    main()
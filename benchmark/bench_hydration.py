@@ -0,0 +1,66 @@
+# Times loading a whole game and its players from the database and measures the memory the loaded aggregates
+# hold. Run it on two checkouts to compare them.
+#
+# Run from the repo root with: PYTHONPATH=src python benchmark/bench_hydration.py
+import argparse
+import gc
+import tracemalloc
+from typing import List, Tuple
+
+from common.enums import DeckStorageFormat
+from core.game import Game
+from core.player import Player
+from domain.game_respository import GameRepository
+from domain.player_respository import PlayerRepository
+
+from bench_support import create_database, create_game_service, measure, print_results, Result
+
+
+def load(game_repository: GameRepository, player_repository: PlayerRepository) -> Tuple[Game, List[Player]]:
+    return game_repository._load_game(), player_repository._load_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Loading a whole game and its players")
+    parser.add_argument("--players", type=int, default=8)
+    parser.add_argument("--times", type=int, default=200)
+    parser.add_argument("--format", choices=[x.value for x in DeckStorageFormat], default=DeckStorageFormat.ROWS.value)
+    args = parser.parse_args()
+
+    storage_format: DeckStorageFormat = DeckStorageFormat(args.format)
+    database: str = create_database()
+    service = create_game_service(database, storage_format)
+
+    for i in range(0, args.players):
+        service.add_player("Player {}".format(i), "avatar.png")
+
+    service.start_new_turn()
+
+    for player in service.players:
+        for i in range(0, 3):
+            service.draw_power_card(player)
+
+    game_repository = GameRepository(database, storage_format)
+    player_repository = PlayerRepository(database, storage_format)
+    load(game_repository, player_repository)
+
+    results: List[Result] = [measure("load game and players", database,
+                                     lambda: load(game_repository, player_repository), args.times)]
+
+    gc.collect()
+    tracemalloc.start()
+    start: int = tracemalloc.get_traced_memory()[0]
+    game, players = load(game_repository, player_repository)
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    num_cards: int = game.program_deck.size + game.power_deck.size + \
+        sum(x.program_hand.size + x.power_hand.size for x in players)
+
+    print("{} players, {} decks, {} cards in decks and hands".format(len(players), args.format, num_cards))
+    print_results(results)
+    print("{:<40} {:>10.1f} KB held {:>8.1f} KB peak".format("memory", (held - start) / 1024, (peak - start) / 1024))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# Compares the Core row reads of players, the game and decks against reading them through ORM models
+#
+# Run from the repo root with: PYTHONPATH=src python benchmark/bench_row_reader.py
+import argparse
+from typing import Dict, List
+
+from sqlalchemy.orm import selectinload
+
+from common.enums import DeckStorageFormat, DeckType
+from core.deck import Deck
+from core.game import Game
+from core.player import Player
+from domain.card_catalog import CardCatalog
+from domain.deck_respository import DeckRepository
+from domain.game_respository import GameRepository
+from domain.models.deck_model import DeckModel
+from domain.models.game_model import GameModel
+from domain.models.packed_deck_model import PackedDeckModel
+from domain.models.player_model import PlayerModel
+from domain.player_respository import PlayerRepository
+
+from bench_support import create_database, create_game_service, measure, print_comparison, Result
+
+
+class OrmPlayerRepository(PlayerRepository):
+    def _load_by_id(self, id: str) -> Player:
+        card_catalog: CardCatalog = self._deck_repository.get_card_catalog()
+
+        with self.get_read_session_begin() as session:
+            result: PlayerModel = session.query(PlayerModel).options(selectinload(PlayerModel.program_hand),
+                                                                      selectinload(PlayerModel.power_hand),
+                                                                      selectinload(PlayerModel.registers),
+                                                                      selectinload(PlayerModel.packed_decks)) \
+                .filter_by(id=id).first()
+
+            return None if result is None else result.to_player(card_catalog)
+
+
+class OrmGameRepository(GameRepository):
+    def _load_game(self) -> Game:
+        card_catalog: CardCatalog = self._deck_repository.get_card_catalog()
+
+        with self.get_read_session_begin() as session:
+            result: GameModel = session.query(GameModel).first()
+
+            return None if result is None else result.to_game(card_catalog)
+
+
+class OrmDeckRepository(DeckRepository):
+    def get_by_id_and_type(self, id: str, type: DeckType) -> Deck:
+        card_catalog: CardCatalog = self.get_card_catalog()
+
+        with self.get_read_session_begin() as session:
+            packed: PackedDeckModel = session.get(PackedDeckModel, (id, type))
+
+            if packed is not None:
+                return packed.to_deck(card_catalog.lookup)
+
+            result: List[DeckModel] = session.query(DeckModel).filter_by(parent_id=id).order_by(
+                DeckModel.card_order).all()
+
+            return DeckModel.to_deck(result, type, id, card_catalog=card_catalog)
+
+
+# Reads go around the aggregate caches, since a cache hit never reaches the database either way
+def run(orm: bool, num_players: int, times: int, storage_format: DeckStorageFormat) -> Dict[str, Result]:
+    database: str = create_database()
+    service = create_game_service(database, storage_format)
+
+    for i in range(0, num_players):
+        service.add_player("Player {}".format(i), "avatar.png")
+
+    service.start_new_turn()
+
+    for player in service.players:
+        for i in range(0, 3):
+            service.draw_power_card(player)
+
+    if orm:
+        player_repository = OrmPlayerRepository(database, storage_format)
+        game_repository = OrmGameRepository(database, storage_format)
+        deck_repository = OrmDeckRepository(database, storage_format)
+    else:
+        player_repository = PlayerRepository(database, storage_format)
+        game_repository = GameRepository(database, storage_format)
+        deck_repository = DeckRepository(database, storage_format)
+
+    player_ids: List[str] = [p.id for p in service.players]
+    game_id: str = service.game.id
+    reads = {'count': 0}
+
+    def get_player():
+        player_repository._load_by_id(player_ids[reads['count'] % len(player_ids)])
+        reads['count'] = reads['count'] + 1
+
+    results: Dict[str, Result] = {}
+    results['get_by_id'] = measure("get_by_id", database, get_player, times * len(player_ids))
+    results['get_game'] = measure("get_game", database, game_repository._load_game, times)
+    results['get_by_id_and_type'] = measure("get_by_id_and_type", database,
+                                            lambda: deck_repository.get_by_id_and_type(game_id, DeckType.PROGRAM_DECK),
+                                            times)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ORM vs Core row reads of players, the game and decks")
+    parser.add_argument("--players", type=int, default=8)
+    parser.add_argument("--times", type=int, default=200)
+    parser.add_argument("--format", choices=[x.value for x in DeckStorageFormat], default=DeckStorageFormat.ROWS.value)
+    args = parser.parse_args()
+
+    storage_format: DeckStorageFormat = DeckStorageFormat(args.format)
+    before: Dict[str, Result] = run(True, args.players, args.times, storage_format)
+    after: Dict[str, Result] = run(False, args.players, args.times, storage_format)
+
+    print("{} players, {} decks, ORM reads (before) vs Core row reads (after)".format(args.players, args.format))
+    print_comparison(before, after)
+
+
+if __name__ == "__main__":
+    main()
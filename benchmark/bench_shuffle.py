@@ -0,0 +1,80 @@
+# Compares the riffle and Fisher-Yates shuffle engines against the old riffle that inserted into the middle
+# of the deck
+#
+# Run from the repo root with: PYTHONPATH=src python benchmark/bench_shuffle.py
+import argparse
+import time
+from random import Random
+from typing import Callable, Dict, List
+
+from common.enums import ShuffleType
+from core.shuffle_engine import ShuffleEngine, RiffleShuffleEngine
+
+from bench_support import print_comparison, Result
+
+
+# The old Deck.shuffle, which needs at least 20 cards
+class InsertRiffleShuffleEngine(ShuffleEngine):
+    def shuffle(self, cards, times=0):
+        deck = list(cards)
+
+        if times == 0:
+            times = self._random.randint(RiffleShuffleEngine.MIN_SHUFFLES, RiffleShuffleEngine.MAX_SHUFFLES)
+
+        for i in range(0, times):
+            deck, second_deck = self._cut_deck(deck)
+
+            for index, item in enumerate(second_deck):
+                deck.insert(index * 2 + 1, item)
+
+        deck, second_deck = self._cut_deck(deck)
+
+        return second_deck + deck
+
+    def _cut_deck(self, deck):
+        cut_index = self._random.randint(10, len(deck) - 10)
+
+        return deck[:cut_index], deck[cut_index:]
+
+
+def time_shuffles(name: str, shuffle: Callable, times: int) -> Result:
+    timings: List[float] = []
+
+    for i in range(0, times):
+        start: float = time.perf_counter()
+        shuffle()
+        timings.append(time.perf_counter() - start)
+
+    return Result(name, timings, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shuffle engines against the old insert riffle")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 84, 250, 500, 999])
+    parser.add_argument("--riffles", type=int, default=RiffleShuffleEngine.MAX_SHUFFLES)
+    parser.add_argument("--times", type=int, default=200)
+    args = parser.parse_args()
+
+    for type in ShuffleType:
+        before: Dict[str, Result] = {}
+        after: Dict[str, Result] = {}
+
+        for size in args.sizes:
+            cards: List[int] = list(range(0, size))
+            old: ShuffleEngine = InsertRiffleShuffleEngine(Random(size))
+            new: ShuffleEngine = ShuffleEngine.create(type, Random(size))
+
+            if type == ShuffleType.RIFFLE and old.shuffle(cards, args.riffles) != new.shuffle(cards, args.riffles):
+                raise AssertionError("Riffle engine order differs from the old riffle for {} cards".format(size))
+
+            name: str = "{} cards".format(size)
+            before[name] = time_shuffles(name, lambda: old.shuffle(cards, args.riffles), args.times)
+            after[name] = time_shuffles(name, lambda: new.shuffle(cards, args.riffles), args.times)
+
+        print("{} riffles, old insert riffle (before) vs {} engine (after)".format(args.riffles, type.value))
+        print_comparison(before, after)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Compares the storage backends on the same game service operations
+#
+# Run from the repo root with: PYTHONPATH=src python benchmark/bench_storage_backend.py
+import argparse
+import os
+import tempfile
+from typing import Dict, List
+
+from common.enums import DeckStorageFormat, StorageBackendType
+from core.player import Player
+from domain.storage_backend import StorageBackend
+
+from bench_support import create_database, create_game_service, measure, print_results, Result
+
+
+def run(type: StorageBackendType, num_players: int, times: int,
+        storage_format: DeckStorageFormat) -> Dict[str, Result]:
+    database: str = create_database()
+    storage: StorageBackend = StorageBackend.create(type, database, storage_format,
+                                                    directory=os.path.join(os.path.dirname(database), "storage"))
+    service = create_game_service(database, storage_format, player_repository=storage.player_repository,
+                                  game_repository=storage.game_repository, event_repository=storage.event_repository)
+
+    for i in range(0, num_players):
+        service.add_player("Player {}".format(i), "avatar.png")
+
+    player_ids: List[str] = [p.id for p in service.players]
+    draws = {'count': 0}
+
+    def draw_power_card():
+        # Same work as /api/players/<id>/drawPowerCard
+        player: Player = service.get_player(player_ids[draws['count'] % len(player_ids)])
+        service.draw_power_card(player)
+        draws['count'] = draws['count'] + 1
+
+    def refill_power_deck():
+        if service.game.power_deck.size < 5:
+            service.start_new_game(tempfile.mkdtemp())
+
+    def inc_damage():
+        service.inc_damage(service.get_player(player_ids[0]))
+
+    results: Dict[str, Result] = {}
+    results['start_new_turn'] = measure("{} start_new_turn".format(type.value), database, service.start_new_turn,
+                                        times)
+    results['drawPowerCard'] = measure("{} drawPowerCard".format(type.value), database, draw_power_card,
+                                       times * 5, setup=refill_power_deck)
+    results['inc_damage'] = measure("{} inc_damage".format(type.value), database, inc_damage, times * 5)
+    results['checkpoint'] = measure("{} checkpoint".format(type.value), database, storage.checkpoint, 1)
+    storage.close()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Game service operations on each storage backend")
+    parser.add_argument("--players", type=int, default=8)
+    parser.add_argument("--times", type=int, default=20)
+    parser.add_argument("--format", choices=[x.value for x in DeckStorageFormat],
+                        default=DeckStorageFormat.PACKED.value)
+    parser.add_argument("--backends", nargs="+", choices=[x.value for x in StorageBackendType],
+                        default=[x.value for x in StorageBackendType])
+    args = parser.parse_args()
+
+    results: List[Result] = []
+
+    for backend in args.backends:
+        results.extend(run(StorageBackendType(backend), args.players, args.times,
+                           DeckStorageFormat(args.format)).values())
+
+    print("{} players, {} decks".format(args.players, args.format))
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
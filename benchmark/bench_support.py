@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import math
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, List, Dict
+
+from sqlalchemy import event
+
+from application import db
+from application.card_uploader import CardUploader
+from application.game_service import GameService
+from common.engine_registry import EngineRegistry
+from common.enums import DeckStorageFormat
+from domain.card_respository import CardRepository
+from domain.deck_factory import DeckFactory
+from domain.deck_respository import DeckRepository
+from domain.game_event_repository import GameEventRepository
+from domain.game_respository import GameRepository
+from domain.player_respository import PlayerRepository
+import domain.models
+import domain.models.board_state_model
+
+ROOT_DIR: str = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+UI_DIR: str = os.path.join(ROOT_DIR, "src", "ui")
+
+
+def create_database(name: str = "roborally.db") -> str:
+    path: str = os.path.join(tempfile.mkdtemp(prefix="roborally-bench-"), name)
+    db.metadata.create_all(EngineRegistry.get_engine(path))
+
+    return path
+
+
+# A GameService with every repository on the benchmark's database, so nothing falls back to the live one.
+# Cards come from the images the UI ships with.
+def create_game_service(database: str, storage_format: DeckStorageFormat = DeckStorageFormat.ROWS,
+                        player_repository: PlayerRepository = None, game_repository: GameRepository = None,
+                        event_repository: GameEventRepository = None) -> GameService:
+    card_repository: CardRepository = CardRepository(database)
+
+    return GameService(UI_DIR, tempfile.mkdtemp(), card_repository=card_repository,
+                       deck_repository=DeckRepository(database, storage_format),
+                       player_repository=PlayerRepository(database, storage_format)
+                       if player_repository is None else player_repository,
+                       game_repository=GameRepository(database, storage_format)
+                       if game_repository is None else game_repository,
+                       deck_factory=DeckFactory(card_repository),
+                       card_uploader=CardUploader(UI_DIR, card_repository),
+                       event_repository=GameEventRepository(database) if event_repository is None else event_repository)
+
+
+class StatementCounter:
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def __init__(self, database: str):
+        self._engines = [EngineRegistry.get_engine(database), EngineRegistry.get_engine(database, read_only=True)]
+        self._count: int = 0
+
+    def __enter__(self) -> StatementCounter:
+        for engine in self._engines:
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        for engine in self._engines:
+            event.remove(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith("BEGIN"):
+            self._count = self._count + 1
+
+
+class Result:
+    def __init__(self, name: str, timings: List[float], statements: int):
+        self.name = name
+        self.timings = timings
+        self.statements = statements
+
+    @property
+    def mean_ms(self) -> float:
+        return statistics.mean(self.timings) * 1000
+
+    @property
+    def median_ms(self) -> float:
+        return statistics.median(self.timings) * 1000
+
+    @property
+    def statements_per_op(self) -> float:
+        return self.statements / len(self.timings)
+
+    # Nearest-rank percentile, so p100 is the slowest run
+    def percentile_ms(self, percent: float) -> float:
+        timings: List[float] = sorted(self.timings)
+        rank: int = max(math.ceil(percent / 100 * len(timings)), 1)
+
+        return timings[rank - 1] * 1000
+
+
+def measure(name: str, database: str, operation: Callable, times: int, setup: Callable = None) -> Result:
+    timings: List[float] = []
+
+    with StatementCounter(database) as counter:
+        for i in range(0, times):
+            if setup is not None:
+                setup()
+
+            start: float = time.perf_counter()
+            operation()
+            timings.append(time.perf_counter() - start)
+
+    return Result(name, timings, counter.count)
+
+
+def print_results(results: List[Result]):
+    print("{:<40} {:>10} {:>10} {:>12}".format("operation", "mean ms", "median ms", "statements"))
+    for result in results:
+        print("{:<40} {:>10.2f} {:>10.2f} {:>12.1f}".format(result.name, result.mean_ms, result.median_ms,
+                                                             result.statements_per_op))
+
+
+def print_comparison(before: Dict[str, Result], after: Dict[str, Result]):
+    print("{:<30} {:>12} {:>12} {:>9} {:>12} {:>12}".format("operation", "before ms", "after ms", "speedup",
+                                                             "before stmts", "after stmts"))
+    for name in before:
+        print("{:<30} {:>12.2f} {:>12.2f} {:>8.1f}x {:>12.1f} {:>12.1f}".format(
+            name, before[name].mean_ms, after[name].mean_ms, before[name].mean_ms / after[name].mean_ms,
+            before[name].statements_per_op, after[name].statements_per_op))
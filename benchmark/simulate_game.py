@@ -0,0 +1,365 @@
+# Plays whole games through GameService with no UI: synthetic players are dealt in, program their registers,
+# draw, pass and discard power cards, take damage, power down and drop out, turn after turn. Every operation
+# goes through the service the way the routes use it, and the report gives its latency percentiles, the SQL
+# statements it ran and the process's peak memory.
+#
+# Run it before an upgrade with --save, then after with --compare, which exits with 1 if anything got slower
+# or started running more statements. Games are seeded, so the same arguments play the same games.
+#
+# Run from the repo root with: PYTHONPATH=src python benchmark/simulate_game.py
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from random import Random
+from typing import Callable, Dict, List, Optional, Tuple
+
+from application.game_service import GameService
+from common.enums import DeckStorageFormat, StorageBackendType
+from common.sql_profiler import SqlProfile, SqlProfiler
+from core.card_move import CardMove
+from core.player import Player
+from core.registers import Registers
+from domain.storage_backend import StorageBackend
+
+from bench_support import create_database, create_game_service, Result
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# Times each operation and counts the statements it ran. Operations nest, so a save inside a transfer counts
+# towards both.
+class Operations:
+    @property
+    def results(self) -> Dict[str, Result]:
+        return self._results
+
+    @property
+    def errors(self) -> Dict[str, int]:
+        return self._errors
+
+    def __init__(self):
+        self._results: Dict[str, Result] = {}
+        self._errors: Dict[str, int] = {}
+
+    # Failures are counted and swallowed unless raise_errors is set, since a simulated player can try
+    # something the game does not allow
+    def run(self, name: str, operation: Callable, raise_errors: bool = False):
+        profile: SqlProfile = SqlProfile(name).begin()
+        start: float = time.perf_counter()
+
+        try:
+            return operation()
+        except Exception as err:
+            self._errors[name] = self._errors.get(name, 0) + 1
+
+            if raise_errors:
+                raise err
+        finally:
+            duration_s: float = time.perf_counter() - start
+            profile.end()
+            result: Result = self._results.setdefault(name, Result(name, [], 0))
+            result.timings.append(duration_s)
+            result.statements = result.statements + profile.statements
+
+    def timed(self, name: str, function: Callable) -> Callable:
+        return lambda *args, **kwargs: self.run(name, lambda: function(*args, **kwargs), raise_errors=True)
+
+
+class SimulatedPlayer:
+    DRAW_CHANCE: float = 0.3
+    PASS_CHANCE: float = 0.15
+    DISCARD_CHANCE: float = 0.1
+    UPDATE_CHANCE: float = 0.1
+    THROW_CHANCE: float = 0.1
+    DAMAGE_CHANCE: float = 0.35
+    REPAIR_CHANCE: float = 0.1
+    POWER_DOWN_CHANCE: float = 0.08
+    POWER_UP_CHANCE: float = 0.5
+    LEAVE_CHANCE: float = 0.03
+    REJOIN_CHANCE: float = 0.5
+
+    @property
+    def id(self) -> str:
+        return self._id
+
+    def __init__(self, id: str, simulation: 'GameSimulation', rng: Random):
+        self._id: str = id
+        self._simulation: GameSimulation = simulation
+        self._random: Random = rng
+
+    def play_turn(self):
+        player: Player = self._player()
+
+        if not player.is_active:
+            if self._chance(self.REJOIN_CHANCE):
+                self._run("set_active", lambda: self._service.set_active(self._player(), True))
+
+            return
+
+        self._program_registers(player)
+
+        if self._chance(self.DRAW_CHANCE) and self._service.game.power_deck.size > 0:
+            self._run("draw_power_card", lambda: self._service.draw_power_card(self._player()))
+
+        self._play_power_cards()
+
+        if self._chance(self.THROW_CHANCE):
+            register: int = self._random.randrange(Registers.REGISTER_SIZE)
+            self._run("throw", lambda: self._service.throw(self._player(), register))
+
+        if self._chance(self.DAMAGE_CHANCE):
+            self._run("inc_damage", lambda: self._service.inc_damage(self._player()))
+        elif self._chance(self.REPAIR_CHANCE):
+            self._run("dec_damage", lambda: self._service.dec_damage(self._player()))
+
+        if not player.will_be_powered_down and self._chance(self.POWER_DOWN_CHANCE):
+            self._run("will_power_down", lambda: self._service.will_power_down(self._player()))
+        elif player.will_be_powered_down and self._chance(self.POWER_UP_CHANCE):
+            self._run("will_power_up", lambda: self._service.will_power_up(self._player()))
+
+        if self._chance(self.LEAVE_CHANCE):
+            self._run("set_active", lambda: self._service.set_active(self._player(), False))
+
+    @property
+    def _service(self) -> GameService:
+        return self._simulation.service
+
+    # Fills the unlocked registers from the program hand, either one drag at a time or in one batch
+    def _program_registers(self, player: Player):
+        registers: List[int] = [i for i in range(0, Registers.REGISTER_SIZE) if not player.registers.locks[i]]
+        moves: List[CardMove] = []
+
+        for i in range(0, min(len(registers), player.program_hand.size)):
+            moves.append(CardMove("program_hand", self._random.randrange(player.program_hand.size - i),
+                                  "registers", registers[i]))
+
+        if self._simulation.batch_moves and len(moves) > 0:
+            self._run("move_cards", lambda: self._service.move_cards(self._player(), moves))
+            return
+
+        for move in moves:
+            self._run("transfer_card", lambda: self._service.transfer_card(
+                self._player(), move.from_hand, move.from_index, self._player(), move.to_hand, move.to_index))
+
+    def _play_power_cards(self):
+        player: Player = self._player()
+
+        if player.power_hand.size == 0:
+            return
+
+        index: int = self._random.randrange(player.power_hand.size)
+        card = player.power_hand.cards[index]
+
+        if self._chance(self.UPDATE_CHANCE):
+            orb: int = self._random.randrange(4)
+            self._run("update_power_card",
+                      lambda: self._service.update_power_card(self._player(), card.filename, orb, orb))
+
+        if self._chance(self.PASS_CHANCE) and len(self._simulation.players) > 1:
+            to_id: str = self._random.choice([x.id for x in self._simulation.players if x.id != self._id])
+            self._run("transfer_card", lambda: self._service.transfer_card(
+                self._player(), "power_hand", index, self._service.get_player(to_id), "power_hand", 0))
+        elif self._chance(self.DISCARD_CHANCE):
+            self._run("discard_power_card", lambda: self._service.discard_power_card(self._player(), card.number))
+
+    def _player(self) -> Player:
+        return self._service.get_player(self._id)
+
+    def _chance(self, chance: float) -> bool:
+        return self._random.random() < chance
+
+    def _run(self, name: str, operation: Callable):
+        self._simulation.operations.run(name, operation)
+
+
+class GameSimulation:
+    @property
+    def service(self) -> GameService:
+        return self._service
+
+    @property
+    def operations(self) -> Operations:
+        return self._operations
+
+    @property
+    def players(self) -> List[SimulatedPlayer]:
+        return self._players
+
+    @property
+    def batch_moves(self) -> bool:
+        return self._batch_moves
+
+    def __init__(self, service: GameService, seed: int, batch_moves: bool = False):
+        self._service: GameService = service
+        self._seed: int = seed
+        self._random: Random = Random(seed)
+        self._batch_moves: bool = batch_moves
+        self._operations: Operations = Operations()
+        self._players: List[SimulatedPlayer] = []
+        self._board_state_directory: str = tempfile.mkdtemp()
+
+        # Saves happen inside other operations, so they are timed where the service makes them
+        service.save_player = self._operations.timed("save_player", service.save_player)
+        service.save_game = self._operations.timed("save_game", service.save_game)
+
+    def add_players(self, count: int):
+        for i in range(0, count):
+            player: Player = self._operations.run("add_player", lambda: self._service.add_player(
+                "Player {}".format(len(self._players)), "avatar.png"), raise_errors=True)
+            self._players.append(SimulatedPlayer(player.id, self, Random(self._random.random())))
+
+    def play_game(self, game: int, turns: int):
+        self._operations.run("start_new_game", lambda: self._service.start_new_game(
+            self._board_state_directory, seed=self._seed + game), raise_errors=True)
+
+        for turn in range(0, turns):
+            self._operations.run("start_new_turn", self._service.start_new_turn, raise_errors=True)
+
+            for player in self._players:
+                player.play_turn()
+
+
+def create_service(backend: StorageBackendType,
+                   storage_format: DeckStorageFormat) -> Tuple[GameService, StorageBackend]:
+    database: str = create_database()
+    storage: StorageBackend = StorageBackend.create(backend, database, storage_format,
+                                                    directory=os.path.join(os.path.dirname(database), "storage"))
+    service = create_game_service(database, storage_format, player_repository=storage.player_repository,
+                                  game_repository=storage.game_repository, event_repository=storage.event_repository)
+
+    return service, storage
+
+
+def peak_rss_kb() -> Optional[int]:
+    if resource is None:
+        return None
+
+    # Linux reports kilobytes and macOS bytes
+    peak: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def summarize(operations: Operations) -> Dict[str, Dict]:
+    summary: Dict[str, Dict] = {}
+
+    for name in sorted(operations.results):
+        result: Result = operations.results[name]
+        summary[name] = {'calls': len(result.timings),
+                         'p50_ms': round(result.percentile_ms(50), 3),
+                         'p90_ms': round(result.percentile_ms(90), 3),
+                         'p99_ms': round(result.percentile_ms(99), 3),
+                         'max_ms': round(result.percentile_ms(100), 3),
+                         'statements_per_op': round(result.statements_per_op, 2),
+                         'errors': operations.errors.get(name, 0)}
+
+    return summary
+
+
+def print_summary(summary: Dict[str, Dict]):
+    print("{:<20} {:>7} {:>9} {:>9} {:>9} {:>9} {:>11} {:>7}".format(
+        "operation", "calls", "p50 ms", "p90 ms", "p99 ms", "max ms", "statements", "errors"))
+    for name, values in summary.items():
+        print("{:<20} {:>7} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f} {:>11.1f} {:>7}".format(
+            name, values['calls'], values['p50_ms'], values['p90_ms'], values['p99_ms'], values['max_ms'],
+            values['statements_per_op'], values['errors']))
+
+
+# An operation regressed if its median got slower by more than the tolerance, or it runs more statements
+def compare(baseline: Dict[str, Dict], summary: Dict[str, Dict], tolerance: float) -> List[str]:
+    regressed: List[str] = []
+    print("{:<20} {:>12} {:>12} {:>9} {:>12} {:>12}".format("operation", "before p50", "after p50", "change",
+                                                             "before stmts", "after stmts"))
+
+    for name, values in summary.items():
+        before: Optional[Dict] = baseline.get(name)
+
+        if before is None:
+            continue
+
+        change: float = values['p50_ms'] / before['p50_ms'] - 1 if before['p50_ms'] > 0 else 0.0
+        slower: bool = change > tolerance or values['statements_per_op'] > before['statements_per_op']
+
+        if slower:
+            regressed.append(name)
+
+        print("{:<20} {:>12.2f} {:>12.2f} {:>8.0%} {:>12.1f} {:>12.1f}{}".format(
+            name, before['p50_ms'], values['p50_ms'], change, before['statements_per_op'],
+            values['statements_per_op'], "  <- regressed" if slower else ""))
+
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless game simulation")
+    parser.add_argument("--players", type=int, default=8)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--games", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--backend", choices=[x.value for x in StorageBackendType],
+                        default=StorageBackendType.SQLITE.value)
+    parser.add_argument("--format", choices=[x.value for x in DeckStorageFormat],
+                        default=DeckStorageFormat.PACKED.value)
+    parser.add_argument("--batch-moves", action="store_true", help="program registers with one moveCards call")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also report the peak Python allocation, which slows everything down")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare against results saved with --save")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="slowdown allowed by --compare")
+    args = parser.parse_args()
+
+    if args.trace_memory:
+        tracemalloc.start()
+
+    SqlProfiler.enable()
+    service, storage = create_service(StorageBackendType(args.backend), DeckStorageFormat(args.format))
+    simulation = GameSimulation(service, args.seed, args.batch_moves)
+    start: float = time.perf_counter()
+    simulation.add_players(args.players)
+
+    for game in range(0, args.games):
+        simulation.play_game(game, args.turns)
+
+    elapsed_s: float = time.perf_counter() - start
+    storage.close()
+    SqlProfiler.disable()
+
+    summary: Dict[str, Dict] = summarize(simulation.operations)
+    calls: int = sum(x['calls'] for name, x in summary.items() if not name.startswith("save_"))
+    results: Dict = {'backend': args.backend, 'format': args.format, 'players': args.players,
+                     'turns': args.turns, 'games': args.games, 'seed': args.seed, 'batch_moves': args.batch_moves,
+                     'elapsed_s': round(elapsed_s, 3), 'peak_rss_kb': peak_rss_kb(),
+                     'peak_traced_kb': tracemalloc.get_traced_memory()[1] // 1024 if args.trace_memory else None,
+                     'operations': summary}
+
+    print("{} players, {} games of {} turns, {} backend, {} decks".format(args.players, args.games, args.turns,
+                                                                        args.backend, args.format))
+    print("{} operations in {:.2f} s, {:.0f} per second, peak RSS {} KB, peak traced {} KB".format(
+        calls, elapsed_s, calls / elapsed_s, results['peak_rss_kb'], results['peak_traced_kb']))
+    print_summary(summary)
+
+    if args.save is not None:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as file:
+            baseline: Dict = json.load(file)
+
+        print()
+        regressed: List[str] = compare(baseline['operations'], summary, args.tolerance)
+
+        if len(regressed) > 0:
+            print("Regressed: " + ", ".join(regressed))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
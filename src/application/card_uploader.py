@@ -1,7 +1,8 @@
 import os
+from typing import List, Optional
 
 from common.enums import CardType
-from core.card import Card
+from core.card_file import CardFile
 from domain.card_respository import CardRepository
 
 
@@ -19,11 +20,14 @@ class CardUploader:
         else:
             self._base_dir = os.path.join(base_dir, self.IMAGE_DIRECTORY)
 
+    # Cards are only written when the files in the card directories changed since the last refresh
     def refresh_all_cards(self):
-        self._card_repository.clear_all()
+        card_files: List[CardFile] = []
 
-        errs: str = self._refresh_power_cards()
-        errs2: str = self._refresh_program_cards()
+        errs: str = self._scan_power_cards(card_files)
+        errs2: str = self._scan_program_cards(card_files)
+
+        self._card_repository.refresh_from_manifest(card_files)
 
         errors: str = ""
         if len(errs) > 0:
@@ -34,34 +38,44 @@ class CardUploader:
         if len(errors) > 0:
             raise Exception(errors)
 
-    def _refresh_power_cards(self) -> str:
+    def _scan_power_cards(self, card_files: List[CardFile]) -> str:
         cards = os.scandir(os.path.join(self._base_dir, "power_cards"))
         errors: str = ""
 
         for card in cards:
             if card.is_file():
                 parts = card.name.split("_")
+                number: Optional[int] = None
 
                 if len(parts) != 2 and card.name:
                     errors = errors + card.name + ", "
                 else:
-                    number: int = int(parts[0])
-                    self._card_repository.create(Card(number, card.name, CardType.POWER))
+                    number = int(parts[0])
+
+                card_files.append(self._to_card_file(card, CardType.POWER, number))
 
         return errors
 
-    def _refresh_program_cards(self) -> str:
-        cards = os.scandir(os.path.join(self._base_dir,"program_cards"))
+    def _scan_program_cards(self, card_files: List[CardFile]) -> str:
+        cards = os.scandir(os.path.join(self._base_dir, "program_cards"))
         errors: str = ""
 
         for card in cards:
             if card.is_file():
                 parts = card.name.split("_")
+                number: Optional[int] = None
 
                 if len(parts) != 3 and card.name:
                     errors = errors + card.name + ", "
                 else:
-                    number: int = int(parts[2][:-4])  # String out file suffix
-                    self._card_repository.create(Card(number, card.name, CardType.PROGRAM))
+                    number = int(parts[2][:-4])  # String out file suffix
+
+                card_files.append(self._to_card_file(card, CardType.PROGRAM, number))
 
         return errors
+
+    @staticmethod
+    def _to_card_file(entry: os.DirEntry, type: CardType, number: Optional[int]) -> CardFile:
+        stat: os.stat_result = entry.stat()
+
+        return CardFile(entry.name, type, stat.st_size, stat.st_mtime_ns, number)
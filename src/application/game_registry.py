@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from application.game_service import GameService
+
+
+class HostedGame:
+    @property
+    def service(self) -> GameService:
+        return self._service
+
+    @property
+    def last_used(self) -> float:
+        return self._last_used
+
+    # Requests still working with the game's service
+    @property
+    def in_use(self) -> bool:
+        return self._users > 0
+
+    def __init__(self, service: GameService, close: Callable[[], None]):
+        self._service: GameService = service
+        self._close: Callable[[], None] = close
+        self._last_used: float = time.monotonic()
+        self._users: int = 0
+
+    def touch(self):
+        self._last_used = time.monotonic()
+
+    def acquire(self):
+        self._users = self._users + 1
+        self.touch()
+
+    def release(self):
+        self._users = self._users - 1
+        self.touch()
+
+    def close(self):
+        self._close()
+
+
+# Every game this process is hosting, by id, each with its own game service. Games are only made by create,
+# then opened the first time they are asked for and closed again once nobody has used them within the TTL.
+# The default game is the one from before there were several, always exists and is never closed.
+class GameRegistry:
+    DEFAULT_GAME_ID: str = "default"
+    DEFAULT_IDLE_TTL_S: float = 4 * 60 * 60
+
+    # Game ids end up in file names and URLs
+    _valid_id = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+    @property
+    def game_ids(self) -> List[str]:
+        with self._lock:
+            return sorted(self._games.keys())
+
+    def __init__(self, open_game: Callable[[str], Tuple[GameService, Callable[[], None]]],
+                 exists: Callable[[str], bool], idle_ttl_s: float = DEFAULT_IDLE_TTL_S):
+        self._open_game: Callable[[str], Tuple[GameService, Callable[[], None]]] = open_game
+        self._exists: Callable[[str], bool] = exists
+        self._idle_ttl_s: float = idle_ttl_s
+        self._lock: threading.RLock = threading.RLock()
+        self._games: Dict[str, HostedGame] = {}
+
+    @classmethod
+    def is_valid_id(cls, game_id: str) -> bool:
+        return game_id is not None and cls._valid_id.fullmatch(game_id) is not None
+
+    def exists(self, game_id: str) -> bool:
+        with self._lock:
+            return game_id == self.DEFAULT_GAME_ID or game_id in self._games or self._exists(game_id)
+
+    # Returns None for a game that has not been created
+    def get(self, game_id: str = DEFAULT_GAME_ID) -> Optional[GameService]:
+        game: Optional[HostedGame] = self._hosted(game_id)
+
+        return None if game is None else game.service
+
+    def create(self, game_id: str) -> GameService:
+        if not self.is_valid_id(game_id):
+            raise ValueError("Invalid game ID: {}".format(game_id))
+
+        with self._lock:
+            if self.exists(game_id):
+                raise ValueError("Game {} already exists".format(game_id))
+
+            game: HostedGame = HostedGame(*self._open_game(game_id))
+            self._games[game_id] = game
+
+        return game.service
+
+    # Like get, but the game is not closed as idle until the matching release
+    def acquire(self, game_id: str = DEFAULT_GAME_ID) -> Optional[GameService]:
+        game: Optional[HostedGame] = self._hosted(game_id, acquire=True)
+
+        return None if game is None else game.service
+
+    def release(self, game_id: str = DEFAULT_GAME_ID):
+        with self._lock:
+            game: Optional[HostedGame] = self._games.get(game_id)
+
+            if game is not None:
+                game.release()
+
+    def _hosted(self, game_id: str, acquire: bool = False) -> Optional[HostedGame]:
+        if not self.is_valid_id(game_id):
+            raise ValueError("Invalid game ID: {}".format(game_id))
+
+        self.evict_idle()
+
+        with self._lock:
+            game: HostedGame = self._games.get(game_id)
+
+            if game is None:
+                if not self.exists(game_id):
+                    return None
+
+                game = HostedGame(*self._open_game(game_id))
+                self._games[game_id] = game
+
+            if acquire:
+                game.acquire()
+            else:
+                game.touch()
+
+        return game
+
+    # Returns the ids of the games that were closed
+    def evict_idle(self) -> List[str]:
+        now: float = time.monotonic()
+
+        with self._lock:
+            idle: List[str] = [id for id, game in self._games.items()
+                               if id != self.DEFAULT_GAME_ID and not game.in_use and
+                               now - game.last_used > self._idle_ttl_s]
+            games: List[HostedGame] = [self._games.pop(id) for id in idle]
+
+        for id, game in zip(idle, games):
+            try:
+                game.close()
+            except Exception as err:
+                print("Problem closing game {}: {}".format(id, err))
+
+        return idle
+
+    def close(self):
+        with self._lock:
+            games: Dict[str, HostedGame] = self._games
+            self._games = {}
+
+        for id, game in games.items():
+            try:
+                game.close()
+            except Exception as err:
+                print("Problem closing game {}: {}".format(id, err))
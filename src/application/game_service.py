@@ -1,33 +1,60 @@
 from __future__ import annotations
 
 import os
-from typing import List
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import BinaryIO, List, Iterator, Optional, Tuple
+from uuid import uuid4
 
 from application.card_uploader import CardUploader
-from common.enums import DeckType
+from application.write_behind_queue import WriteBehindQueue
+from common.enums import DeckType, GameEventType
+from common.sql_profiler import SqlProfiler
+from common.unit_of_work import UnitOfWork
 from core.card import Card
+from core.card_move import CardMove
+from core.deck import Deck
 from core.game import Game, GameProps
+from core.game_event import GameEvent
 from core.hand import Hand
-from core.player import Player, PlayerProps
+from core.player import Player
+from core.registers import Registers
 from domain.card_respository import CardRepository
 from domain.deck_factory import DeckFactory
 from domain.deck_respository import DeckRepository
+from domain.game_event_applier import GameEventApplier
+from domain.game_archive import GameArchive
+from domain.game_event_repository import GameEventRepository
 from domain.game_factory import GameFactory
 from domain.game_respository import GameRepository
-from domain.player_factory import PlayerFactory
+from domain.player_projections import PlayerSummary, TurnRegisterInfo
 from domain.player_respository import PlayerRepository
 
 
+@SqlProfiler.profile_methods
 class GameService:
-    NUM_POWER_CARDS_NEW_GAME: int = 3
+    NUM_POWER_CARDS_NEW_GAME: int = GameEventApplier.NUM_POWER_CARDS_NEW_GAME
+    SNAPSHOT_INTERVAL: int = 100
+    NUM_RESTORE_POINTS: int = 10
 
+    # Picks up a game saved by another worker, unless this one has changes still waiting to be saved
     @property
     def game(self) -> Game:
-        return self._game
+        with self._lock:
+            if self._game.is_stale or not self._game.has_changes:
+                game: Game = self._game_repository.get_game()
+
+                if game is not None:
+                    self._game = game
+
+            return self._game
 
     @property
     def players(self) -> List[Player]:
-        players: List[Player] = self._player_repository.get_all()
+        with self._lock:
+            players: List[Player] = [self._pending_or(x) for x in self._player_repository.get_all()]
+
         players.sort(key=lambda x: x.name)
 
         return players
@@ -36,6 +63,14 @@ class GameService:
     def active_players(self) -> List[Player]:
         return [x for x in self.players if x.is_active]
 
+    # Just enough of each player for pages that list them, ordered by name
+    @property
+    def player_summaries(self) -> List[PlayerSummary]:
+        if self._has_pending_saves():
+            return [PlayerSummary.from_player(x) for x in self.players]
+
+        return self._player_repository.get_summaries()
+
     @property
     def discard_pile(self) -> Hand:
         return self._discard_pile
@@ -44,7 +79,10 @@ class GameService:
                  deck_repository: DeckRepository = None,
                  player_repository: PlayerRepository = None, game_repository: GameRepository = None,
                  deck_factory: DeckFactory = None, game_factory: GameFactory = None,
-                 card_uploader: CardUploader = None):
+                 card_uploader: CardUploader = None, write_behind: WriteBehindQueue = None,
+                 event_repository: GameEventRepository = None,
+                 board_state_path: str = os.path.join("images", "board_states"),
+                 restore_point_directory: str = None):
         if card_repository is None:
             self._card_repository: CardRepository = CardRepository()
         else:
@@ -80,63 +118,112 @@ class GameService:
         else:
             self._card_uploader = card_uploader
 
+        if event_repository is None:
+            self._event_repository: GameEventRepository = GameEventRepository(self._game_repository.database)
+        else:
+            self._event_repository: GameEventRepository = event_repository
+
+        self._write_behind: WriteBehindQueue = write_behind
+        # Requests on other threads share the game and the players waiting to be written, so only one of them
+        # changes this game at a time. The queue's writer has to wait for it too.
+        self._lock: threading.RLock = threading.RLock() if write_behind is None else write_behind.lock
+        self._board_state_path: str = board_state_path  # Where the board states are under static
+        self._restore_point_directory: str = restore_point_directory
         self._game: Game = self._game_repository.get_game()
         self._discard_pile: Hand = Hand(DeckType.POWER_HAND)  # type does not matter
 
         if self._game is None:
             self.start_new_game(board_state_directory)
 
-    def start_new_game(self, board_state_directory: str):
+    # Games started with the same seed and played the same way deal the same cards
+    def start_new_game(self, board_state_directory: str, seed: int = None):
+        with self.changing_players():
+            UnitOfWork.run(lambda: self._start_new_game(board_state_directory, seed))
+
+    def _start_new_game(self, board_state_directory: str, seed: int = None):
+        self._save_restore_point()
         self._game_repository.clear_all()
 
         try:
             all_files = os.listdir(board_state_directory)
 
             for f in all_files:
-                os.remove(os.path.join(board_state_directory, f))
+                # Other games keep their board states in directories under the default game's
+                if os.path.isfile(os.path.join(board_state_directory, f)):
+                    os.remove(os.path.join(board_state_directory, f))
         except Exception:
             pass
 
         # Refresh the cards
         self._card_uploader.refresh_all_cards()
 
-        # Create a new game and decks
+        # Shuffle new decks; dealing from them to the players is left to the event
         props: GameProps = GameProps()
-        self._game = self._game_factory.new_game(props)
-
-        # Clear out old orb and number of uses on power cards
-        self._game.power_deck.clear_cards()
-
-        # Reset the players and deal new hands
-        for player in self.players:
-            player.reset()
-            player.reset_program_hand(self._game.program_deck)
-            player.reset_power_hand(self._game.power_deck, self.NUM_POWER_CARDS_NEW_GAME)
-
-            self.save_player(player)
-
-        # Save after players since decks have been altered
-        self.save_game()
+        props.seed = seed
+        game: Game = self._game_factory.new_game(props)
+        self._execute(GameEvent(GameEventType.NEW_GAME,
+                                {'game_id': game.id,
+                                 'start_date': game.start_date,
+                                 'seed': game.seed,
+                                 'shuffle_count': game.shuffle_count,
+                                 'program_deck': GameEventApplier.deck_order(game.program_deck),
+                                 'power_deck': GameEventApplier.deck_order(game.power_deck)}),
+                      self.players)
+
+    # Archives the game about to be thrown away, keeping only the latest few
+    def _save_restore_point(self):
+        if self._restore_point_directory is None or self._game is None:
+            return
+
+        os.makedirs(self._restore_point_directory, exist_ok=True)
+        filename: str = "{}_{}{}".format(datetime.now().strftime("%Y%m%d%H%M%S%f"), self._game.id,
+                                         GameArchive.EXTENSION)
+
+        with open(os.path.join(self._restore_point_directory, filename), "wb") as file:
+            self.export_game(file)
+
+        restore_points: List[str] = sorted(x for x in os.listdir(self._restore_point_directory)
+                                           if x.endswith(GameArchive.EXTENSION))
+
+        for old in restore_points[:-self.NUM_RESTORE_POINTS]:
+            os.remove(os.path.join(self._restore_point_directory, old))
+
+    def export_game(self, stream: BinaryIO):
+        GameArchive.write(stream, self.game, self.players)
+
+    # Replaces the game and every player with the ones in the archive. The game log gets a snapshot of the
+    # imported game, so rebuilding from it starts there.
+    def import_game(self, stream: BinaryIO):
+        game, players = GameArchive.read(stream, self._card_repository.get_catalog())
+
+        with self.changing_players():
+            if self._write_behind is not None:
+                self._write_behind.flush()
+
+            UnitOfWork.run(lambda: self._import_game(game, players))
+
+    def _import_game(self, game: Game, players: List[Player]):
+        self._game_repository.replace(game)
+        self._player_repository.replace_all(players)
+        self._event_repository.save_snapshot(self._event_repository.get_last_sequence(), game, players)
+        self._game = game
 
     def add_board_state(self, filename: str):
-        self._game.add_board_state(filename)
-        self.save_game()
+        self._execute(GameEvent(GameEventType.ADD_BOARD_STATE, {'filename': filename}))
 
     def add_game_notes(self, notes: str):
-        self._game.notes = notes
-        self.save_game()
+        self._execute(GameEvent(GameEventType.SET_NOTES, {'notes': notes}))
 
     def add_player(self, name: str, filename: str = "") -> Player:
-        props: PlayerProps = PlayerProps()
-        props.name = name
-        props.avatar_filename = filename
-        player: Player = PlayerFactory.new_player(props)
-        player.reset_program_hand(self._game.program_deck)
+        return UnitOfWork.run(lambda: self._add_player(name, filename))
 
-        self.save_player(player)
-        self.save_game()
+    def _add_player(self, name: str, filename: str) -> Player:
+        id: str = str(uuid4())
+        applier: GameEventApplier = self._execute(GameEvent(GameEventType.ADD_PLAYER,
+                                                            {'player_id': id, 'name': name,
+                                                             'avatar_filename': filename}))
 
-        return player
+        return applier.players[id]
 
     def delete_player(self, id: str, avatar_dir: str) -> Player:
         player: Player = None
@@ -149,13 +236,106 @@ class GameService:
                 except Exception:
                     pass
 
-                self._player_repository.delete(p)
+                if self._write_behind is not None:
+                    self._write_behind.discard(p.id)
+
+                with self._lock, UnitOfWork():
+                    self._execute(GameEvent(GameEventType.DELETE_PLAYER, {'player_id': p.id}), [p])
+                    self._player_repository.delete(p)
                 # Don't return current cards to decks since they have been effectively played when dealt
 
                 break
 
         return player
 
+    def deal(self, player: Player):
+        self._execute(GameEvent(GameEventType.DEAL, {'player_id': player.id}), [player])
+
+    def draw_power_card(self, player: Player):
+        self._execute(GameEvent(GameEventType.DRAW_POWER_CARD, {'player_id': player.id}), [player])
+
+    def transfer_card(self, from_player: Player, from_hand: str, from_index: int, to_player: Player, to_hand: str,
+                      to_index: int, later: bool = False):
+        self._execute(GameEvent(GameEventType.TRANSFER_CARD,
+                                {'player_id': from_player.id, 'from_hand': from_hand, 'from_index': from_index,
+                                 'to_id': to_player.id, 'to_hand': to_hand, 'to_index': to_index}),
+                      [from_player, to_player], later)
+
+    # All of the moves are made and saved together, or none of them are
+    def move_cards(self, player: Player, moves: List[CardMove], later: bool = False):
+        self._execute(GameEvent(GameEventType.MOVE_CARDS,
+                                {'player_id': player.id, 'moves': [x.to_values() for x in moves]}),
+                      [player], later)
+
+    def discard_card(self, player: Player, from_hand: str, from_index: int, later: bool = False):
+        self._execute(GameEvent(GameEventType.DISCARD_CARD,
+                                {'player_id': player.id, 'from_hand': from_hand, 'from_index': from_index}),
+                      [player], later)
+
+    def discard_power_card(self, player: Player, number: int):
+        self._execute(GameEvent(GameEventType.DISCARD_POWER_CARD, {'player_id': player.id, 'number': number}),
+                      [player])
+
+    def update_power_card(self, player: Player, filename: str, orb: Optional[int], num_uses: Optional[int],
+                          later: bool = False):
+        self._execute(GameEvent(GameEventType.UPDATE_POWER_CARD,
+                                {'player_id': player.id, 'filename': filename, 'orb': orb, 'num_uses': num_uses}),
+                      [player], later)
+
+    def throw(self, player: Player, register: int, later: bool = False):
+        self._execute(GameEvent(GameEventType.THROW, {'player_id': player.id, 'register': register}), [player], later)
+
+    def lock_choices(self, player: Player):
+        self._execute(GameEvent(GameEventType.LOCK_CHOICES, {'player_id': player.id}), [player])
+
+    # Takes back locked choices before the turn starts, leaving the registers the damage locks
+    def unlock_choices(self, player: Player):
+        self._execute(GameEvent(GameEventType.UNLOCK_CHOICES, {'player_id': player.id}), [player])
+
+    def inc_damage(self, player: Player):
+        self._execute(GameEvent(GameEventType.INC_DAMAGE, {'player_id': player.id}), [player])
+
+    def dec_damage(self, player: Player):
+        self._execute(GameEvent(GameEventType.DEC_DAMAGE, {'player_id': player.id}), [player])
+
+    def set_active(self, player: Player, active: bool):
+        self._execute(GameEvent(GameEventType.SET_ACTIVE, {'player_id': player.id, 'active': active}), [player])
+
+    def will_power_down(self, player: Player):
+        self._execute(GameEvent(GameEventType.WILL_POWER_DOWN, {'player_id': player.id}), [player])
+
+    def will_power_up(self, player: Player):
+        self._execute(GameEvent(GameEventType.WILL_POWER_UP, {'player_id': player.id}), [player])
+
+    def set_instructions(self, player: Player, instructions: str):
+        if instructions != player.instructions:
+            self._execute(GameEvent(GameEventType.SET_INSTRUCTIONS,
+                                    {'player_id': player.id, 'instructions': instructions}), [player])
+
+    # Leaves the save to the write behind queue when there is one, so the caller does not wait on it
+    def save_player_later(self, player: Player):
+        if self._write_behind is None:
+            self.save_player(player)
+        else:
+            self._write_behind.enqueue(player)
+
+    # Players saved with save_player_later, and the game, must only be changed inside this
+    @contextmanager
+    def changing_players(self) -> Iterator[None]:
+        with self._lock:
+            self._hold_lock_until_committed()
+            yield
+
+    # A request commits its unit of work after the view returns, so keep other threads from loading what
+    # it changed until then
+    def _hold_lock_until_committed(self):
+        unit_of_work: Optional[UnitOfWork] = UnitOfWork.current()
+
+        if unit_of_work is not None:
+            self._lock.acquire()
+            unit_of_work.on_commit(self._lock.release)
+            unit_of_work.on_rollback(self._lock.release)
+
     def save_player(self, player: Player):
         self._player_repository.save(player)
 
@@ -163,53 +343,116 @@ class GameService:
         self._game_repository.save(self._game)
 
     def get_player(self, id: str) -> Player:
-        return self._player_repository.get_by_id(id)
+        with self._lock:
+            if self._write_behind is not None:
+                player: Player = self._write_behind.pending(id)
+
+                if player is not None:
+                    return player
+
+            return self._player_repository.get_by_id(id)
+
+    # Players still waiting to be saved are newer than anything a projection would read
+    def _has_pending_saves(self) -> bool:
+        return self._write_behind is not None and self._write_behind.pending_count > 0
+
+    # A player waiting in the write behind queue is newer than the one just loaded
+    def _pending_or(self, player: Player) -> Player:
+        if self._write_behind is None:
+            return player
+
+        pending: Player = self._write_behind.pending(player.id)
+
+        return player if pending is None else pending
 
     def get_cards(self, type) -> List[Card]:
-        return self._card_repository.get_all_by_type(type)
+        return list(self._card_repository.get_catalog().by_type(type))
 
     def get_game_stats(self) -> GameStats:
-        return GameStats(self._game.turn, self._game.start_date, len(self.players))
+        game: Game = self.game
+
+        return GameStats(game.turn, game.start_date, self._player_repository.count())
+
+    def get_register_for_turn(self, register: int) -> List[TurnRegisterInfo]:
+        if register < 1 or register > Registers.REGISTER_SIZE:
+            raise IndexError("Register must be between 1 and {}".format(Registers.REGISTER_SIZE))
 
-    def get_register_for_turn(self, register: int):
-        ret_val = [TurnRegisterInfo(p, register) for p in self.players if p.is_active]
+        if not self._has_pending_saves():
+            return self._player_repository.get_register_infos(register)
+
+        ret_val = [TurnRegisterInfo.from_player(p, register) for p in self.players if p.is_active]
         ret_val.sort(key=lambda x: x.card_num, reverse=True)
 
         return ret_val
 
     def get_board_state(self) -> BoardState:
-        self._game: Game = self._game_repository.get_game()
+        return BoardState(self.game, self._board_state_path)
 
-        return BoardState(self._game)
+    def get_history(self, after: int = 0) -> List[GameEvent]:
+        return self._event_repository.get_after(after)
 
-    def reset_program_deck(self):
-        self._game.program_deck = self._deck_factory.new_deck(DeckType.PROGRAM_DECK)
-        self._game.program_deck.shuffle()
+    # The game and players as the game log tells it, independent of the saved state
+    def rebuild_from_history(self) -> Optional[Tuple[Game, List[Player]]]:
+        return self._event_repository.rebuild()
 
     def start_new_turn(self):
-        self._game.inc_turn()
-        self._game.clear_board_states()
-        self.reset_program_deck()
-        self.save_game()
-
-        for player in self.players:
-            if not player.is_active:
-                player.program_hand.clear()
-                player.registers.clear()
-            elif player.will_be_powered_down:
-                player.power_down()
-                player.will_power_up()  # Assume players normally only want to power down for one turn
-                player.reset_damage()
-                player.program_hand.clear()
-            else:
-                player.power_up()
-                player.registers.clear()
-                player.reset_program_hand(self._game.program_deck)
+        with self.changing_players():
+            UnitOfWork.run(self._start_new_turn)
+
+    def _start_new_turn(self):
+        # The event takes the shuffle off the game's random stream
+        program_deck: Deck = self._deck_factory.new_deck(DeckType.PROGRAM_DECK)
+        program_deck.shuffle(engine=self._deck_factory.shuffle_engine.with_random(self.game.shuffle_random()))
+
+        self._execute(GameEvent(GameEventType.NEW_TURN, {'program_deck': GameEventApplier.deck_order(program_deck)}),
+                      self.players)
+
+    # Makes the change the event describes, then logs it and saves what it changed in one unit of work. The
+    # saved game and players are still what everything reads, so the log is one more insert on top of their
+    # saves (see benchmark/bench_event_log.py). It starts with a snapshot of whatever was there before it,
+    # and takes another every so often.
+    def _execute(self, event: GameEvent, players: List[Player] = None, later: bool = False) -> GameEventApplier:
+        with self._lock:
+            self._hold_lock_until_committed()
+            return self._execute_locked(event, [] if players is None else players, later)
+
+    def _execute_locked(self, event: GameEvent, players: List[Player], later: bool) -> GameEventApplier:
+        game: Game = self._game if self._game is None else self.game
+        applier: GameEventApplier = GameEventApplier(game, {x.id: x for x in players},
+                                                     self._card_repository.get_catalog().lookup,
+                                                     self._discard_pile)
 
-            self.save_player(player)
+        try:
+            with UnitOfWork():
+                if not self._event_repository.has_snapshot():
+                    self._event_repository.save_snapshot(self._event_repository.get_last_sequence(),
+                                                         game, self.players)
+
+                changed: List[Player] = applier.apply(event)
+                sequence: int = self._event_repository.append(event)
+
+                for player in changed:
+                    if later:
+                        self.save_player_later(player)
+                    else:
+                        self.save_player(player)
+
+                self._game = applier.game
+                self.save_game()
 
-        # Save after players since decks have been altered
-        self.save_game()
+                if event.type == GameEventType.NEW_GAME or sequence % self.SNAPSHOT_INTERVAL == 0:
+                    self._event_repository.save_snapshot(sequence, self._game, self.players)
+        except Exception:
+            # Whatever the event got half way through must not be saved by the next one
+            for player in players:
+                player.mark_stale()
+
+            if self._game is not None:
+                self._game.mark_stale()
+
+            raise
+
+        return applier
 
 
 class GameStats:
@@ -219,21 +462,6 @@ class GameStats:
         self.num_players = num_players
 
 
-class TurnRegisterInfo:
-    def __init__(self, player: Player, register: int):
-        self.name = player.name
-        self.id = player.id
-        self.damage = player.damage
-        self.throw = player.registers.throws[register - 1]
-        self.instructions = player.instructions
-        self.card_num = player.registers.cards[register - 1].number
-        self.card_filename = player.registers.cards[register - 1].filename
-        self.is_powered_down = player.is_powered_down
-
-        if self.is_powered_down:
-            self.card_num = Card.NUMBER_POWER_DOWN
-
-
 class BoardState:
     @property
     def notes(self) -> str:
@@ -243,6 +471,6 @@ class BoardState:
     def filenames(self) -> List[str]:
         return self._filenames
 
-    def __init__(self, game: Game):
+    def __init__(self, game: Game, path: str = os.path.join("images", "board_states")):
         self._notes: str = game.notes
-        self._filenames: List[str] = ["{}/{}".format(os.path.join("images","board_states"), x) for x in game.board_state_filenames]
+        self._filenames: List[str] = ["{}/{}".format(path, x) for x in game.board_state_filenames]
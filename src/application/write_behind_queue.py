@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from common.entity import Entity
+from common.unit_of_work import ConcurrentUpdateError, UnitOfWork
+
+logger = logging.getLogger(__name__)
+
+
+# Saves aggregates on a background thread so a request can answer as soon as it has changed them.
+# Changes to the same aggregate made while it waits are saved together, and whatever is waiting when
+# the writer wakes up is saved in one transaction. Nothing waits longer than the durability window
+# unless the database is slower than that.
+#
+# Aggregates must only be changed while holding the queue's lock, which the writer also holds while it
+# saves, so it never sees one half changed.
+class WriteBehindQueue:
+    DEFAULT_WINDOW_MS: int = 50
+    DEFAULT_MAX_PENDING: int = 256
+    MAX_ATTEMPTS: int = 3
+
+    @property
+    def lock(self) -> threading.RLock:
+        return self._lock
+
+    @property
+    def pending_count(self) -> int:
+        with self._condition:
+            return len(self._pending)
+
+    def __init__(self, save: Callable[[Entity], None], window_ms: int = DEFAULT_WINDOW_MS,
+                 max_pending: int = DEFAULT_MAX_PENDING):
+        self._save: Callable[[Entity], None] = save
+        self._window: float = window_ms / 1000
+        self._max_pending: int = max_pending
+        self._pending: Dict[str, Entity] = {}
+        self._lock: threading.RLock = threading.RLock()
+        self._condition: threading.Condition = threading.Condition()
+        self._closed: bool = False
+        self._thread: Optional[threading.Thread] = None
+        self._attempts: Dict[str, int] = {}  # Failed saves so far, by aggregate id
+
+    def enqueue(self, aggregate: Entity):
+        with self._condition:
+            if self._closed:
+                raise ValueError("Write behind queue has been closed.")
+
+            self._pending[aggregate.id] = aggregate
+            full: bool = len(self._pending) >= self._max_pending
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+
+            self._condition.notify_all()
+
+        # Rather than waiting on the writer, which may need the lock the caller holds, pay for the flush here
+        if full:
+            self.flush()
+
+    # The changed aggregate that has not been saved yet, which is newer than anything in the database
+    def pending(self, id: str) -> Optional[Entity]:
+        with self._condition:
+            return self._pending.get(id)
+
+    # For aggregates that are deleted before the writer got to them
+    def discard(self, id: str):
+        with self._condition:
+            self._pending.pop(id, None)
+            self._attempts.pop(id, None)
+
+    def flush(self):
+        with self._lock:
+            with self._condition:
+                batch: List[Entity] = list(self._pending.values())
+                self._pending = {}
+
+            if len(batch) > 0:
+                self._write(batch)
+
+    # Saves everything still waiting and stops the writer, for when the process shuts down. Failed saves
+    # get their remaining attempts straight away, since there will be no later batch to join.
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            thread: Optional[threading.Thread] = self._thread
+
+        if thread is not None:
+            thread.join()
+
+        while self.pending_count > 0:
+            self.flush()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while len(self._pending) == 0 and not self._closed:
+                    self._condition.wait()
+
+                if self._closed:
+                    return
+
+                # Give changes that follow closely a chance to join this batch
+                deadline: float = time.monotonic() + self._window
+
+                while not self._closed and time.monotonic() < deadline:
+                    self._condition.wait(deadline - time.monotonic())
+
+                if self._closed:
+                    return
+
+            self.flush()
+
+    # If the batch fails each aggregate is tried on its own, so one bad save cannot hold up the others. Its
+    # event is already in the game log, so an aggregate that still fails goes back in the queue for the next
+    # batch. After MAX_ATTEMPTS, or on a conflict, which saving again would only repeat, it is given up and
+    # marked stale. The failed save has already taken it out of the repository's cache.
+    def _write(self, batch: List[Entity]):
+        failed: List[Tuple[Entity, Exception]] = []
+
+        try:
+            UnitOfWork.run(lambda: [self._save(x) for x in batch], attempts=1)
+        except Exception as err:
+            if len(batch) == 1:
+                failed.append((batch[0], err))
+            else:
+                for aggregate in batch:
+                    try:
+                        UnitOfWork.run(lambda: self._save(aggregate), attempts=1)
+                    except Exception as aggregate_err:
+                        failed.append((aggregate, aggregate_err))
+
+        failed_ids = set(x.id for x, err in failed)
+
+        for aggregate in batch:
+            if aggregate.id not in failed_ids:
+                self._attempts.pop(aggregate.id, None)
+
+        for aggregate, err in failed:
+            self._retry(aggregate, err)
+
+    def _retry(self, aggregate: Entity, err: Exception):
+        attempts: int = self._attempts.get(aggregate.id, 0) + 1
+
+        if isinstance(err, ConcurrentUpdateError) or attempts >= self.MAX_ATTEMPTS:
+            self._attempts.pop(aggregate.id, None)
+            aggregate.mark_stale()
+            logger.error("Gave up writing %s after %d attempts", aggregate.id, attempts, exc_info=err)
+            return
+
+        self._attempts[aggregate.id] = attempts
+        logger.warning("Problem writing %s, will try again: %s", aggregate.id, err)
+
+        with self._condition:
+            # A newer change enqueued since the batch was taken is saved instead
+            self._pending.setdefault(aggregate.id, aggregate)
+            self._condition.notify_all()
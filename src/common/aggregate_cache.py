@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import threading
+from typing import Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+from common.engine_registry import EngineRegistry
+from common.entity import Entity
+from common.state_version import StateVersion
+
+T = TypeVar("T", bound=Entity)
+
+
+# Loaded aggregates, shared by every repository of one kind on the same database in this process. Entries
+# are only trusted while the database's state version still matches the version they were loaded or saved
+# at, so writes from other workers empty the cache on the next read. The cache keeps its own copy of each
+# aggregate and hands out a new copy on every read, so what one caller changes, saved or not, is never seen
+# by another.
+class AggregateCache(Generic[T]):
+    _lock: threading.RLock = threading.RLock()
+    _caches: Dict[Tuple[str, str], AggregateCache] = {}
+
+    @property
+    def version(self) -> Optional[int]:
+        return self._version
+
+    @property
+    def is_complete(self) -> bool:
+        return self._complete
+
+    def __init__(self, database: str, copy: Callable[[T], T]):
+        self._database: str = database
+        self._copy: Callable[[T], T] = copy
+        self._entries: Dict[str, T] = {}
+        self._version: Optional[int] = None
+        self._complete: bool = False
+        self._entry_lock: threading.RLock = threading.RLock()
+
+    # The copy function has to give back a clean aggregate at the same version as the one it was given
+    @classmethod
+    def for_database(cls, database: str, kind: str, copy: Callable[[T], T]) -> AggregateCache:
+        key: Tuple[str, str] = (EngineRegistry.normalize(database), kind)
+
+        with cls._lock:
+            cache: AggregateCache = cls._caches.get(key)
+
+            if cache is None:
+                cache = AggregateCache(database, copy)
+                cls._caches[key] = cache
+
+        return cache
+
+    # Our own commit moved the version on by one, so a cache that was current just before still is,
+    # apart from the aggregates that commit saved, which the repositories put back themselves
+    @classmethod
+    def on_committed(cls, database: str, version: int):
+        path: str = EngineRegistry.normalize(database)
+
+        with cls._lock:
+            caches: List[AggregateCache] = [cache for key, cache in cls._caches.items() if key[0] == path]
+
+        for cache in caches:
+            with cache._entry_lock:
+                if cache._version == version - 1:
+                    cache._version = version
+
+    # Forgets every cache for a database that is no longer in use
+    @classmethod
+    def discard(cls, database: str):
+        path: str = EngineRegistry.normalize(database)
+
+        with cls._lock:
+            cls._caches = {key: cache for key, cache in cls._caches.items() if key[0] != path}
+
+    @classmethod
+    def clear_all(cls):
+        with cls._lock:
+            for cache in cls._caches.values():
+                cache.clear()
+
+    # Reads the current state version, throwing everything away if it moved. Loads should use the
+    # returned version when putting, so anything written while they ran is caught on the next check.
+    def validate(self) -> int:
+        version: int = StateVersion.current(self._database)
+
+        with self._entry_lock:
+            if version != self._version:
+                self._entries = {}
+                self._complete = False
+                self._version = version
+
+        return version
+
+    def get(self, id: str) -> Optional[T]:
+        with self._entry_lock:
+            aggregate: T = self._entries.get(id)
+
+            return None if aggregate is None else self._copy(aggregate)
+
+    def get_all(self) -> Optional[List[T]]:
+        with self._entry_lock:
+            if not self._complete:
+                return None
+
+            return [self._copy(x) for x in self._entries.values()]
+
+    # The caller keeps the aggregate it loaded, and the cache a copy of it
+    def put(self, aggregate: T, version: int) -> T:
+        with self._entry_lock:
+            if version == self._version:
+                self._entries[aggregate.id] = self._copy(aggregate)
+
+        return aggregate
+
+    def put_all(self, aggregates: List[T], version: int) -> List[T]:
+        with self._entry_lock:
+            if version == self._version:
+                self._entries = {x.id: self._copy(x) for x in aggregates}
+                self._complete = True
+
+        return aggregates
+
+    # After a commit of our own the saved aggregate is current as of that commit's version, but nothing
+    # else in the cache can be vouched for
+    def put_saved(self, aggregate: T, version: Optional[int], complete: bool = False):
+        with self._entry_lock:
+            if version is None:
+                return
+
+            if version != self._version:
+                self._entries = {}
+                self._version = version
+                self._complete = complete
+
+            self._entries[aggregate.id] = self._copy(aggregate)
+
+    def evict(self, id: str):
+        with self._entry_lock:
+            self._entries.pop(id, None)
+            self._complete = False
+
+    def clear(self):
+        with self._entry_lock:
+            self._entries = {}
+            self._complete = False
+            self._version = None
+
+
+StateVersion.add_listener(AggregateCache.on_committed)
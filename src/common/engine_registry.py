@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import Dict, Tuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import StaticPool
+
+
+# One engine (and so one connection pool) per database file for the whole process. Writers take
+# SQLite's lock up front with BEGIN IMMEDIATE so they queue on the busy timeout instead of failing
+# mid-transaction, while readers get their own query_only connections that run alongside the
+# writer thanks to WAL journaling.
+class EngineRegistry:
+    MEMORY_DATABASE: str = ":memory:"
+
+    DEFAULT_CACHE_SIZE_KB: int = 16 * 1024
+    DEFAULT_MMAP_SIZE: int = 64 * 1024 * 1024
+    DEFAULT_BUSY_TIMEOUT_MS: int = 5000
+
+    _lock: threading.RLock = threading.RLock()
+    _engines: Dict[Tuple[str, bool], Engine] = {}
+
+    _cache_size_kb: int = DEFAULT_CACHE_SIZE_KB
+    _mmap_size: int = DEFAULT_MMAP_SIZE
+    _busy_timeout_ms: int = DEFAULT_BUSY_TIMEOUT_MS
+
+    @classmethod
+    def configure(cls, cache_size_kb: int = None, mmap_size: int = None, busy_timeout_ms: int = None):
+        with cls._lock:
+            if cache_size_kb is not None:
+                cls._cache_size_kb = cache_size_kb
+
+            if mmap_size is not None:
+                cls._mmap_size = mmap_size
+
+            if busy_timeout_ms is not None:
+                cls._busy_timeout_ms = busy_timeout_ms
+
+            # Pragmas are applied per connection, so drop the pooled ones to pick up the new values
+            for engine in cls._engines.values():
+                engine.dispose()
+
+    @classmethod
+    def get_engine(cls, database: str, read_only: bool = False) -> Engine:
+        key: Tuple[str, bool] = (cls.normalize(database), read_only)
+
+        with cls._lock:
+            engine: Engine = cls._engines.get(key)
+
+            if engine is None:
+                if read_only and key[0] != cls.MEMORY_DATABASE:
+                    # Make sure the writer has switched the file to WAL before any reader opens it
+                    with cls.get_engine(database).connect():
+                        pass
+
+                engine = cls._create_engine(key[0], read_only)
+                cls._engines[key] = engine
+
+        return engine
+
+    @classmethod
+    def dispose(cls, database: str):
+        path: str = cls.normalize(database)
+
+        with cls._lock:
+            for read_only in (False, True):
+                engine: Engine = cls._engines.pop((path, read_only), None)
+
+                if engine is not None:
+                    engine.dispose()
+
+    @classmethod
+    def dispose_all(cls):
+        with cls._lock:
+            for engine in cls._engines.values():
+                engine.dispose()
+
+            cls._engines = {}
+
+    @classmethod
+    def normalize(cls, database: str) -> str:
+        if database == cls.MEMORY_DATABASE:
+            return database
+
+        return os.path.normcase(os.path.abspath(database))
+
+    @classmethod
+    def _create_engine(cls, path: str, read_only: bool) -> Engine:
+        if path == cls.MEMORY_DATABASE:
+            # Every connection to :memory: is a brand new database, so everyone shares a single one
+            if read_only:
+                return cls.get_engine(path)
+
+            engine: Engine = create_engine("sqlite+pysqlite://",
+                                           connect_args={"check_same_thread": False},
+                                           poolclass=StaticPool)
+        else:
+            engine: Engine = create_engine("sqlite+pysqlite:///{}".format(path),
+                                           connect_args={"check_same_thread": False})
+
+        in_memory: bool = path == cls.MEMORY_DATABASE
+
+        # Reads the settings as each connection opens, so connections made after configure() get the new ones
+        @event.listens_for(engine, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            # Take over transaction handling from pysqlite so we control how BEGIN is issued
+            dbapi_connection.isolation_level = None
+
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA busy_timeout = {}".format(cls._busy_timeout_ms))
+
+            if not in_memory:
+                if not read_only:
+                    cursor.execute("PRAGMA journal_mode = WAL")
+                cursor.execute("PRAGMA synchronous = NORMAL")
+                cursor.execute("PRAGMA mmap_size = {}".format(cls._mmap_size))
+
+            cursor.execute("PRAGMA cache_size = -{}".format(cls._cache_size_kb))
+            cursor.execute("PRAGMA temp_store = MEMORY")
+
+            if read_only:
+                cursor.execute("PRAGMA query_only = ON")
+
+            cursor.close()
+
+        @event.listens_for(engine, "begin")
+        def on_begin(connection):
+            if read_only:
+                connection.exec_driver_sql("BEGIN")
+            else:
+                connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+        return engine
@@ -1,20 +1,59 @@
 from __future__ import annotations
 
 from abc import ABC
+from typing import Set
 from uuid import uuid4
 
 
 class Entity(ABC):
+    # Repository bookkeeping, not part of the entity state that gets serialized
+    TRACKING_ATTRIBUTES = ("_dirty_fields", "_persisted", "_version", "_stale")
+    __slots__ = ("_id",) + TRACKING_ATTRIBUTES
 
+    # Shared by every clean entity until one is marked dirty, so loading entities allocates no sets
+    NO_DIRTY_FIELDS: frozenset = frozenset()
+
+    # Generated on first use, since most cards never need theirs
     @property
     def id(self):
+        if self._id is None:
+            self._id = str(uuid4())
+
         return self._id
 
+    @property
+    def is_persisted(self) -> bool:
+        return self._persisted
+
+    # Version of the stored row this entity was loaded from or last saved as, 0 if it was never saved
+    @property
+    def version(self) -> int:
+        return self._version
+
+    # Set when a save found someone else had changed the stored entity first, so this copy is out of date
+    @property
+    def is_stale(self) -> bool:
+        return self._stale
+
+    @property
+    def dirty_fields(self) -> Set[str]:
+        return self._dirty_fields
+
+    @property
+    def is_dirty(self) -> bool:
+        return len(self._dirty_fields) > 0
+
+    # True if anything in the entity, including what it holds, differs from what was last saved or loaded
+    @property
+    def has_changes(self) -> bool:
+        return not self._persisted or self.is_dirty
+
     def __init__(self, id: str = None):
-        if id is None:
-            self._id: str = str(uuid4())
-        else:
-            self._id: str = id
+        self._id: str = id
+        self._dirty_fields: Set[str] = Entity.NO_DIRTY_FIELDS
+        self._persisted: bool = False
+        self._version: int = 0
+        self._stale: bool = False
 
     def __eq__(self, other: Entity) -> bool:
         if other is None:
@@ -28,5 +67,37 @@ class Entity(ABC):
 
         return self.id == other.id
 
+    def mark_dirty(self, field: str):
+        if self._dirty_fields is Entity.NO_DIRTY_FIELDS:
+            self._dirty_fields = set()
+
+        self._dirty_fields.add(field)
+
+    # Called by the repositories once the entity matches what is stored
+    def mark_clean(self):
+        self._dirty_fields = Entity.NO_DIRTY_FIELDS
+        self._persisted = True
+
+    def mark_version(self, version: int):
+        self._version = version
+
+    def mark_stale(self):
+        self._stale = True
+
+    # Called when a save is rolled back, so the next save writes the whole entity again
+    def mark_unpersisted(self):
+        self._persisted = False
+
+    # Slots first, from the base class down, then whatever subclasses without slots keep in their __dict__
     def attributes(self):
-        return self.__dict__
+        values = {'_id': self.id}
+
+        for cls in reversed(type(self).__mro__[:-1]):
+            for key in cls.__dict__.get("__slots__", ()):
+                if key not in values and key not in self.TRACKING_ATTRIBUTES:
+                    values[key] = getattr(self, key)
+
+        values.update((key, value) for key, value in getattr(self, "__dict__", {}).items()
+                      if key not in self.TRACKING_ATTRIBUTES)
+
+        return values
@@ -11,3 +11,44 @@ class DeckType(str, Enum):
     POWER_DECK = "power_deck"
     PROGRAM_HAND = "program_hand"
     POWER_HAND = "power_hand"
+
+
+class DeckStorageFormat(str, Enum):
+    ROWS = "rows"
+    PACKED = "packed"
+
+
+class ShuffleType(str, Enum):
+    RIFFLE = "riffle"
+    FISHER_YATES = "fisher_yates"
+
+
+class StorageBackendType(str, Enum):
+    SQLITE = "sqlite"
+    MEMORY = "memory"
+    FILE = "file"
+
+
+class GameEventType(str, Enum):
+    NEW_GAME = "new_game"
+    NEW_TURN = "new_turn"
+    ADD_PLAYER = "add_player"
+    DELETE_PLAYER = "delete_player"
+    DEAL = "deal"
+    DRAW_POWER_CARD = "draw_power_card"
+    TRANSFER_CARD = "transfer_card"
+    MOVE_CARDS = "move_cards"
+    DISCARD_CARD = "discard_card"
+    DISCARD_POWER_CARD = "discard_power_card"
+    UPDATE_POWER_CARD = "update_power_card"
+    THROW = "throw"
+    LOCK_CHOICES = "lock_choices"
+    UNLOCK_CHOICES = "unlock_choices"
+    INC_DAMAGE = "inc_damage"
+    DEC_DAMAGE = "dec_damage"
+    SET_ACTIVE = "set_active"
+    WILL_POWER_DOWN = "will_power_down"
+    WILL_POWER_UP = "will_power_up"
+    SET_INSTRUCTIONS = "set_instructions"
+    ADD_BOARD_STATE = "add_board_state"
+    SET_NOTES = "set_notes"
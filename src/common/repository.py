@@ -2,11 +2,14 @@ from __future__ import annotations
 
 import os
 from abc import ABC, abstractmethod
-from typing import TypeVar, Generic
+from typing import TypeVar, Generic, Callable
 
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 
+from common.engine_registry import EngineRegistry
+from common.state_version import StateVersion
+from common.unit_of_work import UnitOfWork, JoinedSession
+
 basedir: str = os.path.abspath(os.path.dirname(__file__))
 db_dir: str = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))) + "/database"
 
@@ -23,18 +26,69 @@ class Repository(ABC, Generic[T]):
         if database is None:
             database = os.path.join(db_dir,"roborally.db")
 
-        engine = create_engine("sqlite+pysqlite:///{}".format(database),
-                               connect_args={"check_same_thread": False})
-
-        self._factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        self._factory = sessionmaker(autocommit=False, autoflush=False,
+                                     bind=EngineRegistry.get_engine(database),
+                                     info={StateVersion.UNTRACKED_KEY: True})
+        self._tracked_factory = sessionmaker(autocommit=False, autoflush=False,
+                                             bind=EngineRegistry.get_engine(database),
+                                             info={StateVersion.UNTRACKED_KEY: False})
+        self._read_factory = sessionmaker(autocommit=False, autoflush=False,
+                                          bind=EngineRegistry.get_engine(database, read_only=True))
         self._database = database
 
     def get_session(self) -> Session:
         return self._factory()
 
-    def get_session_begin(self) -> Session:
+    # Joins the current unit of work if there is one, otherwise commits on its own. Tracked sessions are
+    # for repositories that put everything they write back into their aggregate cache.
+    def get_session_begin(self, tracked: bool = False) -> Session:
+        unit_of_work: UnitOfWork = UnitOfWork.current()
+
+        if unit_of_work is not None:
+            return unit_of_work.join(self._database, self._tracked_factory, tracked)
+
+        if tracked:
+            return self._tracked_factory.begin()
+
         return self._factory.begin()
 
+    # Read-only sessions do not take the write lock so they can run while another request is saving.
+    # Once a unit of work has written something, reads go through its session to see those changes.
+    def get_read_session_begin(self) -> Session:
+        unit_of_work: UnitOfWork = UnitOfWork.current()
+
+        if unit_of_work is not None:
+            joined_session: JoinedSession = unit_of_work.join_if_writing(self._database)
+
+            if joined_session is not None:
+                return joined_session
+
+        return self._read_factory.begin()
+
+    # Reads inside a unit of work that has written see changes that might still be rolled back
+    def is_reading_uncommitted(self) -> bool:
+        unit_of_work: UnitOfWork = UnitOfWork.current()
+
+        return unit_of_work is not None and unit_of_work.join_if_writing(self._database) is not None
+
+    # Runs the callback once the current unit of work commits, or right away if there is none
+    @staticmethod
+    def after_commit(callback: Callable[[], None]):
+        unit_of_work: UnitOfWork = UnitOfWork.current()
+
+        if unit_of_work is not None:
+            unit_of_work.on_commit(callback)
+        else:
+            callback()
+
+    # Runs the callback if the current unit of work, if any, ends up being rolled back
+    @staticmethod
+    def on_rollback(callback: Callable[[], None]):
+        unit_of_work: UnitOfWork = UnitOfWork.current()
+
+        if unit_of_work is not None:
+            unit_of_work.on_rollback(callback)
+
     @abstractmethod
     def save(self, obj: T):
         pass
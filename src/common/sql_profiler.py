@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import re
+import threading
+import time
+from contextvars import ContextVar, Token
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Totals for everything one statement, method or request has run
+class SqlStats:
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def calls(self) -> int:
+        return self._calls
+
+    @property
+    def statements(self) -> int:
+        return self._statements
+
+    @property
+    def rows(self) -> int:
+        return self._rows
+
+    @property
+    def total_ms(self) -> float:
+        return self._total_s * 1000
+
+    @property
+    def mean_ms(self) -> float:
+        return 0.0 if self._calls == 0 else self.total_ms / self._calls
+
+    # Most times a statement ran within one request. Anything above a handful is a load per row.
+    @property
+    def max_per_request(self) -> int:
+        return self._max_per_request
+
+    def __init__(self, name: str):
+        self._name: str = name
+        self._calls: int = 0
+        self._statements: int = 0
+        self._rows: int = 0
+        self._total_s: float = 0.0
+        self._max_per_request: int = 0
+
+    def add(self, statements: int, rows: int, duration_s: float, calls: int = 1):
+        self._calls = self._calls + calls
+        self._statements = self._statements + statements
+        self._rows = self._rows + rows
+        self._total_s = self._total_s + duration_s
+
+    def add_request_count(self, count: int):
+        self._max_per_request = max(self._max_per_request, count)
+
+    def attributes(self) -> Dict:
+        return {'name': self._name,
+                'calls': self._calls,
+                'statements': self._statements,
+                'rows': self._rows,
+                'total_ms': round(self.total_ms, 3),
+                'mean_ms': round(self.mean_ms, 3),
+                'max_per_request': self._max_per_request}
+
+
+# What ran while it was active, on this thread or task. Profiles nest, and a statement counts towards
+# every profile it ran inside of.
+class SqlProfile:
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def statements(self) -> int:
+        return self._statements
+
+    @property
+    def rows(self) -> int:
+        return self._rows
+
+    @property
+    def duration_ms(self) -> float:
+        return self._duration_s * 1000
+
+    @property
+    def statement_counts(self) -> Dict[str, int]:
+        return self._statement_counts
+
+    def __init__(self, name: str = None):
+        self._name: str = name
+        self._statements: int = 0
+        self._rows: int = 0
+        self._duration_s: float = 0.0
+        self._statement_counts: Dict[str, int] = {}
+        self._token: Optional[Token] = None
+
+    def begin(self) -> SqlProfile:
+        self._token = SqlProfiler.push(self)
+
+        return self
+
+    def end(self):
+        if self._token is not None:
+            SqlProfiler.pop(self._token)
+            self._token = None
+
+    def record(self, sql: str, rows: int, duration_s: float):
+        self._statements = self._statements + 1
+        self._rows = self._rows + rows
+        self._duration_s = self._duration_s + duration_s
+        self._statement_counts[sql] = self._statement_counts.get(sql, 0) + 1
+
+    # Value for a Server-Timing response header
+    def server_timing(self) -> str:
+        return 'sql;dur={:.2f};desc="{} statements, {} rows"'.format(self.duration_ms, self._statements,
+                                                                      self._rows)
+
+    def __enter__(self) -> SqlProfile:
+        return self.begin()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.end()
+
+
+# Counts the statements, rows and time spent in SQL across every engine in the process, once enabled.
+# Rows are the ones inserted, updated or deleted, since SQLite does not say how many a select returns.
+class SqlProfiler:
+    START_TIMES_KEY: str = "sql_profiler_start_times"
+
+    _lock: threading.Lock = threading.Lock()
+    _enabled: bool = False
+    _profiles: ContextVar[Tuple[SqlProfile, ...]] = ContextVar("sql_profiles", default=())
+    _statements: Dict[str, SqlStats] = {}
+    _methods: Dict[str, SqlStats] = {}
+
+    # Different lengths of IN (?, ?, ...) are still the same statement
+    _in_list = re.compile(r"\(\?(?:, \?)+\)")
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        return cls._enabled
+
+    @classmethod
+    def enable(cls):
+        with cls._lock:
+            if not cls._enabled:
+                event.listen(Engine, "before_cursor_execute", cls._before_execute)
+                event.listen(Engine, "after_cursor_execute", cls._after_execute)
+                cls._enabled = True
+
+    @classmethod
+    def disable(cls):
+        with cls._lock:
+            if cls._enabled:
+                event.remove(Engine, "before_cursor_execute", cls._before_execute)
+                event.remove(Engine, "after_cursor_execute", cls._after_execute)
+                cls._enabled = False
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._statements = {}
+            cls._methods = {}
+
+    @classmethod
+    def push(cls, profile: SqlProfile) -> Token:
+        return cls._profiles.set(cls._profiles.get() + (profile,))
+
+    # The outermost profile stands for a request, so its statement counts go towards max_per_request
+    @classmethod
+    def pop(cls, token: Token):
+        profiles: Tuple[SqlProfile, ...] = cls._profiles.get()
+        cls._profiles.reset(token)
+
+        if len(profiles) > 0 and len(cls._profiles.get()) == 0:
+            with cls._lock:
+                for sql, count in profiles[-1].statement_counts.items():
+                    stats: SqlStats = cls._statements.get(sql)
+
+                    if stats is not None:
+                        stats.add_request_count(count)
+
+    @classmethod
+    def top_statements(cls, top_n: int = 20) -> List[SqlStats]:
+        with cls._lock:
+            statements: List[SqlStats] = list(cls._statements.values())
+
+        statements.sort(key=lambda x: x.total_ms, reverse=True)
+
+        return statements[:top_n]
+
+    @classmethod
+    def methods(cls) -> List[SqlStats]:
+        with cls._lock:
+            methods: List[SqlStats] = list(cls._methods.values())
+
+        methods.sort(key=lambda x: x.total_ms, reverse=True)
+
+        return methods
+
+    # Wraps every public method and property of a class so the SQL each one runs is totalled under
+    # its name. Costs a flag check per call while profiling is off.
+    @classmethod
+    def profile_methods(cls, target: type) -> type:
+        for name, attribute in list(vars(target).items()):
+            if name.startswith("_"):
+                continue
+
+            qualified_name: str = "{}.{}".format(target.__name__, name)
+
+            if isinstance(attribute, property):
+                setattr(target, name, property(cls._profiled(qualified_name, attribute.fget), attribute.fset,
+                                               attribute.fdel, attribute.__doc__))
+            elif inspect.isfunction(attribute):
+                setattr(target, name, cls._profiled(qualified_name, attribute))
+
+        return target
+
+    @classmethod
+    def _profiled(cls, name: str, function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not cls._enabled:
+                return function(*args, **kwargs)
+
+            profile: SqlProfile = SqlProfile(name).begin()
+
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profile.end()
+                cls._add_method(profile)
+
+        return wrapper
+
+    @classmethod
+    def _add_method(cls, profile: SqlProfile):
+        with cls._lock:
+            stats: SqlStats = cls._methods.get(profile.name)
+
+            if stats is None:
+                stats = SqlStats(profile.name)
+                cls._methods[profile.name] = stats
+
+            stats.add(profile.statements, profile.rows, profile.duration_ms / 1000)
+
+    @classmethod
+    def _before_execute(cls, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(cls.START_TIMES_KEY, []).append(time.perf_counter())
+
+    @classmethod
+    def _after_execute(cls, conn, cursor, statement, parameters, context, executemany):
+        start_times: List[float] = conn.info.get(cls.START_TIMES_KEY)
+
+        if not start_times:
+            return
+
+        duration_s: float = time.perf_counter() - start_times.pop()
+        rows: int = max(cursor.rowcount, 0)
+        sql: str = cls._in_list.sub("(?, ...)", statement)
+
+        with cls._lock:
+            stats: SqlStats = cls._statements.get(sql)
+
+            if stats is None:
+                stats = SqlStats(sql)
+                cls._statements[sql] = stats
+
+            stats.add(1, rows, duration_s)
+
+        for profile in cls._profiles.get():
+            profile.record(sql, rows, duration_s)
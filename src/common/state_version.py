@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import threading
+from typing import Callable, List
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session, ORMExecuteState
+
+from common.engine_registry import EngineRegistry
+
+
+# A counter in the database that goes up with every committed write, from any process. Caches compare
+# it with the version they were filled at to find out cheaply whether they are still current.
+#
+# Sessions are untracked unless a repository says otherwise. When a commit only holds tracked writes,
+# meaning every aggregate it touched gets put back into its cache afterwards, listeners are told about
+# the new version so they can move to it without throwing away everything else they hold.
+class StateVersion:
+    VERSION_KEY: str = "state_version"
+    WRITES_KEY: str = "state_version_writes"
+    UNTRACKED_KEY: str = "state_version_untracked"
+    TRACKED_COMMIT_KEY: str = "state_version_tracked_commit"
+
+    _lock: threading.RLock = threading.RLock()
+    _listeners: List[Callable[[str, int], None]] = []
+
+    @staticmethod
+    def current(database: str) -> int:
+        # A raw connection runs in autocommit mode, so this is the only statement sent
+        connection = EngineRegistry.get_engine(database, read_only=True).raw_connection()
+
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT version FROM state_version WHERE id = 1")
+            row = cursor.fetchone()
+            cursor.close()
+        finally:
+            connection.close()
+
+        if row is None:
+            return 0
+
+        return row[0]
+
+    # The version written by the session's last commit, or None if it did not write anything
+    @staticmethod
+    def committed(session: Session) -> int:
+        return session.info.get(StateVersion.VERSION_KEY)
+
+    @staticmethod
+    def mark_untracked(session: Session):
+        session.info[StateVersion.UNTRACKED_KEY] = True
+
+    @staticmethod
+    def mark_tracked(session: Session):
+        session.info.setdefault(StateVersion.UNTRACKED_KEY, False)
+
+    @classmethod
+    def add_listener(cls, listener: Callable[[str, int], None]):
+        with cls._lock:
+            cls._listeners.append(listener)
+
+    @classmethod
+    def _notify(cls, database: str, version: int):
+        with cls._lock:
+            listeners: List[Callable[[str, int], None]] = list(cls._listeners)
+
+        for listener in listeners:
+            listener(database, version)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _on_execute(orm_execute_state: ORMExecuteState):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[StateVersion.WRITES_KEY] = True
+
+
+@event.listens_for(Session, "before_flush")
+def _on_flush(session: Session, flush_context, instances):
+    if session.new or session.dirty or session.deleted:
+        session.info[StateVersion.WRITES_KEY] = True
+
+
+@event.listens_for(Session, "before_commit")
+def _on_before_commit(session: Session):
+    session.info.pop(StateVersion.VERSION_KEY, None)
+
+    # Flush first so writes still pending in the ORM count too
+    session.flush()
+
+    tracked: bool = not session.info.pop(StateVersion.UNTRACKED_KEY, True)
+    session.info[StateVersion.TRACKED_COMMIT_KEY] = tracked
+
+    if not session.info.pop(StateVersion.WRITES_KEY, False):
+        return
+
+    result = session.execute(text("INSERT INTO state_version (id, version) VALUES (1, 1) "
+                                  "ON CONFLICT (id) DO UPDATE SET version = version + 1 RETURNING version"))
+    session.info[StateVersion.VERSION_KEY] = result.scalar()
+
+
+@event.listens_for(Session, "after_commit")
+def _on_after_commit(session: Session):
+    version: int = session.info.get(StateVersion.VERSION_KEY)
+
+    if version is not None and session.info.pop(StateVersion.TRACKED_COMMIT_KEY, False):
+        StateVersion._notify(session.get_bind().url.database or EngineRegistry.MEMORY_DATABASE, version)
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+from contextvars import ContextVar, Token
+from typing import Dict, Optional, List, Callable, TypeVar
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from common.engine_registry import EngineRegistry
+from common.state_version import StateVersion
+
+T = TypeVar("T")
+
+
+# Raised by a save that finds the stored aggregate is no longer the version it was loaded at
+class ConcurrentUpdateError(RuntimeError):
+    pass
+
+
+# Groups every repository call made while it is active into a single transaction per database, committed
+# once at the end. Repositories join the current unit of work through Repository.get_session_begin, and
+# a unit of work started inside another one simply becomes part of the outer one.
+class UnitOfWork:
+    MAX_ATTEMPTS: int = 5
+
+    _current: ContextVar[Optional[UnitOfWork]] = ContextVar("unit_of_work", default=None)
+
+    @property
+    def is_active(self) -> bool:
+        return self._token is not None
+
+    @property
+    def is_rollback_only(self) -> bool:
+        return self._rollback_only
+
+    # The concurrent update that forced a rollback, even if whoever ran into it caught it
+    @property
+    def conflict(self) -> Optional[ConcurrentUpdateError]:
+        return self._conflict
+
+    def __init__(self):
+        self._sessions: Dict[str, Session] = {}
+        self._token: Optional[Token] = None
+        self._rollback_only: bool = False
+        self._conflict: Optional[ConcurrentUpdateError] = None
+        self._rollback_callbacks: List[Callable[[], None]] = []
+        self._commit_callbacks: List[Callable[[], None]] = []
+
+    @classmethod
+    def current(cls) -> Optional[UnitOfWork]:
+        return cls._current.get()
+
+    # Runs the operation in its own unit of work, starting over with freshly loaded aggregates when a save
+    # runs into a concurrent update. Inside another unit of work it just runs, and the outer one retries.
+    @staticmethod
+    def run(operation: Callable[[], T], attempts: int = MAX_ATTEMPTS) -> T:
+        if UnitOfWork.current() is not None:
+            return operation()
+
+        for attempt in range(1, attempts + 1):
+            try:
+                with UnitOfWork():
+                    return operation()
+            except ConcurrentUpdateError:
+                if attempt == attempts:
+                    raise
+
+    def begin(self) -> UnitOfWork:
+        if self._token is not None:
+            raise ValueError("Unit of work has already begun.")
+
+        # Nested units of work leave everything to the outermost one
+        if UnitOfWork.current() is None:
+            self._token = UnitOfWork._current.set(self)
+
+        return self
+
+    def join(self, database: str, factory: sessionmaker, tracked: bool = False) -> JoinedSession:
+        path: str = EngineRegistry.normalize(database)
+        session: Session = self._sessions.get(path)
+
+        if session is None:
+            session = factory()
+            session.begin()
+            self._sessions[path] = session
+
+        if not tracked:
+            StateVersion.mark_untracked(session)
+
+        return JoinedSession(self, session)
+
+    # Only joins if something has already been written, so read-only work does not take the write lock
+    def join_if_writing(self, database: str) -> Optional[JoinedSession]:
+        session: Session = self._sessions.get(EngineRegistry.normalize(database))
+
+        if session is None:
+            return None
+
+        return JoinedSession(self, session)
+
+    def on_commit(self, callback: Callable[[], None]):
+        self._commit_callbacks.append(callback)
+
+    # Lets the repositories undo bookkeeping they did on the assumption that their changes would be committed
+    def on_rollback(self, callback: Callable[[], None]):
+        self._rollback_callbacks.append(callback)
+
+    def set_rollback_only(self, error: Exception = None):
+        self._rollback_only = True
+
+        if isinstance(error, ConcurrentUpdateError) and self._conflict is None:
+            self._conflict = error
+
+    def commit(self):
+        if self._rollback_only:
+            conflict: Optional[ConcurrentUpdateError] = self._conflict
+            self.rollback()
+
+            if conflict is not None:
+                raise conflict
+
+            return
+
+        try:
+            for session in self._sessions.values():
+                session.commit()
+        except Exception:
+            self.rollback()
+            raise
+
+        callbacks: List[Callable[[], None]] = self._commit_callbacks
+        self._end()
+
+        for callback in callbacks:
+            callback()
+
+    def rollback(self):
+        try:
+            for session in self._sessions.values():
+                session.rollback()
+        finally:
+            callbacks: List[Callable[[], None]] = self._rollback_callbacks
+            self._end()
+
+            for callback in callbacks:
+                callback()
+
+    def _end(self):
+        for session in self._sessions.values():
+            session.close()
+
+        self._sessions = {}
+        self._rollback_callbacks = []
+        self._commit_callbacks = []
+
+        if self._token is not None:
+            UnitOfWork._current.reset(self._token)
+            self._token = None
+
+    def __enter__(self) -> UnitOfWork:
+        return self.begin()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if not self.is_active:
+            if exc_type is not None and UnitOfWork.current() is not None:
+                UnitOfWork.current().set_rollback_only(exc_val)
+            return
+
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+
+# Stands in for a session's begin() context inside a unit of work. Leaving it flushes instead of
+# committing, and forgets the loaded models since the repositories change rows behind the ORM's back.
+class JoinedSession:
+    def __init__(self, unit_of_work: UnitOfWork, session: Session):
+        self._unit_of_work: UnitOfWork = unit_of_work
+        self._session: Session = session
+
+    def __enter__(self) -> Session:
+        return self._session
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            try:
+                self._session.flush()
+            except Exception as err:
+                self._unit_of_work.set_rollback_only(err)
+                raise
+        else:
+            self._unit_of_work.set_rollback_only(exc_val)
+
+        self._session.expunge_all()
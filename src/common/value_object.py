@@ -5,6 +5,7 @@ T = TypeVar("T")
 
 
 class ValueObject(ABC, Generic[T]):
+    __slots__ = ()
 
     def __init__(self):
         pass
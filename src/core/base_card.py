@@ -10,6 +10,11 @@ from common.enums import CardType
 # This exists solely to embed the Card value type into an object that adds other attributes
 # We don't want to extend Card since it is a value type and we need an entity
 class BaseCard(Entity):
+    __slots__ = ("_card",)
+
+    @property
+    def card(self) -> Card:
+        return self._card
 
     @property
     def number(self) -> int:
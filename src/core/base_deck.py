@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 from common.entity import Entity
 from common.enums import DeckType
@@ -10,6 +10,8 @@ from core.card import Card
 
 class BaseDeck(Entity):
     ABSOLUTE_MAX_DECK_SIZE: int = 999
+    # The lookup indexes are derived from the cards, so they are left out of the serialized deck too
+    TRACKING_ATTRIBUTES = Entity.TRACKING_ATTRIBUTES + ("_dirty_from", "_filename_index", "_number_index")
 
     @property
     def max_size(self):
@@ -27,6 +29,15 @@ class BaseDeck(Entity):
     def deck_type(self):
         return self._deck_type
 
+    # Lowest card position that moved since the last save, or None if the order is unchanged
+    @property
+    def dirty_from(self) -> Optional[int]:
+        return self._dirty_from
+
+    @property
+    def has_changes(self) -> bool:
+        return super().has_changes or self._dirty_from is not None or self.has_dirty_cards()
+
     def __init__(self, type: DeckType, id: str = None, max_size: int = ABSOLUTE_MAX_DECK_SIZE):
         super().__init__(id)
 
@@ -41,6 +52,8 @@ class BaseDeck(Entity):
 
         self._deck_type: DeckType = type
         self._cards: List[DeckCard] = []
+        self._dirty_from: Optional[int] = None
+        self._drop_indexes()
 
     def add_card(self, card: DeckCard, index: int = None):
         if card is None:
@@ -51,8 +64,22 @@ class BaseDeck(Entity):
 
         if index is None or index >= len(self._cards):
             self._cards.append(card)
+            self.mark_dirty_from(len(self._cards) - 1)
+            self._index_from(len(self._cards) - 1)
         else:
+            self._unindex_from(index)
             self._cards.insert(index, card)
+            self.mark_dirty_from(index)
+            self._index_from(index)
+
+    def add_cards(self, cards: List[DeckCard]):
+        if len(self._cards) + len(cards) > self._max_size:
+            raise IndexError("Cannot add any more cards to this deck.")
+
+        if len(cards) > 0:
+            self.mark_dirty_from(len(self._cards))
+            self._cards.extend(cards)
+            self._index_from(len(self._cards) - len(cards))
 
     def fill(self, cards: List[Card]):
         self.clear()
@@ -62,17 +89,109 @@ class BaseDeck(Entity):
 
     def populate(self, cards: List[DeckCard]):
         self._cards = cards
+        self.mark_dirty_from(0)
+        self._drop_indexes()
 
     def clear(self):
         self._cards = []
+        self.mark_dirty_from(0)
+        self._drop_indexes()
+
+    def mark_dirty_from(self, index: int):
+        if self._dirty_from is None or index < self._dirty_from:
+            self._dirty_from = max(index, 0)
+
+    def mark_clean(self):
+        super().mark_clean()
+        self._dirty_from = None
+
+        for cur_card in self._cards:
+            if isinstance(cur_card, Entity):
+                cur_card.mark_clean()
+
+    # What rollback needs to put the cards back the way they are now
+    def checkpoint(self) -> Tuple:
+        return list(self._cards), self._dirty_from
+
+    def rollback(self, checkpoint: Tuple):
+        cards, self._dirty_from = checkpoint
+        self._cards = list(cards)
+        self._drop_indexes()
+
+    def has_dirty_cards(self) -> bool:
+        return any(x.is_dirty for x in self._cards if isinstance(x, Entity))
+
+    # Card numbers in order, the top of the deck last
+    def numbers(self) -> List[int]:
+        return [x.number for x in self._cards]
+
+    # Each card with its orb and uses, for writers that do not need the DeckCards themselves
+    def card_values(self) -> List[Tuple[Card, int, int]]:
+        return [(x.card, x.orb, x.num_uses) if type(x) is DeckCard else (x, 0, 0) for x in self._cards]
 
     def getCardByFilename(self, filename) -> DeckCard:
-        result = [x for x in self.cards if x.filename == filename]
+        result: List[int] = self._filename_positions().get(filename, [])
 
         if len(result) > 1:
             raise IndexError("More than one card found with filename " + filename)
         elif len(result) == 0:
             return None
         else:
-            return result[0]
+            return self._cards[result[0]]
+
+    # Positions of the cards with the given number, in no particular order
+    def positions_of_number(self, number: int) -> List[int]:
+        if self._number_index is None:
+            self._build_indexes()
+
+        return self._number_index.get(number, [])
+
+    # The indexes are built on the first lookup and then kept up to date as cards come and go. Anything that
+    # changes the cards without going through these methods has to drop them.
+    def _drop_indexes(self):
+        self._filename_index: Optional[Dict[str, List[int]]] = None
+        self._number_index: Optional[Dict[int, List[int]]] = None
+
+    def _filename_positions(self) -> Dict[str, List[int]]:
+        if self._filename_index is None:
+            self._build_indexes()
+
+        return self._filename_index
+
+    def _build_indexes(self):
+        self._filename_index = {}
+        self._number_index = {}
+        self._index_from(0)
+
+    def _index_from(self, start: int):
+        if self._filename_index is None:
+            return
+
+        for i in range(start, self.size):
+            cur_card: Card = self._indexed_card(i)
+            self._filename_index.setdefault(cur_card.filename, []).append(i)
+            self._number_index.setdefault(cur_card.number, []).append(i)
+
+    # Takes the cards from start on out of the indexes, before they move
+    def _unindex_from(self, start: int):
+        if self._filename_index is None:
+            return
+
+        for i in range(start, self.size):
+            cur_card: Card = self._indexed_card(i)
+            self._unindex(self._filename_index, cur_card.filename, i)
+            self._unindex(self._number_index, cur_card.number, i)
+
+    # What the indexes know the card at index by
+    def _indexed_card(self, index: int) -> Card:
+        return self._cards[index]
+
+    @staticmethod
+    def _unindex(index: Dict, key, position: int):
+        positions: List[int] = index[key]
+
+        if len(positions) == 1:
+            del index[key]
+        else:
+            positions.remove(position)
 
@@ -7,6 +7,8 @@ from common.value_object import ValueObject
 class Card(ValueObject['Card']):
     NUMBER_EMPTY: int = -9999
     NUMBER_POWER_DOWN: int = -1002
+    VALID_TYPES: frozenset = frozenset(item.value for item in CardType)
+    __slots__ = ("_number", "_filename", "_type")
 
     @property
     def number(self) -> int:
@@ -23,14 +25,28 @@ class Card(ValueObject['Card']):
     def __init__(self, number: int, filename: str, type: CardType):
         super().__init__()
 
-        values = [item.value for item in CardType]
-        if type not in values:
+        if type not in Card.VALID_TYPES:
             raise AttributeError("Invalid card type: " + str(type))
 
         self._number: int = number
         self._filename: str = filename
         self._type: CardType = type
 
+    # For values the repositories read back, which were checked when they were first stored
+    @staticmethod
+    def hydrate(number: int, filename: str, type: CardType) -> Card:
+        card: Card = Card.__new__(Card)
+        card._number = number
+        card._filename = filename
+        card._type = type
+
+        return card
+
+    def attributes(self):
+        return {"number": self._number,
+                "filename": self._filename,
+                "type": self._type}
+
     def equals_core(self, value_object: Card) -> bool:
         result: bool = self._filename == value_object.filename
         result = result and self._number == value_object.number
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from common.enums import CardType
+from common.value_object import ValueObject
+from core.card import Card
+
+
+# One image found in a card directory, as recorded in the card manifest. Files whose name cannot be
+# parsed have no number and no card.
+class CardFile(ValueObject['CardFile']):
+    @property
+    def filename(self) -> str:
+        return self._filename
+
+    @property
+    def type(self) -> CardType:
+        return self._type
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def modified(self) -> int:
+        return self._modified
+
+    @property
+    def number(self) -> Optional[int]:
+        return self._number
+
+    @property
+    def key(self) -> tuple:
+        return self._type, self._filename
+
+    def __init__(self, filename: str, type: CardType, size: int, modified: int, number: Optional[int]):
+        super().__init__()
+
+        self._filename: str = filename
+        self._type: CardType = type
+        self._size: int = size
+        self._modified: int = modified
+        self._number: Optional[int] = number
+
+    def equals_core(self, value_object: CardFile) -> bool:
+        result: bool = self._filename == value_object.filename
+        result = result and self._type == value_object.type
+        result = result and self._size == value_object.size
+        result = result and self._modified == value_object.modified
+        result = result and self._number == value_object.number
+
+        return result
+
+    def to_card(self) -> Optional[Card]:
+        if self._number is None:
+            return None
+
+        return Card(self._number, self._filename, self._type)
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from typing import Dict
+
+from common.value_object import ValueObject
+
+
+# Moves the card at from_index in one of a player's hands or registers to to_index in another, or the same one
+class CardMove(ValueObject['CardMove']):
+    @property
+    def from_hand(self) -> str:
+        return self._from_hand
+
+    @property
+    def from_index(self) -> int:
+        return self._from_index
+
+    @property
+    def to_hand(self) -> str:
+        return self._to_hand
+
+    @property
+    def to_index(self) -> int:
+        return self._to_index
+
+    def __init__(self, from_hand: str, from_index: int, to_hand: str, to_index: int = None):
+        super().__init__()
+
+        self._from_hand: str = from_hand
+        self._from_index: int = from_index
+        self._to_hand: str = to_hand
+        self._to_index: int = to_index
+
+    def equals_core(self, value_object: CardMove) -> bool:
+        result: bool = self._from_hand == value_object.from_hand
+        result = result and self._from_index == value_object.from_index
+        result = result and self._to_hand == value_object.to_hand
+        result = result and self._to_index == value_object.to_index
+
+        return result
+
+    @staticmethod
+    def from_values(values: Dict) -> CardMove:
+        return CardMove(values['from_hand'], values['from_index'], values['to_hand'], values['to_index'])
+
+    def to_values(self) -> Dict:
+        return {'from_hand': self._from_hand, 'from_index': self._from_index, 'to_hand': self._to_hand,
+                'to_index': self._to_index}
@@ -1,61 +1,278 @@
 from __future__ import annotations
 
-from random import *
+from array import array
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
+from common.entity import Entity
 from common.enums import DeckType
 from core.base_deck import BaseDeck
+from core.card import Card
 from core.deck_card import DeckCard
+from core.shuffle_engine import RiffleShuffleEngine, ShuffleEngine
 
 
+# The game's decks keep their cards in arrays instead of a list of DeckCards. Each position holds an index
+# into the deck's palette of Card values, with the card's orb and uses next to it. A DeckCard is only made
+# for a position once something asks for it, and then stays with that card until it leaves the deck, so the
+# same object keeps coming back and changes made to it are what the deck saves.
 class Deck(BaseDeck):
-    MIN_SHUFFLES = 10
-    MAX_SHUFFLES = 50
+    MIN_SHUFFLES = RiffleShuffleEngine.MIN_SHUFFLES
+    MAX_SHUFFLES = RiffleShuffleEngine.MAX_SHUFFLES
+    DEFAULT_SHUFFLE_ENGINE: ShuffleEngine = RiffleShuffleEngine()
+    REF_TYPECODE: str = "H"
+    SMALL_TYPECODE: str = "B"
+
+    @property
+    def cards(self) -> List[DeckCard]:
+        if self._missing > 0:
+            for i in range(0, len(self._objects)):
+                if self._objects[i] is None:
+                    self._objects[i] = self._hydrate(i)
+
+            self._missing = 0
+
+        return self._objects
+
+    @property
+    def size(self) -> int:
+        return len(self._refs)
 
     def __init__(self, type: DeckType, id: str = None):
         super().__init__(type, id)
+        self._reset([], [], bytes(), bytes())
+
+    def add_card(self, card: Union[DeckCard, Card], index: int = None):
+        if card is None:
+            return
+
+        if len(self._refs) + 1 > self._max_size:
+            raise IndexError("Cannot add any more cards to this deck.")
+
+        if index is None or index >= len(self._refs):
+            index = len(self._refs)
+
+        ref, orb, num_uses = self._values_of(card)
+        self._unindex_from(index)
+        self._refs.insert(index, ref)
+        self._orbs.insert(index, orb)
+        self._num_uses.insert(index, num_uses)
+        self._objects.insert(index, card)
+        self.mark_dirty_from(index)
+        self._index_from(index)
+
+    def add_cards(self, cards: List[Union[DeckCard, Card]]):
+        for cur_card in cards:
+            self.add_card(cur_card)
+
+    def fill(self, cards: List[Card]):
+        self._reset(list(cards), range(0, len(cards)), bytes(len(cards)), bytes(len(cards)))
+        self.mark_dirty_from(0)
+
+    def populate(self, cards: List[DeckCard]):
+        self._reset([], [], bytes(), bytes())
+
+        for cur_card in cards:
+            ref, orb, num_uses = self._values_of(cur_card)
+            self._refs.append(ref)
+            self._orbs.append(orb)
+            self._num_uses.append(num_uses)
+
+        self._objects = cards
+        self.mark_dirty_from(0)
+
+    # Fills the deck straight from stored values, without making a DeckCard for any of them
+    def populate_values(self, cards: List[Card], orbs: bytes, num_uses: bytes):
+        self._reset(cards, range(0, len(cards)), orbs, num_uses)
+        self.mark_dirty_from(0)
+
+    def clear(self):
+        self._reset([], [], bytes(), bytes())
+        self.mark_dirty_from(0)
+
+    def mark_clean(self):
+        Entity.mark_clean(self)
+        self._dirty_from = None
+
+        for cur_card in self._objects:
+            if isinstance(cur_card, Entity):
+                cur_card.mark_clean()
+
+    def checkpoint(self) -> Tuple:
+        # Cards only ever get added to the palette, so the positions saved here still point at the same ones
+        return (array(self.REF_TYPECODE, self._refs), array(self.SMALL_TYPECODE, self._orbs),
+                array(self.SMALL_TYPECODE, self._num_uses), list(self._objects), self._missing, self._dirty_from)
+
+    def rollback(self, checkpoint: Tuple):
+        refs, orbs, num_uses, objects, self._missing, self._dirty_from = checkpoint
+        self._refs = array(self.REF_TYPECODE, refs)
+        self._orbs = array(self.SMALL_TYPECODE, orbs)
+        self._num_uses = array(self.SMALL_TYPECODE, num_uses)
+        self._objects = list(objects)
+        self._drop_indexes()
+
+    def has_dirty_cards(self) -> bool:
+        return any(x.is_dirty for x in self._objects if isinstance(x, Entity))
+
+    def numbers(self) -> List[int]:
+        return [self._card(i).number for i in range(0, len(self._refs))]
+
+    def card_values(self) -> List[Tuple[Card, int, int]]:
+        return [self._card_values(i) for i in range(0, len(self._refs))]
+
+    def getCardByFilename(self, filename) -> DeckCard:
+        result: List[int] = self._filename_positions().get(filename, [])
+
+        if len(result) > 1:
+            raise IndexError("More than one card found with filename " + filename)
+        elif len(result) == 0:
+            return None
+        else:
+            return self._object(result[0])
 
     def deal_card(self, target: BaseDeck) -> DeckCard:
         if target is None:
             raise ValueError("No target deck specified.")
 
-        if len(self._cards) == 0:
+        if len(self._refs) == 0:
             raise IndexError("The deck is empty")
 
-        deckCard: DeckCard = None
+        return self._deal(1, lambda cards: target.add_card(cards[0]))[0]
+
+    # Deals from the top of the deck as if deal_card were called count times, moving the cards in one go.
+    # Stops like deal_card would when the deck runs out or the target is full.
+    def deal_cards(self, target: BaseDeck, count: int) -> List[DeckCard]:
+        if target is None:
+            raise ValueError("No target deck specified.")
+
+        if count <= 0:
+            return []
+
+        num_cards: int = min(count, len(self._refs), target.max_size - target.size)
+        dealt: List[DeckCard] = [] if num_cards <= 0 else self._deal(num_cards, target.add_cards)
+
+        if len(dealt) < count and len(self._refs) == 0:
+            raise IndexError("The deck is empty")
+        elif len(dealt) < count:
+            raise IndexError("Cannot add any more cards to this deck.")
+
+        return dealt
+
+    def shuffle(self, times=0, engine: ShuffleEngine = None):
+        if engine is None:
+            engine = self.DEFAULT_SHUFFLE_ENGINE
+
+        # A deck of untouched cards with no objects handed out only needs its palette positions moved
+        if self._missing == len(self._objects) and not any(self._orbs) and not any(self._num_uses):
+            self._refs = array(self.REF_TYPECODE, engine.shuffle(self._refs.tolist(), times))
+        else:
+            order: List[int] = engine.shuffle(list(range(0, len(self._refs))), times)
+            self._refs = array(self.REF_TYPECODE, [self._refs[i] for i in order])
+            self._orbs = array(self.SMALL_TYPECODE, [self._orbs[i] for i in order])
+            self._num_uses = array(self.SMALL_TYPECODE, [self._num_uses[i] for i in order])
+            self._objects = [self._objects[i] for i in order]
+
+        self.mark_dirty_from(0)
+        self._drop_indexes()
+
+    def clear_cards(self):
+        for i in range(0, len(self._refs)):
+            if self._objects[i] is not None:
+                self._objects[i].clear()
+            elif self._orbs[i] != 0 or self._num_uses[i] != 0:
+                self._orbs[i] = 0
+                self._num_uses[i] = 0
+                self.mark_dirty_from(i)
+
+    def attributes(self):
+        return {'_id': self.id,
+                '_max_size': self._max_size,
+                '_deck_type': self._deck_type,
+                '_cards': self.cards}
+
+    def _reset(self, palette: List[Card], refs, orbs: bytes, num_uses: bytes):
+        self._palette: List[Card] = palette
+        self._palette_refs: Optional[Dict[int, int]] = None
+        self._refs: array = array(self.REF_TYPECODE, refs)
+        self._orbs: array = array(self.SMALL_TYPECODE, orbs)
+        self._num_uses: array = array(self.SMALL_TYPECODE, num_uses)
+        self._objects: List[Optional[DeckCard]] = [None] * len(self._refs)
+        self._missing: int = len(self._refs)
+        self._drop_indexes()
+
+    # Takes count cards off the top and hands them to add, the top card first. They go back if add fails.
+    def _deal(self, count: int, add: Callable[[List[DeckCard]], None]) -> List[DeckCard]:
+        start: int = len(self._refs) - count
+        dealt: List[DeckCard] = [self._object(i) for i in range(len(self._refs) - 1, start - 1, -1)]
+        values: Tuple = (self._refs[start:], self._orbs[start:], self._num_uses[start:], self._objects[start:])
+        self._unindex_from(start)
+        self._remove_top(start)
+
         try:
-            deckCard = self._cards.pop()
-            target.add_card(deckCard)
+            add(dealt)
         except IndexError as err:
-            if deckCard is not None:
-                self._cards.append(deckCard)
+            self._refs.extend(values[0])
+            self._orbs.extend(values[1])
+            self._num_uses.extend(values[2])
+            self._objects.extend(values[3])
+            self._index_from(start)
 
             raise err
 
-        return deckCard
+        self.mark_dirty_from(start)
 
-    def shuffle(self, times=0):
-        deck = self._cards
+        return dealt
 
-        if times == 0:
-            times = randint(self.MIN_SHUFFLES, self.MAX_SHUFFLES)
+    def _remove_top(self, start: int):
+        self._missing = self._missing - self._objects[start:].count(None)
+        del self._refs[start:]
+        del self._orbs[start:]
+        del self._num_uses[start:]
+        del self._objects[start:]
 
-        for times in range(0, times):
-            deck, second_deck = self._cut_deck(deck)
+    def _values_of(self, card: Union[DeckCard, Card]) -> Tuple[int, int, int]:
+        if type(card) is DeckCard:
+            return self._ref(card.card), card.orb, card.num_uses
 
-            for index, item in enumerate(second_deck):
-                insert_index = index * 2 + 1
-                deck.insert(insert_index, item)
+        return self._ref(card), 0, 0
 
-        deck, second_deck = self._cut_deck(deck)
-        self._cards = second_deck + deck
+    # Palette position of the card, adding it if this deck has not held that Card instance before
+    def _ref(self, card: Card) -> int:
+        if self._palette_refs is None:
+            self._palette_refs = {id(x): i for i, x in enumerate(self._palette)}
 
-    def _cut_deck(self, deck):
-        # TODO - Check deck size to avoid index error
-        cut_index = randint(10, len(deck) - 10)
-        deck, second_deck = deck[:cut_index], deck[cut_index:]
+        ref: Optional[int] = self._palette_refs.get(id(card))
 
-        return deck, second_deck
+        if ref is None:
+            ref = len(self._palette)
+            self._palette.append(card)
+            self._palette_refs[id(card)] = ref
 
-    def clear_cards(self):
-        for cur_card in self.cards:
-            cur_card.clear()
\ No newline at end of file
+        return ref
+
+    def _card(self, index: int) -> Union[DeckCard, Card]:
+        cur_card: Optional[DeckCard] = self._objects[index]
+
+        return self._palette[self._refs[index]] if cur_card is None else cur_card
+
+    def _indexed_card(self, index: int) -> Card:
+        return self._palette[self._refs[index]]
+
+    def _card_values(self, index: int) -> Tuple[Card, int, int]:
+        cur_card: Optional[DeckCard] = self._objects[index]
+
+        if cur_card is None:
+            return self._palette[self._refs[index]], self._orbs[index], self._num_uses[index]
+        elif type(cur_card) is DeckCard:
+            return cur_card.card, cur_card.orb, cur_card.num_uses
+
+        return cur_card, 0, 0
+
+    def _object(self, index: int) -> DeckCard:
+        if self._objects[index] is None:
+            self._objects[index] = self._hydrate(index)
+            self._missing = self._missing - 1
+
+        return self._objects[index]
+
+    def _hydrate(self, index: int) -> DeckCard:
+        return DeckCard.hydrate(self._palette[self._refs[index]], self._orbs[index], self._num_uses[index])
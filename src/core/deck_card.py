@@ -9,6 +9,7 @@ from core.base_card import BaseCard
 
 class DeckCard(BaseCard):
     MAX_NUM_USES: int = 7
+    __slots__ = ("_orb", "_num_uses")
 
     @property
     def orb(self) -> int:
@@ -20,6 +21,7 @@ class DeckCard(BaseCard):
             raise AttributeError("Orb value must be between 0 and 3, inclusive")
 
         self._orb = value
+        self.mark_dirty("orb")
 
     @property
     def num_uses(self) -> int:
@@ -31,6 +33,7 @@ class DeckCard(BaseCard):
             raise AttributeError("Num_uses must be betwen 0 and 7, inclusive")
 
         self._num_uses = value
+        self.mark_dirty("num_uses")
 
     def __init__(self, card: Card, id: str = None, orb: int = 0, num_uses: int = 0):
         super().__init__(card, id)
@@ -38,6 +41,22 @@ class DeckCard(BaseCard):
         self._orb: int = orb
         self._num_uses:int = num_uses
 
+    # Builds a card read back by a repository without going through the constructors. Decks are hydrated a
+    # card at a time, so this sets the slots directly.
+    @staticmethod
+    def hydrate(card: Card, orb: int, num_uses: int) -> DeckCard:
+        deck_card: DeckCard = DeckCard.__new__(DeckCard)
+        deck_card._id = None
+        deck_card._dirty_fields = Entity.NO_DIRTY_FIELDS
+        deck_card._persisted = False
+        deck_card._version = 0
+        deck_card._stale = False
+        deck_card._card = card
+        deck_card._orb = orb
+        deck_card._num_uses = num_uses
+
+        return deck_card
+
     # Need to flatten out the card attributes
     def attributes(self):
         return {"filename": self.filename,
@@ -48,4 +67,6 @@ class DeckCard(BaseCard):
 
     def clear(self):
         self._orb = 0
-        self._num_uses = 0
\ No newline at end of file
+        self._num_uses = 0
+        self.mark_dirty("orb")
+        self.mark_dirty("num_uses")
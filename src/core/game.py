@@ -1,14 +1,18 @@
 from __future__ import annotations
 
+import secrets
 from datetime import date
+from random import Random
 from typing import List
 
 from common.entity import Entity
 from common.enums import DeckType
 from core.deck import Deck
+from core.shuffle_engine import ShuffleEngine
 
 
 class Game(Entity):
+    SEED_BITS: int = 63
 
     @property
     def turn(self) -> int:
@@ -28,6 +32,7 @@ class Game(Entity):
             raise ValueError("This is not a program deck")
 
         self._program_deck = value
+        self.mark_dirty("program_deck")
 
     @property
     def power_deck(self) -> Deck:
@@ -44,6 +49,18 @@ class Game(Entity):
     @notes.setter
     def notes(self, notes: str):
         self._notes = notes
+        self.mark_dirty("notes")
+
+    # Every shuffle in the game draws from a stream of generators seeded from this, so the same seed deals
+    # the same game again
+    @property
+    def seed(self) -> int:
+        return self._seed
+
+    # Shuffles taken from the stream so far
+    @property
+    def shuffle_count(self) -> int:
+        return self._shuffle_count
 
     def __init__(self, props: GameProps):
         super().__init__()
@@ -54,19 +71,50 @@ class Game(Entity):
         self._start_date: str = props.start_date
         self._board_state_filenames: List[str] = props.board_state_filenames
         self._notes: str = props.notes
+        self._seed: int = secrets.randbits(Game.SEED_BITS) if props.seed is None else props.seed
+        self._shuffle_count: int = props.shuffle_count
 
         if len(props.id) > 0:
             self._id = props.id
 
     def inc_turn(self):
         self._turn = self._turn + 1
+        self.mark_dirty("turn")
+
+    # The generator for the next shuffle. Each one is seeded on its own, so games never share random state.
+    def shuffle_random(self) -> Random:
+        return Random("{}:{}".format(self._seed, self._shuffle_count))
+
+    def shuffle_deck(self, deck: Deck, engine: ShuffleEngine = None):
+        if engine is None:
+            engine = Deck.DEFAULT_SHUFFLE_ENGINE
+
+        deck.shuffle(engine=engine.with_random(self.shuffle_random()))
+        self.count_shuffle()
+
+    def count_shuffle(self):
+        self._shuffle_count = self._shuffle_count + 1
+        self.mark_dirty("shuffle_count")
 
     def add_board_state(self, filename: str):
         self._board_state_filenames.append(filename)
+        self.mark_dirty("board_state_filenames")
 
     def clear_board_states(self):
+        if len(self._board_state_filenames) > 0:
+            self.mark_dirty("board_state_filenames")
+
         self._board_state_filenames = []
 
+    @property
+    def has_changes(self) -> bool:
+        return super().has_changes or self._program_deck.has_changes or self._power_deck.has_changes
+
+    def mark_clean(self):
+        super().mark_clean()
+        self._program_deck.mark_clean()
+        self._power_deck.mark_clean()
+
 
 class GameProps:
     def __init__(self):
@@ -77,3 +125,5 @@ class GameProps:
         self.power_deck: Deck = None
         self.board_state_filenames = []
         self.notes = ""
+        self.seed: int = None
+        self.shuffle_count: int = 0
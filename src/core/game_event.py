@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, Optional
+
+from common.enums import GameEventType
+from common.value_object import ValueObject
+
+
+# Something that happened to the game, with just enough detail to make it happen again on the state
+# before it. Events that shuffle carry the resulting card order, so replaying one never needs chance.
+class GameEvent(ValueObject['GameEvent']):
+    @property
+    def type(self) -> GameEventType:
+        return self._type
+
+    @property
+    def payload(self) -> Dict:
+        return self._payload
+
+    # Position in the game log, known once the event has been appended
+    @property
+    def sequence(self) -> Optional[int]:
+        return self._sequence
+
+    @property
+    def created(self) -> str:
+        return self._created
+
+    def __init__(self, type: GameEventType, payload: Dict = None, sequence: Optional[int] = None,
+                 created: str = None):
+        super().__init__()
+
+        if type not in GameEventType.__members__.values():
+            raise AttributeError("Invalid game event type: " + str(type))
+
+        self._type: GameEventType = GameEventType(type)
+        self._payload: Dict = {} if payload is None else payload
+        self._sequence: Optional[int] = sequence
+        self._created: str = datetime.now().isoformat(timespec="seconds") if created is None else created
+
+    def equals_core(self, value_object: GameEvent) -> bool:
+        result: bool = self._type == value_object.type
+        result = result and self._payload == value_object.payload
+        result = result and self._sequence == value_object.sequence
+
+        return result
+
+    def get(self, key: str):
+        return self._payload[key]
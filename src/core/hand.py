@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import List
+
 from core.base_deck import BaseDeck
 
 
@@ -8,13 +10,12 @@ class Hand(BaseDeck):
         super().__init__(type, id, max_size)
 
     def transfer_card_by_number(self, number: int, target: BaseDeck, target_index: int = None):
-        for i in range(0, len(self._cards)):
-            if self._cards[i].number == number:
-                self.transfer_card(i, target, target_index)
+        positions: List[int] = self.positions_of_number(number)
 
-                return
+        if len(positions) == 0:
+            raise ValueError("Card with number {} not found".format(number))
 
-        raise ValueError("Card with number {} not found".format(number))
+        self.transfer_card(min(positions), target, target_index)
 
     def transfer_card(self, index: int, target: BaseDeck, target_index: int = None):
         if target is None:
@@ -23,11 +24,17 @@ class Hand(BaseDeck):
         if index < 0 or index >= len(self._cards):
             raise IndexError("Source index is out of range")
 
+        self._unindex_from(index)
+        card = self._cards.pop(index)
+        self._index_from(index)
+
         try:
-            card = self._cards.pop(index)
             target.add_card(card, target_index)
         except Exception as err:
-            if card is not None:
-                self._cards.insert(index, card)
+            self._unindex_from(index)
+            self._cards.insert(index, card)
+            self._index_from(index)
 
             raise err
+
+        self.mark_dirty_from(index)
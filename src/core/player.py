@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+from typing import List, Tuple
+
 from common.entity import Entity
 from common.enums import DeckType
 from core.base_deck import BaseDeck
 from core.card import Card
+from core.card_move import CardMove
 from core.deck import Deck
 from core.hand import Hand
 from core.registers import Registers
@@ -53,6 +56,7 @@ class Player(Entity):
     @avatar_filename.setter
     def avatar_filename(self, value: str):
         self._avatar_filename = value
+        self.mark_dirty("avatar_filename")
 
     @property
     def instructions(self) -> str:
@@ -60,6 +64,9 @@ class Player(Entity):
 
     @instructions.setter
     def instructions(self, value: str):
+        if value != self._instructions:
+            self.mark_dirty("instructions")
+
         self._instructions = value
 
     @property
@@ -69,6 +76,7 @@ class Player(Entity):
     @is_active.setter
     def is_active(self, value: bool):
         self._active = value
+        self.mark_dirty("active")
 
     def __init__(self, props: PlayerProps):
         super().__init__()
@@ -101,6 +109,22 @@ class Player(Entity):
 
         self._registers.transfer_card(register, self._program_hand)
 
+    # Makes every move in order or, if one of them fails, none of them
+    def move_cards(self, moves: List[CardMove]):
+        decks: List[BaseDeck] = [self._program_hand, self._power_hand, self._registers]
+        checkpoints: List[Tuple] = [x.checkpoint() for x in decks]
+
+        try:
+            for move in moves:
+                self.get_hand_by_name(move.from_hand).transfer_card(move.from_index,
+                                                                    self.get_hand_by_name(move.to_hand),
+                                                                    move.to_index)
+        except Exception as err:
+            for deck, checkpoint in zip(decks, checkpoints):
+                deck.rollback(checkpoint)
+
+            raise err
+
     # Test only?
     def draw_power_card(self, deck: Deck) -> Card:
         return deck.deal_card(self._power_hand)
@@ -111,8 +135,7 @@ class Player(Entity):
         if self.is_powered_down or not self.is_active:
             return
 
-        for i in range(0, self.MAX_PROGRAM_HAND_SIZE - self._damage):
-            source_deck.deal_card(self._program_hand)
+        source_deck.deal_cards(self._program_hand, self.MAX_PROGRAM_HAND_SIZE - self._damage)
 
     def reset_power_hand(self, source_deck: Deck, hand_size: int):
         self._power_hand.clear()
@@ -120,15 +143,16 @@ class Player(Entity):
         if not self.is_active:
             return
 
-        for num_cards in range(0, hand_size):
-            self.draw_power_card(source_deck)
+        source_deck.deal_cards(self._power_hand, hand_size)
 
     def reset_damage(self):
         self._damage = 0
+        self.mark_dirty("damage")
         self.registers.reset_locks()
 
     def inc_damage(self):
         self._damage = self._damage + 1
+        self.mark_dirty("damage")
 
         if self._damage >= self.REGISTER_LOCK_THRESHOLD:
             self._registers.lock_register()
@@ -142,21 +166,44 @@ class Player(Entity):
             self._registers.unlock_register()
 
         self._damage = self._damage - 1
+        self.mark_dirty("damage")
 
         if self._damage < 0:
             self._damage = 0
 
+    # Locks every register, so the program cannot be changed until the next turn
+    def lock_choices(self):
+        for i in range(0, Registers.REGISTER_SIZE):
+            if not self._registers.locks[i]:
+                self._registers.lock_register(i)
+
+    # Leaves only the registers that the damage locks, which are the last ones
+    def unlock_choices(self):
+        damaged: int = min(Registers.REGISTER_SIZE, max(0, self._damage - self.REGISTER_LOCK_THRESHOLD + 1))
+
+        for i in range(0, Registers.REGISTER_SIZE):
+            locked: bool = i >= Registers.REGISTER_SIZE - damaged
+
+            if self._registers.locks[i] and not locked:
+                self._registers.unlock_register(i)
+            elif locked and not self._registers.locks[i]:
+                self._registers.lock_register(i)
+
     def will_power_down(self):
         self._will_power_down = True
+        self.mark_dirty("will_power_down")
 
     def will_power_up(self):
         self._will_power_down = False
+        self.mark_dirty("will_power_down")
 
     def power_down(self):
         self._powered_down = True
+        self.mark_dirty("powered_down")
 
     def power_up(self):
         self._powered_down = False
+        self.mark_dirty("powered_down")
 
     def reset(self):
         # Don't reset "active" since that is turn independent 
@@ -168,6 +215,20 @@ class Player(Entity):
         self._power_hand = Hand(DeckType.POWER_HAND, self.MAX_POWER_HAND_SIZE)
         self._registers = Registers()
 
+        for field in ("instructions", "damage", "powered_down", "will_power_down"):
+            self.mark_dirty(field)
+
+    @property
+    def has_changes(self) -> bool:
+        return super().has_changes or self._program_hand.has_changes or self._power_hand.has_changes or \
+            self._registers.has_changes
+
+    def mark_clean(self):
+        super().mark_clean()
+        self._program_hand.mark_clean()
+        self._power_hand.mark_clean()
+        self._registers.mark_clean()
+
     def get_hand_by_name(self, name: str) -> BaseDeck:
         if name.lower() == DeckType.PROGRAM_HAND.value:
             return self.program_hand
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Set, Tuple
 
 from common.enums import DeckType
 from core.base_deck import BaseDeck
@@ -9,6 +9,7 @@ from core.card import Card
 
 class Registers(BaseDeck):
     REGISTER_SIZE: int = 5
+    TRACKING_ATTRIBUTES = BaseDeck.TRACKING_ATTRIBUTES + ("_dirty_registers",)
 
     @property
     def locks(self):
@@ -18,6 +19,15 @@ class Registers(BaseDeck):
     def throws(self):
         return self._throws
 
+    # Register slots whose card, lock or throw changed since the last save
+    @property
+    def dirty_registers(self) -> Set[int]:
+        return self._dirty_registers
+
+    @property
+    def has_changes(self) -> bool:
+        return super().has_changes or len(self._dirty_registers) > 0
+
     @property
     def any_empty(self):
         tmp: bool = False
@@ -30,6 +40,7 @@ class Registers(BaseDeck):
 
     def __init__(self, id: str = None, cards: List[Card] = [], locks: List[bool] = [], throws: List[bool] = []):
         super().__init__(DeckType.PROGRAM_DECK, id, self.REGISTER_SIZE)
+        self._dirty_registers: Set[int] = set()
 
         if len(cards) == self.REGISTER_SIZE and len(locks) == self.REGISTER_SIZE:
             self._locks: List[bool] = locks
@@ -56,6 +67,8 @@ class Registers(BaseDeck):
             raise LookupError("Cannot add a card to a locked register")
         else:
             self.cards[index] = card
+            self._dirty_registers.add(index)
+            self._drop_indexes()
 
     def transfer_card(self, index: int, target: BaseDeck, target_index: int = None):
         if target is None:
@@ -68,12 +81,14 @@ class Registers(BaseDeck):
         if self._locks[index]:
             raise LookupError("Cannot transfer a card from a locked register")
 
-        if self._cards[index] == Card.empty():
+        if self._cards[index].number == Card.NUMBER_EMPTY:
             raise ValueError("Cannot transfer an empty register")
 
         try:
             target.add_card(card, target_index)
             self._cards[index] = Card.empty()
+            self._dirty_registers.add(index)
+            self._drop_indexes()
         except IndexError as err:
             if card is not None:
                 self._cards.insert(index, card)
@@ -83,21 +98,25 @@ class Registers(BaseDeck):
     def lock_register(self, index: int = None):
         if index is not None:
             self._locks[index] = True
+            self._dirty_registers.add(index)
             return
 
         for i in range(len(self._locks), 0, -1):
             if not self._locks[i - 1]:
                 self._locks[i - 1] = True
+                self._dirty_registers.add(i - 1)
                 break
 
     def unlock_register(self, index: int = None):
         if index is not None:
             self._locks[index] = False
+            self._dirty_registers.add(index)
             return
 
         for i in range(0, len(self._locks)):
             if self._locks[i]:
                 self._locks[i] = False
+                self._dirty_registers.add(i)
                 break
 
     def reset_locks(self):
@@ -105,9 +124,11 @@ class Registers(BaseDeck):
 
         for i in range(0, self.REGISTER_SIZE):
             self._locks.append(False)
+            self._dirty_registers.add(i)
 
     def throw(self, index: int):
         self._throws[index] = not self._throws[index]
+        self._dirty_registers.add(index)
 
     def clear(self):
         for i in range(0, len(self._locks)):
@@ -115,3 +136,22 @@ class Registers(BaseDeck):
 
             if not self._locks[i]:
                 self._cards[i] = Card.empty()
+
+            self._dirty_registers.add(i)
+
+        self._drop_indexes()
+
+    def checkpoint(self) -> Tuple:
+        return super().checkpoint(), list(self._locks), list(self._throws), set(self._dirty_registers)
+
+    def rollback(self, checkpoint: Tuple):
+        deck, locks, throws, dirty_registers = checkpoint
+        super().rollback(deck)
+        self._locks = list(locks)
+        self._throws = list(throws)
+        self._dirty_registers = set(dirty_registers)
+
+    def mark_clean(self):
+        super().mark_clean()
+        self._dirty_registers = set()
+
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import random
+from random import Random
+from typing import List, TypeVar
+
+from common.enums import ShuffleType
+
+T = TypeVar("T")
+
+
+# Puts a list of cards in a random order and returns it as a new list. Engines draw from the random module
+# unless they are given their own Random.
+class ShuffleEngine:
+    def __init__(self, rng: Random = None):
+        self._random = random if rng is None else rng
+
+    @staticmethod
+    def create(type: ShuffleType, rng: Random = None) -> ShuffleEngine:
+        if type == ShuffleType.RIFFLE:
+            return RiffleShuffleEngine(rng)
+        elif type == ShuffleType.FISHER_YATES:
+            return FisherYatesShuffleEngine(rng)
+
+        raise ValueError("Invalid shuffle type: " + str(type))
+
+    # The same kind of engine, drawing from the given Random
+    def with_random(self, rng: Random) -> ShuffleEngine:
+        return type(self)(rng)
+
+    def shuffle(self, cards: List[T], times: int = 0) -> List[T]:
+        raise NotImplementedError
+
+
+# Shuffles like a person at the table: cut the deck and riffle the halves together a number of times, then
+# cut once more. Each riffle builds the interleaved deck with slices, so a pass is O(n). It makes the same
+# random draws as the old insert-based riffle and gives the same order for the same seed.
+class RiffleShuffleEngine(ShuffleEngine):
+    MIN_SHUFFLES: int = 10
+    MAX_SHUFFLES: int = 50
+    CUT_MARGIN: int = 10
+
+    def shuffle(self, cards: List[T], times: int = 0) -> List[T]:
+        deck: List[T] = list(cards)
+
+        if times == 0:
+            times = self._random.randint(self.MIN_SHUFFLES, self.MAX_SHUFFLES)
+
+        for i in range(0, times):
+            deck = self.riffle(deck, self.cut_index(len(deck)))
+
+        cut_index: int = self.cut_index(len(deck))
+
+        return deck[cut_index:] + deck[:cut_index]
+
+    # Leaves at least CUT_MARGIN cards on either side, or a quarter of the deck when it is too small for that
+    def cut_index(self, size: int) -> int:
+        margin: int = self.CUT_MARGIN if size >= 2 * self.CUT_MARGIN else size // 4
+
+        return self._random.randint(margin, size - margin)
+
+    # Alternates cards from the top part and the part below the cut, starting with the top, and leaves the rest
+    # of whichever part is longer at the bottom
+    @staticmethod
+    def riffle(deck: List[T], cut_index: int) -> List[T]:
+        pairs: int = min(cut_index, len(deck) - cut_index)
+        result: List[T] = [None] * len(deck)
+        result[0:2 * pairs:2] = deck[0:pairs]
+        result[1:2 * pairs:2] = deck[cut_index:cut_index + pairs]
+        result[2 * pairs:] = deck[pairs:cut_index] + deck[cut_index + pairs:]
+
+        return result
+
+
+# One uniform pass, for when an even spread matters more than shuffling the way players do
+class FisherYatesShuffleEngine(ShuffleEngine):
+    def shuffle(self, cards: List[T], times: int = 0) -> List[T]:
+        deck: List[T] = list(cards)
+        self._random.shuffle(deck)
+
+        return deck
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import json
+import zlib
+from typing import Dict, List
+
+from common.enums import DeckType, CardType
+from core.base_deck import BaseDeck
+from core.deck import Deck
+from core.deck_card import DeckCard
+from core.game import Game, GameProps
+from core.hand import Hand
+from core.player import Player, PlayerProps
+from core.registers import Registers
+from domain.card_catalog import CardCatalog
+
+
+# Whole games and players as plain values, for storage that is not split into tables. Cards in decks and
+# hands are kept as [number, orb, uses], register cards as [number, filename].
+class AggregateCodec:
+    @staticmethod
+    def encode(values) -> bytes:
+        return zlib.compress(json.dumps(values, separators=(",", ":")).encode("utf-8"))
+
+    @staticmethod
+    def decode(data: bytes):
+        return json.loads(zlib.decompress(data).decode("utf-8"))
+
+    @staticmethod
+    def values_from_game(game: Game) -> Dict:
+        return {'id': game.id,
+                'turn': game.turn,
+                'start_date': game.start_date,
+                'notes': game.notes,
+                'seed': game.seed,
+                'shuffle_count': game.shuffle_count,
+                'board_state_filenames': list(game.board_state_filenames),
+                'program_deck': AggregateCodec._from_cards(game.program_deck),
+                'power_deck': AggregateCodec._from_cards(game.power_deck)}
+
+    @staticmethod
+    def to_game(values: Dict, card_catalog: CardCatalog) -> Game:
+        props: GameProps = GameProps()
+        props.id = values['id']
+        props.turn = values['turn']
+        props.start_date = values['start_date']
+        props.notes = values['notes']
+        props.seed = values.get('seed', 0)
+        props.shuffle_count = values.get('shuffle_count', 0)
+        props.board_state_filenames = values['board_state_filenames']
+        props.program_deck = AggregateCodec._to_deck(values['program_deck'], DeckType.PROGRAM_DECK, props.id,
+                                                     CardType.PROGRAM, card_catalog)
+        props.power_deck = AggregateCodec._to_deck(values['power_deck'], DeckType.POWER_DECK, props.id,
+                                                   CardType.POWER, card_catalog)
+
+        return Game(props)
+
+    # A separate game with the same state, version and clean marks, sharing nothing that can change
+    @staticmethod
+    def copy_game(game: Game, card_catalog: CardCatalog) -> Game:
+        copy: Game = AggregateCodec.to_game(AggregateCodec.values_from_game(game), card_catalog)
+        copy.mark_version(game.version)
+        copy.mark_clean()
+
+        return copy
+
+    @staticmethod
+    def values_from_player(player: Player) -> Dict:
+        return {'id': player.id,
+                'name': player.name,
+                'damage': player.damage,
+                'powered_down': player.is_powered_down,
+                'will_power_down': player.will_be_powered_down,
+                'avatar_filename': player.avatar_filename,
+                'instructions': player.instructions,
+                'active': player.is_active,
+                'program_hand': AggregateCodec._from_cards(player.program_hand),
+                'power_hand': AggregateCodec._from_cards(player.power_hand),
+                'registers': [[x.number, x.filename] for x in player.registers.cards],
+                'locks': list(player.registers.locks),
+                'throws': list(player.registers.throws)}
+
+    @staticmethod
+    def to_player(values: Dict, card_catalog: CardCatalog) -> Player:
+        props: PlayerProps = PlayerProps()
+        props.id = values['id']
+        props.name = values['name']
+        props.damage = values['damage']
+        props.powered_down = values['powered_down']
+        props.will_power_down = values['will_power_down']
+        props.avatar_filename = values['avatar_filename']
+        props.instructions = values['instructions']
+        props.active = values['active']
+        props.program_hand = Hand(DeckType.PROGRAM_HAND, Player.MAX_PROGRAM_HAND_SIZE, props.id)
+        props.program_hand.populate(AggregateCodec._to_cards(values['program_hand'], CardType.PROGRAM,
+                                                             card_catalog))
+        props.power_hand = Hand(DeckType.POWER_HAND, Player.MAX_POWER_HAND_SIZE, props.id)
+        props.power_hand.populate(AggregateCodec._to_cards(values['power_hand'], CardType.POWER, card_catalog))
+        props.registers = Registers(props.id,
+                                    [card_catalog.intern(x[0], x[1], CardType.PROGRAM) for x in values['registers']],
+                                    values['locks'], values['throws'])
+
+        return Player(props)
+
+    @staticmethod
+    def copy_player(player: Player, card_catalog: CardCatalog) -> Player:
+        copy: Player = AggregateCodec.to_player(AggregateCodec.values_from_player(player), card_catalog)
+        copy.mark_version(player.version)
+        copy.mark_clean()
+
+        return copy
+
+    @staticmethod
+    def _from_cards(deck: BaseDeck) -> List[List[int]]:
+        return [[card.number, orb, num_uses] for card, orb, num_uses in deck.card_values()]
+
+    @staticmethod
+    def _to_deck(values: List[List[int]], type: DeckType, id: str, card_type: CardType,
+                 card_catalog: CardCatalog) -> Deck:
+        deck: Deck = Deck(type, id)
+        deck.populate_values([card_catalog.lookup(card_type, x[0]) for x in values], bytes(x[1] for x in values),
+                             bytes(x[2] for x in values))
+
+        return deck
+
+    @staticmethod
+    def _to_cards(values: List[List[int]], card_type: CardType, card_catalog: CardCatalog) -> List[DeckCard]:
+        return [DeckCard.hydrate(card_catalog.lookup(card_type, x[0]), x[1], x[2]) for x in values]
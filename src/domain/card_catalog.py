@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple, Callable
+
+from common.engine_registry import EngineRegistry
+from common.enums import CardType
+from core.card import Card
+
+
+# Every card in the card table, loaded once per process and shared by everything that needs cards, so
+# decks, hands and registers all point at the same Card instances. A catalog never changes once built;
+# refreshing the cards throws it away and the next caller loads a new one.
+class CardCatalog:
+    NUMBER_BACK: int = 9999
+
+    _lock: threading.RLock = threading.RLock()
+    _catalogs: Dict[str, CardCatalog] = {}
+
+    def __init__(self, cards: Iterable[Card]):
+        self._by_number: Dict[Tuple[str, int], Card] = {}
+        self._by_filename: Dict[Tuple[str, str], Card] = {}
+        by_type: Dict[str, List[Card]] = {type: [] for type in CardType}
+
+        for card in sorted(cards, key=lambda x: x.number):
+            self._by_number[(card.type, card.number)] = card
+            self._by_filename[(card.type, card.filename)] = card
+
+            if card.number != self.NUMBER_BACK:
+                by_type[card.type].append(card)
+
+        self._by_type: Dict[str, Tuple[Card, ...]] = {type: tuple(cards) for type, cards in by_type.items()}
+
+    @classmethod
+    def for_database(cls, database: str, load: Callable[[], CardCatalog]) -> CardCatalog:
+        key: str = EngineRegistry.normalize(database)
+
+        with cls._lock:
+            catalog: CardCatalog = cls._catalogs.get(key)
+
+            if catalog is None:
+                catalog = load()
+                cls._catalogs[key] = catalog
+
+        return catalog
+
+    @classmethod
+    def invalidate(cls, database: str):
+        with cls._lock:
+            cls._catalogs.pop(EngineRegistry.normalize(database), None)
+
+    # Playable cards of the type ordered by number, without the card back
+    def by_type(self, type: CardType) -> Tuple[Card, ...]:
+        return self._by_type.get(type, ())
+
+    def by_number(self, type: CardType, number: int) -> Optional[Card]:
+        return self._by_number.get((type, number))
+
+    def by_filename(self, type: CardType, filename: str) -> Optional[Card]:
+        return self._by_filename.get((type, filename))
+
+    def card_back(self, type: CardType) -> Optional[Card]:
+        return self.by_number(type, self.NUMBER_BACK)
+
+    # Cards that are no longer in the catalog still need something to show
+    def lookup(self, type: CardType, number: int) -> Card:
+        card: Card = self._by_number.get((type, number))
+
+        if card is None:
+            card = Card(number, "", type)
+
+        return card
+
+    # The shared instance for a card read from a row, or a new one if the catalog does not have it
+    def intern(self, number: int, filename: str, type: CardType) -> Card:
+        card: Card = self._by_number.get((type, number))
+
+        if card is None or card.filename != filename:
+            card = Card.hydrate(number, filename, type)
+
+        return card
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Dict
 
-from sqlalchemy.orm import Query
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
 
 from common.enums import CardType
 from common.repository import Repository, T
 from core.card import Card
+from core.card_file import CardFile
+from domain.card_catalog import CardCatalog
+from domain.models.card_manifest_model import CardManifestModel
 from domain.models.card_model import CardModel
 
 
@@ -26,9 +30,15 @@ class CardRepository(Repository[Card]):
         with self.get_session_begin() as session:
             session.delete(model_card)
 
+        self._invalidate_catalog()
+
+    # The manifest describes what the card table was built from, so it goes too
     def clear_all(self):
         with self.get_session_begin() as session:
             session.query(CardModel).delete()
+            session.query(CardManifestModel).delete()
+
+        self._invalidate_catalog()
 
     def create(self, card: Card):
         model_card: CardModel = CardModel.from_card(card)
@@ -36,21 +46,100 @@ class CardRepository(Repository[Card]):
         with self.get_session_begin() as session:
             session.add(model_card)
 
+        self._invalidate_catalog()
+
     def get_all_by_type(self, type: CardType) -> List[Card]:
-        with self.get_session_begin() as session:
-            result: Query = \
-                session.query(CardModel).filter(CardModel.type == type,
-                                                CardModel.number != 9999).order_by(CardModel.number)
+        return list(self.get_catalog().by_type(type))
 
-            cards: List[Card] = []
-            for row in result:
-                cards.append(row.to_card())
+    def get_card_back(self, type: CardType) -> Card:
+        return self.get_catalog().card_back(type)
 
-        return cards
+    # Cards written by a unit of work that has not committed yet must not end up in the shared catalog
+    def get_catalog(self) -> CardCatalog:
+        if self.is_reading_uncommitted():
+            return self._load_catalog()
+
+        return CardCatalog.for_database(self._database, self._load_catalog)
+
+    def _load_catalog(self) -> CardCatalog:
+        with self.get_read_session_begin() as session:
+            return CardCatalog([row.to_card() for row in session.query(CardModel)])
+
+    # Dropped straight away for this unit of work, and again once it ends in case another thread loaded
+    # the old cards in the meantime
+    def _invalidate_catalog(self):
+        CardCatalog.invalidate(self._database)
+
+        self.after_commit(lambda: CardCatalog.invalidate(self._database))
+        self.on_rollback(lambda: CardCatalog.invalidate(self._database))
+
+    def get_manifest(self) -> Dict[tuple, CardFile]:
+        with self.get_read_session_begin() as session:
+            return self._get_manifest(session)
+
+    # Brings the card table in line with the given card files, changing only the cards whose files came or
+    # went since the last refresh. Returns whether anything had to be written.
+    def refresh_from_manifest(self, card_files: List[CardFile]) -> bool:
+        current: Dict[tuple, CardFile] = {x.key: x for x in card_files}
+
+        # Checked without the write lock first, since usually nothing has changed
+        if self.get_manifest() == current:
+            return False
 
-    def get_card_back(self, type: CardType) -> Card:
         with self.get_session_begin() as session:
-            db_card: CardModel = session.query(CardModel).filter(CardModel.type == type,
-                                                                 CardModel.number == 9999).first()
+            # Another worker may have got there while we waited for the lock
+            stored: Dict[tuple, CardFile] = self._get_manifest(session)
+
+            if stored == current:
+                return False
+
+            if len(stored) == 0:
+                session.execute(delete(CardModel))
+                removed: List[CardFile] = []
+                added: List[CardFile] = list(current.values())
+            else:
+                removed: List[CardFile] = [x for key, x in stored.items() if current.get(key) != x]
+                added: List[CardFile] = [x for key, x in current.items() if stored.get(key) != x]
+
+            # A file that was only touched keeps its card, just its manifest entry is replaced
+            self._delete_cards([x for x in removed if x.key not in current], session)
+            self._delete_manifest(removed, session)
+
+            cards: List[Card] = [x.to_card() for x in added if x.key not in stored]
+            cards = [x for x in cards if x is not None]
+
+            if len(cards) > 0:
+                session.execute(insert(CardModel), [{'number': x.number, 'filename': x.filename, 'type': x.type}
+                                                    for x in cards])
+
+            if len(added) > 0:
+                session.execute(insert(CardManifestModel),
+                                [{'filename': x.filename, 'type': x.type, 'size': x.size,
+                                  'modified': x.modified, 'number': x.number} for x in added])
+
+        self._invalidate_catalog()
+
+        return True
+
+    @staticmethod
+    def _get_manifest(session: Session) -> Dict[tuple, CardFile]:
+        card_files: List[CardFile] = [x.to_card_file() for x in session.query(CardManifestModel)]
+
+        return {x.key: x for x in card_files}
+
+    @staticmethod
+    def _delete_cards(card_files: List[CardFile], session: Session):
+        for type in CardType:
+            filenames: List[str] = [x.filename for x in card_files if x.type == type]
+
+            if len(filenames) > 0:
+                session.execute(delete(CardModel).where(CardModel.type == type, CardModel.filename.in_(filenames)))
+
+    @staticmethod
+    def _delete_manifest(card_files: List[CardFile], session: Session):
+        for type in CardType:
+            filenames: List[str] = [x.filename for x in card_files if x.type == type]
 
-            return db_card.to_card()
+            if len(filenames) > 0:
+                session.execute(delete(CardManifestModel).where(CardManifestModel.type == type,
+                                                                CardManifestModel.filename.in_(filenames)))
@@ -1,25 +1,36 @@
-from typing import List
+from typing import Tuple
 
 from common.enums import DeckType, CardType
 from core.card import Card
 from core.deck import Deck
+from core.shuffle_engine import ShuffleEngine
 from domain.card_respository import CardRepository
 
 
 class DeckFactory:
-    def __init__(self, card_repository: CardRepository = None):
+    # How new decks get shuffled
+    @property
+    def shuffle_engine(self) -> ShuffleEngine:
+        return self._shuffle_engine
+
+    def __init__(self, card_repository: CardRepository = None, shuffle_engine: ShuffleEngine = None):
         if card_repository is None:
             self._card_repository: CardRepository = CardRepository()
         else:
             self._card_repository: CardRepository = card_repository
 
+        if shuffle_engine is None:
+            self._shuffle_engine: ShuffleEngine = Deck.DEFAULT_SHUFFLE_ENGINE
+        else:
+            self._shuffle_engine: ShuffleEngine = shuffle_engine
+
     def new_deck(self, type: DeckType, id: str = None) -> Deck:
         card_type: CardType = CardType.POWER
 
         if type == DeckType.PROGRAM_DECK or type == DeckType.PROGRAM_HAND:
             card_type = CardType.PROGRAM
 
-        cards: List[Card] = self._card_repository.get_all_by_type(card_type)
+        cards: Tuple[Card, ...] = self._card_repository.get_catalog().by_type(card_type)
         deck: Deck = Deck(type, id)
         deck.fill(cards)
 
@@ -1,20 +1,34 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Optional, Dict
 
+from sqlalchemy import delete, insert, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Query, Session
 
-from common.enums import DeckType
+from common.enums import DeckType, DeckStorageFormat
 from common.repository import Repository
 from core.base_deck import BaseDeck
 from core.deck import Deck
+from core.deck_card import DeckCard
+from domain.card_catalog import CardCatalog
+from domain.card_respository import CardRepository
 from domain.models.deck_model import DeckModel
+from domain.models.packed_deck_model import PackedDeckModel
+from domain.row_reader import RowReader
 
 
 class DeckRepository(Repository[BaseDeck]):
-    def __init__(self, database: str = None):
+    @property
+    def storage_format(self) -> DeckStorageFormat:
+        return self._storage_format
+
+    def __init__(self, database: str = None, storage_format: DeckStorageFormat = DeckStorageFormat.ROWS):
         super().__init__(database)
 
+        self._storage_format: DeckStorageFormat = storage_format
+        self._card_repository: CardRepository = CardRepository(self.database)
+
     def delete(self, deck: Deck):
         self.delete_by_id(deck.id)
 
@@ -22,11 +36,31 @@ class DeckRepository(Repository[BaseDeck]):
         with self.get_session_begin() as session:
             session.query(DeckModel).filter_by(id=id).delete()
 
+    def get_card_catalog(self) -> CardCatalog:
+        return self._card_repository.get_catalog()
+
+    def is_packed(self, deck: BaseDeck) -> bool:
+        return self._storage_format == DeckStorageFormat.PACKED and PackedDeckModel.can_pack(deck)
+
+    # Deletes every packed deck of the parent, or just the one of the given type
+    @staticmethod
+    def delete_packed(parent_id: str, session: Session, deck_type: DeckType = None):
+        statement = delete(PackedDeckModel).where(PackedDeckModel.parent_id == parent_id)
+
+        if deck_type is not None:
+            statement = statement.where(PackedDeckModel.type == deck_type)
+
+        session.execute(statement)
+
     def save(self, deck: Deck, session: Session = None):
         if session is None:
             session = self.get_session_begin()
 
         with session as s:
+            if self._storage_format == DeckStorageFormat.PACKED:
+                self.save_all(deck, deck.id, s)
+                return
+
             result: Query = s.query(DeckModel).filter_by(parent_id=deck.id)
             deck_models: List[DeckModel] = DeckModel.from_deck(deck)
 
@@ -35,9 +69,81 @@ class DeckRepository(Repository[BaseDeck]):
 
             s.add_all(deck_models)
 
+    # Writes the complete deck in the configured format, replacing whatever was stored before
+    def save_all(self, deck: BaseDeck, parent_id: str, session: Session):
+        if self.is_packed(deck):
+            # Rows left over from before the switch are ignored once the packed row exists
+            if not deck.is_persisted:
+                self._delete_rows(deck, parent_id, 0, session)
+
+            self._save_packed(deck, parent_id, session)
+            return
+
+        self._delete_rows(deck, parent_id, 0, session)
+        self.delete_packed(parent_id, session, deck.deck_type)
+        self._insert_rows(deck, parent_id, 0, session)
+
+    # Only writes the rows that changed since the deck was loaded or last saved. With keep_dealt, rows
+    # above the end of the deck are left behind for a persisted top of deck cursor to ignore.
+    def save_changes(self, deck: BaseDeck, parent_id: str, session: Session, keep_dealt: bool = False):
+        if not deck.is_persisted:
+            self.save_all(deck, parent_id, session)
+            return
+
+        if self._storage_format == DeckStorageFormat.PACKED:
+            if deck.dirty_from is not None or deck.has_dirty_cards():
+                self.save_all(deck, parent_id, session)
+
+            return
+
+        dirty_from: Optional[int] = deck.dirty_from
+
+        if dirty_from is not None and keep_dealt and dirty_from >= deck.size:
+            dirty_from = deck.size
+        elif dirty_from is not None:
+            self._delete_rows(deck, parent_id, dirty_from, session)
+            self._insert_rows(deck, parent_id, dirty_from, session)
+        else:
+            dirty_from = deck.size
+
+        for i in range(0, dirty_from):
+            cur_card: DeckCard = deck.cards[i]
+
+            if isinstance(cur_card, DeckCard) and cur_card.is_dirty:
+                session.execute(update(DeckModel)
+                                .where(DeckModel.parent_id == parent_id,
+                                       DeckModel.type == deck.deck_type,
+                                       DeckModel.card_order == i)
+                                .values(card_orb=cur_card.orb, card_num_uses=cur_card.num_uses))
+
     def get_by_id_and_type(self, id: str, type: DeckType) -> Deck:
-        with self.get_session_begin() as session:
-            result: List[DeckModel] = session.query(DeckModel).filter_by(parent_id=id).order_by(
-                DeckModel.card_order).all()
+        card_catalog: CardCatalog = self.get_card_catalog()
+
+        with self.get_read_session_begin() as session:
+            return RowReader.load_deck(session, id, type, card_catalog)
+
+    @staticmethod
+    def _save_packed(deck: BaseDeck, parent_id: str, session: Session):
+        values: Dict = PackedDeckModel.values_from_deck(deck, parent_id)
+        statement = sqlite_insert(PackedDeckModel).values(values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[PackedDeckModel.parent_id, PackedDeckModel.type],
+            set_={'card_type': statement.excluded.card_type,
+                  'cards': statement.excluded.cards,
+                  'orbs': statement.excluded.orbs,
+                  'num_uses': statement.excluded.num_uses})
+
+        session.execute(statement)
+
+    @staticmethod
+    def _delete_rows(deck: BaseDeck, parent_id: str, start: int, session: Session):
+        session.execute(delete(DeckModel).where(DeckModel.parent_id == parent_id,
+                                                DeckModel.type == deck.deck_type,
+                                                DeckModel.card_order >= start))
+
+    @staticmethod
+    def _insert_rows(deck: BaseDeck, parent_id: str, start: int, session: Session):
+        values: List[Dict] = DeckModel.values_from_deck(deck, parent_id, start)
 
-            return DeckModel.to_deck(result, type, id)
+        if len(values) > 0:
+            session.execute(insert(DeckModel), values)
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from common.enums import DeckStorageFormat
+from core.game import Game
+from core.game_event import GameEvent
+from core.player import Player
+from domain.aggregate_codec import AggregateCodec
+from domain.card_catalog import CardCatalog
+from domain.game_event_repository import GameEventRepository
+from domain.game_respository import GameRepository
+from domain.models.game_snapshot_model import GameSnapshotModel
+from domain.player_projections import LoadedPlayerProjections
+from domain.player_respository import PlayerRepository
+
+
+# The repositories below keep each aggregate in a file of its own under one directory, and only use the
+# database they were given for the cards. Files are replaced whole, so a crash leaves either the old or the
+# new aggregate, but nothing is grouped into units of work and there is no guard against other workers.
+def _write_file(path: str, data: bytes):
+    temp_path: str = path + ".tmp"
+
+    with open(temp_path, "wb") as file:
+        file.write(data)
+
+    os.replace(temp_path, path)
+
+
+def _read_file(path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+
+class FilePlayerRepository(LoadedPlayerProjections, PlayerRepository):
+    def __init__(self, directory: str, database: str = None,
+                 storage_format: DeckStorageFormat = DeckStorageFormat.ROWS):
+        super().__init__(database, storage_format)
+
+        self._directory: str = os.path.join(directory, "players")
+        self._lock: threading.RLock = threading.RLock()
+        self._players: Optional[Dict[str, Player]] = None
+
+        os.makedirs(self._directory, exist_ok=True)
+
+    def delete(self, player: Player):
+        self.delete_by_id(player.id)
+
+    def delete_by_id(self, id: str):
+        with self._lock:
+            self._all().pop(id, None)
+
+            try:
+                os.remove(self._path(id))
+            except FileNotFoundError:
+                pass
+
+    def save(self, player: Player):
+        with self._lock:
+            self._all()[player.id] = player
+
+            if not player.has_changes:
+                return
+
+            _write_file(self._path(player.id), AggregateCodec.encode(AggregateCodec.values_from_player(player)))
+            player.mark_version(player.version + 1)
+            player.mark_clean()
+
+    def replace_all(self, players: List[Player]):
+        with self._lock:
+            for id in list(self._all().keys()):
+                self.delete_by_id(id)
+
+            for player in players:
+                self.save(player)
+
+    def get_by_id(self, id: str) -> Player:
+        with self._lock:
+            return self._all().get(id)
+
+    def get_all(self) -> List[Player]:
+        with self._lock:
+            return list(self._all().values())
+
+    def _all(self) -> Dict[str, Player]:
+        if self._players is None:
+            card_catalog: CardCatalog = self._deck_repository.get_card_catalog()
+            self._players = {}
+
+            for filename in os.listdir(self._directory):
+                if filename.endswith(".z"):
+                    data: bytes = _read_file(os.path.join(self._directory, filename))
+                    player: Player = AggregateCodec.to_player(AggregateCodec.decode(data), card_catalog)
+                    player.mark_clean()
+                    self._players[player.id] = player
+
+        return self._players
+
+    def _path(self, id: str) -> str:
+        return os.path.join(self._directory, "{}.z".format(id))
+
+
+class FileGameRepository(GameRepository):
+    def __init__(self, directory: str, database: str = None,
+                 storage_format: DeckStorageFormat = DeckStorageFormat.ROWS):
+        super().__init__(database, storage_format)
+
+        self._path: str = os.path.join(directory, "game.z")
+        self._lock: threading.RLock = threading.RLock()
+        self._game: Optional[Game] = None
+        self._loaded: bool = False
+
+        os.makedirs(directory, exist_ok=True)
+
+    def clear_all(self):
+        with self._lock:
+            self._game = None
+            self._loaded = True
+
+            try:
+                os.remove(self._path)
+            except FileNotFoundError:
+                pass
+
+    def delete_by_id(self, id: str):
+        with self._lock:
+            if self.get_game() is not None and self._game.id == id:
+                self.clear_all()
+
+    def save(self, game: Game):
+        with self._lock:
+            self._game = game
+            self._loaded = True
+
+            if not game.has_changes:
+                return
+
+            _write_file(self._path, AggregateCodec.encode(AggregateCodec.values_from_game(game)))
+            game.mark_version(game.version + 1)
+            game.mark_clean()
+
+    def replace(self, game: Game):
+        with self._lock:
+            self.clear_all()
+            self.save(game)
+
+    def get_game(self) -> Game:
+        with self._lock:
+            if not self._loaded:
+                data: Optional[bytes] = _read_file(self._path)
+
+                if data is not None:
+                    self._game = AggregateCodec.to_game(AggregateCodec.decode(data),
+                                                        self._deck_repository.get_card_catalog())
+                    self._game.mark_clean()
+
+                self._loaded = True
+
+            return self._game
+
+
+# Events go one JSON line each onto the end of a log file, snapshots into a file per sequence
+class FileGameEventRepository(GameEventRepository):
+    def __init__(self, directory: str, database: str = None):
+        super().__init__(database)
+
+        self._log_path: str = os.path.join(directory, "events.jsonl")
+        self._snapshot_directory: str = os.path.join(directory, "snapshots")
+        self._lock: threading.RLock = threading.RLock()
+        self._last_sequence: Optional[int] = None
+
+        os.makedirs(self._snapshot_directory, exist_ok=True)
+
+    def append(self, event: GameEvent) -> int:
+        with self._lock:
+            sequence: int = self.get_last_sequence() + 1
+            line: str = json.dumps({'sequence': sequence, 'type': event.type.value, 'payload': event.payload,
+                                    'created': event.created}, separators=(",", ":"))
+
+            with open(self._log_path, "a", encoding="utf-8") as file:
+                file.write(line + "\n")
+
+            self._last_sequence = sequence
+
+            return sequence
+
+    def get_last_sequence(self) -> int:
+        with self._lock:
+            if self._last_sequence is None:
+                events: List[GameEvent] = self.get_after(0)
+                self._last_sequence = events[-1].sequence if len(events) > 0 else 0
+
+            return self._last_sequence
+
+    def get_after(self, sequence: int) -> List[GameEvent]:
+        events: List[GameEvent] = []
+
+        with self._lock:
+            if not os.path.exists(self._log_path):
+                return events
+
+            with open(self._log_path, "r", encoding="utf-8") as file:
+                for line in file:
+                    values: Dict = json.loads(line)
+
+                    if values['sequence'] > sequence:
+                        events.append(GameEvent(values['type'], values['payload'], values['sequence'],
+                                                values['created']))
+
+        return events
+
+    def has_snapshot(self) -> bool:
+        return len(self._snapshot_sequences()) > 0
+
+    def _insert_snapshot(self, values: Dict):
+        _write_file(os.path.join(self._snapshot_directory, "{}.z".format(values['sequence'])), values['data'])
+
+    def _load_latest_snapshot(self, card_catalog: CardCatalog) -> Optional[Tuple[int, Game, List[Player]]]:
+        sequences: List[int] = self._snapshot_sequences()
+
+        if len(sequences) == 0:
+            return None
+
+        path: str = os.path.join(self._snapshot_directory, "{}.z".format(sequences[-1]))
+        snapshot: GameSnapshotModel = GameSnapshotModel(sequence=sequences[-1], data=_read_file(path))
+        game, players = snapshot.to_state(card_catalog)
+
+        return snapshot.sequence, game, players
+
+    def _snapshot_sequences(self) -> List[int]:
+        return sorted(int(x[:-2]) for x in os.listdir(self._snapshot_directory) if x.endswith(".z"))
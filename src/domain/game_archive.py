@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+import struct
+import zlib
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from common.enums import CardType, DeckType
+from core.base_deck import BaseDeck
+from core.card import Card
+from core.deck import Deck
+from core.deck_card import DeckCard
+from core.game import Game, GameProps
+from core.hand import Hand
+from core.player import Player, PlayerProps
+from core.registers import Registers
+from domain.card_catalog import CardCatalog
+
+
+# A whole game with every player in one compact binary file, for backups, moving a game to another
+# database, restore points and benchmark fixtures.
+#
+# The file is the magic number and the format version, then sections of a type byte, the payload length
+# and the zlib compressed payload, ending with an empty END section. The CARDS section comes first and
+# lists every card the game uses once; decks, hands and registers refer to cards by their position in it.
+# Sections are read one at a time, so a reader never holds more than one of them in memory.
+class GameArchive:
+    MAGIC: bytes = b"RRGA"
+    FORMAT_VERSION: int = 2
+    EXTENSION: str = ".rrga"
+
+    SECTION_END: int = 0
+    SECTION_CARDS: int = 1
+    SECTION_GAME: int = 2
+    SECTION_PLAYER: int = 3
+
+    _header = struct.Struct("<4sH")
+    _section = struct.Struct("<BI")
+    _card_types: Tuple[str, ...] = tuple(x.value for x in CardType)
+
+    @staticmethod
+    def write(stream: BinaryIO, game: Game, players: List[Player]):
+        cards: Dict[Tuple[str, int, str], int] = {}
+        card_section: _Writer = _Writer()
+
+        def ref(card: Card) -> int:
+            key: Tuple[str, int, str] = (card.type, card.number, card.filename)
+            index: Optional[int] = cards.get(key)
+
+            if index is None:
+                index = len(cards)
+                cards[key] = index
+                card_section.u8(GameArchive._card_types.index(card.type))
+                card_section.i32(card.number)
+                card_section.string(card.filename)
+
+            return index
+
+        game_section: bytes = GameArchive._game_section(game, ref)
+        player_sections: List[bytes] = [GameArchive._player_section(x, ref) for x in players]
+
+        stream.write(GameArchive._header.pack(GameArchive.MAGIC, GameArchive.FORMAT_VERSION))
+        GameArchive._write_section(stream, GameArchive.SECTION_CARDS, _Writer().u32(len(cards)).data +
+                                   card_section.data)
+        GameArchive._write_section(stream, GameArchive.SECTION_GAME, game_section)
+
+        for section in player_sections:
+            GameArchive._write_section(stream, GameArchive.SECTION_PLAYER, section)
+
+        GameArchive._write_section(stream, GameArchive.SECTION_END, b"")
+
+    # Cards are the catalog's own instances where it has them
+    @staticmethod
+    def read(stream: BinaryIO, card_catalog: CardCatalog = None) -> Tuple[Game, List[Player]]:
+        cards: List[Card] = []
+        game: Optional[Game] = None
+        players: List[Player] = []
+
+        for type, reader in GameArchive.sections(stream):
+            if type == GameArchive.SECTION_CARDS:
+                for i in range(0, reader.u32()):
+                    card_type: str = GameArchive._card_types[reader.u8()]
+                    number: int = reader.i32()
+                    filename: str = reader.string()
+
+                    if card_catalog is None:
+                        cards.append(Card(number, filename, card_type))
+                    else:
+                        cards.append(card_catalog.intern(number, filename, card_type))
+            elif type == GameArchive.SECTION_GAME:
+                game = GameArchive._read_game(reader, cards)
+            elif type == GameArchive.SECTION_PLAYER:
+                players.append(GameArchive._read_player(reader, cards))
+
+        if game is None:
+            raise ValueError("Game archive has no game")
+
+        return game, players
+
+    # Yields each section's type with a reader over its payload, up to the END section
+    @staticmethod
+    def sections(stream: BinaryIO) -> Iterator[Tuple[int, _Reader]]:
+        magic, version = GameArchive._header.unpack(GameArchive._read_exactly(stream, GameArchive._header.size))
+
+        if magic != GameArchive.MAGIC:
+            raise ValueError("Not a game archive")
+
+        if version > GameArchive.FORMAT_VERSION:
+            raise ValueError("Game archive format {} is newer than this version supports".format(version))
+
+        while True:
+            type, length = GameArchive._section.unpack(GameArchive._read_exactly(stream, GameArchive._section.size))
+
+            if type == GameArchive.SECTION_END:
+                return
+
+            yield type, _Reader(zlib.decompress(GameArchive._read_exactly(stream, length)), version)
+
+    @staticmethod
+    def _write_section(stream: BinaryIO, type: int, payload: bytes):
+        data: bytes = zlib.compress(payload) if len(payload) > 0 else b""
+        stream.write(GameArchive._section.pack(type, len(data)))
+        stream.write(data)
+
+    @staticmethod
+    def _read_exactly(stream: BinaryIO, size: int) -> bytes:
+        data: bytes = stream.read(size)
+
+        if len(data) != size:
+            raise ValueError("Game archive is truncated")
+
+        return data
+
+    @staticmethod
+    def _game_section(game: Game, ref) -> bytes:
+        writer: _Writer = _Writer()
+        writer.string(game.id).u32(game.turn).string(game.start_date).optional_string(game.notes)
+        writer.i64(game.seed).u32(game.shuffle_count)
+        GameArchive._write_cards(writer, game.program_deck, ref)
+        GameArchive._write_cards(writer, game.power_deck, ref)
+        writer.u32(len(game.board_state_filenames))
+
+        for filename in game.board_state_filenames:
+            writer.string(filename)
+
+        return writer.data
+
+    @staticmethod
+    def _read_game(reader: _Reader, cards: List[Card]) -> Game:
+        props: GameProps = GameProps()
+        props.id = reader.string()
+        props.turn = reader.u32()
+        props.start_date = reader.string()
+        props.notes = reader.optional_string()
+
+        # Version 1 archives are from before games had a seed
+        if reader.version >= 2:
+            props.seed = reader.i64()
+            props.shuffle_count = reader.u32()
+        else:
+            props.seed = 0
+
+        props.program_deck = Deck(DeckType.PROGRAM_DECK, props.id)
+        props.program_deck.populate(GameArchive._read_cards(reader, cards))
+        props.power_deck = Deck(DeckType.POWER_DECK, props.id)
+        props.power_deck.populate(GameArchive._read_cards(reader, cards))
+        props.board_state_filenames = [reader.string() for i in range(0, reader.u32())]
+
+        return Game(props)
+
+    @staticmethod
+    def _player_section(player: Player, ref) -> bytes:
+        writer: _Writer = _Writer()
+        flags: int = (1 if player.is_powered_down else 0) | (2 if player.will_be_powered_down else 0) | \
+            (4 if player.is_active else 0)
+        writer.string(player.id).string(player.name).i32(player.damage).u8(flags).string(player.avatar_filename) \
+            .optional_string(player.instructions)
+        GameArchive._write_cards(writer, player.program_hand, ref)
+        GameArchive._write_cards(writer, player.power_hand, ref)
+        writer.u32(player.registers.size)
+
+        for i in range(0, player.registers.size):
+            writer.u32(ref(player.registers.cards[i]))
+            writer.u8((1 if player.registers.locks[i] else 0) | (2 if player.registers.throws[i] else 0))
+
+        return writer.data
+
+    @staticmethod
+    def _read_player(reader: _Reader, cards: List[Card]) -> Player:
+        props: PlayerProps = PlayerProps()
+        props.id = reader.string()
+        props.name = reader.string()
+        props.damage = reader.i32()
+        flags: int = reader.u8()
+        props.powered_down = flags & 1 != 0
+        props.will_power_down = flags & 2 != 0
+        props.active = flags & 4 != 0
+        props.avatar_filename = reader.string()
+        props.instructions = reader.optional_string()
+        props.program_hand = Hand(DeckType.PROGRAM_HAND, Player.MAX_PROGRAM_HAND_SIZE, props.id)
+        props.program_hand.populate(GameArchive._read_cards(reader, cards))
+        props.power_hand = Hand(DeckType.POWER_HAND, Player.MAX_POWER_HAND_SIZE, props.id)
+        props.power_hand.populate(GameArchive._read_cards(reader, cards))
+
+        register_cards: List[Card] = []
+        locks: List[bool] = []
+        throws: List[bool] = []
+
+        for i in range(0, reader.u32()):
+            register_cards.append(cards[reader.u32()])
+            register_flags: int = reader.u8()
+            locks.append(register_flags & 1 != 0)
+            throws.append(register_flags & 2 != 0)
+
+        props.registers = Registers(props.id, register_cards, locks, throws)
+
+        return Player(props)
+
+    @staticmethod
+    def _write_cards(writer: _Writer, deck: BaseDeck, ref):
+        writer.u32(deck.size)
+
+        for card, orb, num_uses in deck.card_values():
+            writer.u32(ref(card)).u8(orb).u8(num_uses)
+
+    @staticmethod
+    def _read_cards(reader: _Reader, cards: List[Card]) -> List[DeckCard]:
+        return [DeckCard(cards[reader.u32()], orb=reader.u8(), num_uses=reader.u8()) for i in range(0, reader.u32())]
+
+
+# Little-endian fields, with strings as their UTF-8 length and bytes
+class _Writer:
+    NONE_LENGTH: int = 0xFFFFFFFF
+
+    @property
+    def data(self) -> bytes:
+        return bytes(self._data)
+
+    def __init__(self):
+        self._data: bytearray = bytearray()
+
+    def u8(self, value: int) -> _Writer:
+        self._data += struct.pack("<B", value)
+        return self
+
+    def u32(self, value: int) -> _Writer:
+        self._data += struct.pack("<I", value)
+        return self
+
+    def i32(self, value: int) -> _Writer:
+        self._data += struct.pack("<i", value)
+        return self
+
+    def i64(self, value: int) -> _Writer:
+        self._data += struct.pack("<q", value)
+        return self
+
+    def string(self, value: str) -> _Writer:
+        encoded: bytes = value.encode("utf-8")
+        self._data += struct.pack("<I", len(encoded))
+        self._data += encoded
+        return self
+
+    def optional_string(self, value: Optional[str]) -> _Writer:
+        if value is None:
+            return self.u32(self.NONE_LENGTH)
+
+        return self.string(value)
+
+
+class _Reader:
+    # Format version of the archive the payload came from
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def __init__(self, data: bytes, version: int = GameArchive.FORMAT_VERSION):
+        self._data: bytes = data
+        self._offset: int = 0
+        self._version: int = version
+
+    def u8(self) -> int:
+        return self._unpack("<B", 1)
+
+    def u32(self) -> int:
+        return self._unpack("<I", 4)
+
+    def i32(self) -> int:
+        return self._unpack("<i", 4)
+
+    def i64(self) -> int:
+        return self._unpack("<q", 8)
+
+    def string(self) -> str:
+        value: Optional[str] = self.optional_string()
+
+        return "" if value is None else value
+
+    def optional_string(self) -> Optional[str]:
+        length: int = self.u32()
+
+        if length == _Writer.NONE_LENGTH:
+            return None
+
+        value: str = self._data[self._offset:self._offset + length].decode("utf-8")
+        self._offset = self._offset + length
+
+        return value
+
+    def _unpack(self, format: str, size: int) -> int:
+        value: int = struct.unpack_from(format, self._data, self._offset)[0]
+        self._offset = self._offset + size
+
+        return value
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Optional
+
+from common.enums import CardType, DeckType, GameEventType
+from core.card import Card
+from core.card_move import CardMove
+from core.deck import Deck
+from core.deck_card import DeckCard
+from core.game import Game, GameProps
+from core.game_event import GameEvent
+from core.hand import Hand
+from core.player import Player, PlayerProps
+from domain.player_factory import PlayerFactory
+
+
+# Carries out game events on a game and its players. GameService runs every change through here before
+# logging the event, and rebuilding from the log runs the same code, so the two cannot drift apart.
+class GameEventApplier:
+    NUM_POWER_CARDS_NEW_GAME: int = 3
+
+    @property
+    def game(self) -> Optional[Game]:
+        return self._game
+
+    @property
+    def players(self) -> Dict[str, Player]:
+        return self._players
+
+    def __init__(self, game: Optional[Game], players: Dict[str, Player],
+                 card_lookup: Callable[[CardType, int], Card], discard_pile: Hand = None):
+        self._game: Optional[Game] = game
+        self._players: Dict[str, Player] = players
+        self._card_lookup: Callable[[CardType, int], Card] = card_lookup
+
+        if discard_pile is None:
+            self._discard_pile: Hand = Hand(DeckType.POWER_HAND)
+        else:
+            self._discard_pile: Hand = discard_pile
+
+        self._handlers: Dict[GameEventType, Callable[[GameEvent], List[Player]]] = {
+            GameEventType.NEW_GAME: self._new_game,
+            GameEventType.NEW_TURN: self._new_turn,
+            GameEventType.ADD_PLAYER: self._add_player,
+            GameEventType.DELETE_PLAYER: self._delete_player,
+            GameEventType.DEAL: self._deal,
+            GameEventType.DRAW_POWER_CARD: self._draw_power_card,
+            GameEventType.TRANSFER_CARD: self._transfer_card,
+            GameEventType.MOVE_CARDS: self._move_cards,
+            GameEventType.DISCARD_CARD: self._discard_card,
+            GameEventType.DISCARD_POWER_CARD: self._discard_power_card,
+            GameEventType.UPDATE_POWER_CARD: self._update_power_card,
+            GameEventType.THROW: self._throw,
+            GameEventType.LOCK_CHOICES: lambda event: self._change_player(event, Player.lock_choices),
+            GameEventType.UNLOCK_CHOICES: lambda event: self._change_player(event, Player.unlock_choices),
+            GameEventType.INC_DAMAGE: lambda event: self._change_player(event, Player.inc_damage),
+            GameEventType.DEC_DAMAGE: lambda event: self._change_player(event, Player.dec_damage),
+            GameEventType.SET_ACTIVE: self._set_active,
+            GameEventType.WILL_POWER_DOWN: lambda event: self._change_player(event, Player.will_power_down),
+            GameEventType.WILL_POWER_UP: lambda event: self._change_player(event, Player.will_power_up),
+            GameEventType.SET_INSTRUCTIONS: self._set_instructions,
+            GameEventType.ADD_BOARD_STATE: self._add_board_state,
+            GameEventType.SET_NOTES: self._set_notes}
+
+    # Returns the players the event changed
+    def apply(self, event: GameEvent) -> List[Player]:
+        if self._game is None and event.type != GameEventType.NEW_GAME:
+            raise ValueError("There is no game to apply {} to".format(event.type.value))
+
+        return self._handlers[event.type](event)
+
+    @staticmethod
+    def deck_order(deck: Deck) -> List[int]:
+        return deck.numbers()
+
+    def _player(self, id: str) -> Player:
+        player: Player = self._players.get(id)
+
+        if player is None:
+            raise ValueError("Unknown player ID {}".format(id))
+
+        return player
+
+    def _deck(self, type: DeckType, card_type: CardType, numbers: List[int], id: str) -> Deck:
+        deck: Deck = Deck(type, id)
+        deck.fill([self._card_lookup(card_type, x) for x in numbers])
+
+        return deck
+
+    def _new_game(self, event: GameEvent) -> List[Player]:
+        props: GameProps = GameProps()
+        props.id = event.get("game_id")
+        props.start_date = event.get("start_date")
+        # Games logged before games had a seed replay with the seed their row was migrated to
+        props.seed = event.payload.get("seed", 0)
+        props.shuffle_count = event.payload.get("shuffle_count", 0)
+        props.program_deck = self._deck(DeckType.PROGRAM_DECK, CardType.PROGRAM, event.get("program_deck"), props.id)
+        props.power_deck = self._deck(DeckType.POWER_DECK, CardType.POWER, event.get("power_deck"), props.id)
+        self._game = Game(props)
+
+        players: List[Player] = sorted(self._players.values(), key=lambda x: (x.name, x.id))
+
+        for player in players:
+            player.reset()
+            player.reset_program_hand(self._game.program_deck)
+            player.reset_power_hand(self._game.power_deck, self.NUM_POWER_CARDS_NEW_GAME)
+
+        return players
+
+    def _new_turn(self, event: GameEvent) -> List[Player]:
+        self._game.inc_turn()
+        self._game.count_shuffle()
+        self._game.clear_board_states()
+        self._game.program_deck = self._deck(DeckType.PROGRAM_DECK, CardType.PROGRAM, event.get("program_deck"),
+                                             self._game.program_deck.id)
+
+        players: List[Player] = sorted(self._players.values(), key=lambda x: (x.name, x.id))
+
+        for player in players:
+            player.unlock_choices()
+
+            if not player.is_active:
+                player.program_hand.clear()
+                player.registers.clear()
+            elif player.will_be_powered_down:
+                player.power_down()
+                player.will_power_up()  # Assume players normally only want to power down for one turn
+                player.reset_damage()
+                player.program_hand.clear()
+            else:
+                player.power_up()
+                player.registers.clear()
+                player.reset_program_hand(self._game.program_deck)
+
+        return players
+
+    def _add_player(self, event: GameEvent) -> List[Player]:
+        props: PlayerProps = PlayerProps()
+        props.id = event.get("player_id")
+        props.name = event.get("name")
+        props.avatar_filename = event.get("avatar_filename")
+        player: Player = PlayerFactory.new_player(props)
+        player.reset_program_hand(self._game.program_deck)
+
+        self._players[player.id] = player
+
+        return [player]
+
+    def _delete_player(self, event: GameEvent) -> List[Player]:
+        self._players.pop(event.get("player_id"), None)
+
+        return []
+
+    def _deal(self, event: GameEvent) -> List[Player]:
+        player: Player = self._player(event.get("player_id"))
+        player.reset_program_hand(self._game.program_deck)
+
+        return [player]
+
+    def _draw_power_card(self, event: GameEvent) -> List[Player]:
+        player: Player = self._player(event.get("player_id"))
+        player.draw_power_card(self._game.power_deck)
+
+        return [player]
+
+    def _transfer_card(self, event: GameEvent) -> List[Player]:
+        from_player: Player = self._player(event.get("player_id"))
+        to_player: Player = self._player(event.get("to_id"))
+
+        from_hand = from_player.get_hand_by_name(event.get("from_hand"))
+        to_hand = to_player.get_hand_by_name(event.get("to_hand"))
+        from_hand.transfer_card(event.get("from_index"), to_hand, event.get("to_index"))
+
+        return [from_player] if from_player is to_player else [from_player, to_player]
+
+    def _move_cards(self, event: GameEvent) -> List[Player]:
+        player: Player = self._player(event.get("player_id"))
+        player.move_cards([CardMove.from_values(x) for x in event.get("moves")])
+
+        return [player]
+
+    def _discard_card(self, event: GameEvent) -> List[Player]:
+        player: Player = self._player(event.get("player_id"))
+        player.get_hand_by_name(event.get("from_hand")).transfer_card(event.get("from_index"), self._discard_pile)
+
+        return [player]
+
+    def _discard_power_card(self, event: GameEvent) -> List[Player]:
+        player: Player = self._player(event.get("player_id"))
+        player.power_hand.transfer_card_by_number(event.get("number"), self._discard_pile)
+
+        return [player]
+
+    def _update_power_card(self, event: GameEvent) -> List[Player]:
+        player: Player = self._player(event.get("player_id"))
+        card: DeckCard = player.power_hand.getCardByFilename(event.get("filename"))
+
+        if event.get("orb") is not None:
+            card.orb = event.get("orb")
+
+        if event.get("num_uses") is not None:
+            card.num_uses = event.get("num_uses")
+
+        return [player]
+
+    def _throw(self, event: GameEvent) -> List[Player]:
+        player: Player = self._player(event.get("player_id"))
+        player.registers.throw(event.get("register"))
+
+        return [player]
+
+    def _change_player(self, event: GameEvent, change: Callable[[Player], None]) -> List[Player]:
+        player: Player = self._player(event.get("player_id"))
+        change(player)
+
+        return [player]
+
+    def _set_active(self, event: GameEvent) -> List[Player]:
+        player: Player = self._player(event.get("player_id"))
+        player.is_active = event.get("active")
+
+        return [player]
+
+    def _set_instructions(self, event: GameEvent) -> List[Player]:
+        player: Player = self._player(event.get("player_id"))
+        player.instructions = event.get("instructions")
+
+        return [player]
+
+    def _add_board_state(self, event: GameEvent) -> List[Player]:
+        self._game.add_board_state(event.get("filename"))
+
+        return []
+
+    def _set_notes(self, event: GameEvent) -> List[Player]:
+        self._game.notes = event.get("notes")
+
+        return []
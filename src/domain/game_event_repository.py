@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, select, func
+
+from common.repository import Repository
+from core.game import Game
+from core.game_event import GameEvent
+from core.player import Player
+from domain.card_catalog import CardCatalog
+from domain.card_respository import CardRepository
+from domain.game_event_applier import GameEventApplier
+from domain.models.game_event_model import GameEventModel
+from domain.models.game_snapshot_model import GameSnapshotModel
+
+
+# The game log and its snapshots. Neither is ever changed once written; a snapshot only saves replaying
+# everything before it.
+class GameEventRepository(Repository[GameEvent]):
+    def __init__(self, database: str = None):
+        super().__init__(database)
+
+        self._card_repository: CardRepository = CardRepository(self.database)
+        self._has_snapshot: bool = False
+
+    def get_by_id(self, id: str) -> GameEvent:
+        raise NotImplemented("Game events are looked up by sequence")
+
+    def save(self, event: GameEvent):
+        raise NotImplemented("Game events can only be appended")
+
+    def delete(self, event: GameEvent):
+        raise NotImplemented("Game events cannot be deleted")
+
+    # Returns the event's position in the log. The log holds no aggregates, so its writes leave the
+    # aggregate caches alone.
+    def append(self, event: GameEvent) -> int:
+        with self.get_session_begin(tracked=True) as session:
+            result = session.execute(insert(GameEventModel).values(GameEventModel.values_from_event(event))
+                                     .returning(GameEventModel.sequence))
+
+            return result.scalar()
+
+    def get_last_sequence(self) -> int:
+        with self.get_read_session_begin() as session:
+            return session.execute(select(func.coalesce(func.max(GameEventModel.sequence), 0))).scalar()
+
+    def get_after(self, sequence: int) -> List[GameEvent]:
+        with self.get_read_session_begin() as session:
+            result = session.query(GameEventModel).filter(GameEventModel.sequence > sequence) \
+                .order_by(GameEventModel.sequence)
+
+            return [x.to_event() for x in result]
+
+    def save_snapshot(self, sequence: int, game: Game, players: List[Player]):
+        self._insert_snapshot(GameSnapshotModel.values_from_state(sequence,
+                                                                  datetime.now().isoformat(timespec="seconds"),
+                                                                  game, players))
+
+    def _insert_snapshot(self, values: Dict):
+        with self.get_session_begin(tracked=True) as session:
+            session.execute(insert(GameSnapshotModel).values(values).prefix_with("OR REPLACE"))
+
+        self.after_commit(self._mark_has_snapshot)
+
+    # Only ever goes from no to yes, so it is remembered once seen
+    def has_snapshot(self) -> bool:
+        if not self._has_snapshot:
+            with self.get_read_session_begin() as session:
+                self._has_snapshot = session.execute(select(GameSnapshotModel.sequence).limit(1)).first() is not None
+
+        return self._has_snapshot
+
+    # The game and players as of the last logged event: the latest snapshot with everything after it
+    # replayed on top. Returns None when nothing has been logged yet.
+    def rebuild(self) -> Optional[Tuple[Game, List[Player]]]:
+        card_catalog: CardCatalog = self._card_repository.get_catalog()
+        snapshot: Optional[Tuple[int, Game, List[Player]]] = self._load_latest_snapshot(card_catalog)
+
+        if snapshot is None:
+            sequence, game, players = 0, None, []
+        else:
+            sequence, game, players = snapshot
+
+        events: List[GameEvent] = self.get_after(sequence)
+
+        if snapshot is None and len(events) == 0:
+            return None
+
+        applier: GameEventApplier = GameEventApplier(game, {x.id: x for x in players}, card_catalog.lookup)
+
+        for event in events:
+            applier.apply(event)
+
+        return applier.game, sorted(applier.players.values(), key=lambda x: x.name)
+
+    # The sequence the latest snapshot was taken at, with what it holds
+    def _load_latest_snapshot(self, card_catalog: CardCatalog) -> Optional[Tuple[int, Game, List[Player]]]:
+        with self.get_read_session_begin() as session:
+            snapshot: GameSnapshotModel = session.query(GameSnapshotModel) \
+                .order_by(GameSnapshotModel.sequence.desc()).first()
+
+            if snapshot is None:
+                return None
+
+            game, players = snapshot.to_state(card_catalog)
+
+            return snapshot.sequence, game, players
+
+    def _mark_has_snapshot(self):
+        self._has_snapshot = True
@@ -10,10 +10,12 @@ class GameFactory:
         else:
             self._deck_factory = deck_factory
 
+    # Both decks are shuffled from the game's own random stream, see Game.seed
     def new_game(self, props: GameProps):
         props.program_deck = self._deck_factory.new_deck(DeckType.PROGRAM_DECK)
-        props.program_deck.shuffle()
         props.power_deck = self._deck_factory.new_deck(DeckType.POWER_DECK)
-        props.power_deck.shuffle()
+        game: Game = Game(props)
+        game.shuffle_deck(game.program_deck, self._deck_factory.shuffle_engine)
+        game.shuffle_deck(game.power_deck, self._deck_factory.shuffle_engine)
 
-        return Game(props)
+        return game
@@ -1,55 +1,212 @@
 from __future__ import annotations
 
+from typing import Dict, List
+
 import sqlalchemy.exc
+from sqlalchemy import update, delete, insert, select
+from sqlalchemy.orm import Session
 
+from common.aggregate_cache import AggregateCache
+from common.enums import DeckStorageFormat, DeckType
 from common.repository import Repository
+from common.state_version import StateVersion
+from common.unit_of_work import ConcurrentUpdateError
+from core.deck import Deck
 from core.game import Game
+from domain.aggregate_codec import AggregateCodec
+from domain.card_catalog import CardCatalog
+from domain.deck_respository import DeckRepository
+from domain.models.board_state_model import BoardStateModel
+from domain.models.deck_model import DeckModel
 from domain.models.game_model import GameModel
+from domain.models.packed_deck_model import PackedDeckModel
+from domain.row_reader import RowReader
 
 
 class GameRepository(Repository['Game']):
 
-    def __init__(self, database: str = None):
+    def __init__(self, database: str = None, storage_format: DeckStorageFormat = DeckStorageFormat.ROWS):
         super().__init__(database)
 
+        self._deck_repository: DeckRepository = DeckRepository(self.database, storage_format)
+        self._cache: AggregateCache[Game] = AggregateCache.for_database(
+            self.database, "game", lambda x: AggregateCodec.copy_game(x, self._deck_repository.get_card_catalog()))
+
     def clear_all(self):
-        with self.get_session_begin() as session:
+        with self.get_session_begin(tracked=True) as session:
             try:
                 results = session.query(GameModel)
 
                 for result in results:
                     session.delete(result)
+                    self._deck_repository.delete_packed(result.id, session)
             except sqlalchemy.exc.NoResultFound:
                 pass
 
+        self.after_commit(self._cache.clear)
+
+    # Swaps the stored game for this one with one insert per table, at a version above any the old game had
+    def replace(self, game: Game):
+        version: int = StateVersion.current(self.database) + 1
+        values: Dict = {'id': game.id,
+                        'round': game.turn,
+                        'start_date': game.start_date,
+                        'notes': game.notes,
+                        'program_deck_top': game.program_deck.size,
+                        'power_deck_top': game.power_deck.size,
+                        'seed': game.seed,
+                        'shuffle_count': game.shuffle_count,
+                        'version': version}
+
+        with self.get_session_begin() as session:
+            session.execute(delete(BoardStateModel))
+            session.execute(delete(DeckModel).where(DeckModel.type.in_([DeckType.PROGRAM_DECK, DeckType.POWER_DECK])))
+            session.execute(delete(PackedDeckModel).where(PackedDeckModel.type.in_([DeckType.PROGRAM_DECK,
+                                                                                    DeckType.POWER_DECK])))
+            session.execute(delete(GameModel))
+            session.execute(insert(GameModel), [values])
+
+            for deck in [game.program_deck, game.power_deck]:
+                self._deck_repository.save_all(deck, game.id, session)
+
+            if len(game.board_state_filenames) > 0:
+                session.execute(insert(BoardStateModel),
+                                [{'parent_id': game.id, 'filename': filename}
+                                 for filename in game.board_state_filenames])
+
+        game.mark_version(version)
+        game.mark_clean()
+        self.after_commit(self._cache.clear)
+
     def delete(self, game: Game):
         self.delete_by_id(game.id)
 
     def delete_by_id(self, id: str):
-        with self.get_session_begin() as session:
+        with self.get_session_begin(tracked=True) as session:
             result = session.query(GameModel).filter_by(id=id).first()
 
             if result is not None:
                 session.delete(result)
 
+            self._deck_repository.delete_packed(id, session)
+
+        self.after_commit(self._cache.clear)
+
+    # Saves only if the stored game is still the version this one was loaded at
     def save(self, game: Game):
-        with self.get_session_begin() as session:
-            result: GameModel = session.query(GameModel).filter_by(id=game.id).first()
-            game_model: GameModel = GameModel.from_game(game)
+        if not game.has_changes:
+            return
 
-            if result is not None:
-                session.delete(result)
+        version: int = game.version
+
+        with self.get_session_begin(tracked=True) as session:
+            try:
+                if not game.is_persisted or not self._save_changes(game, session):
+                    self._save_all(game, session)
+            except ConcurrentUpdateError:
+                game.mark_stale()
+                self._cache.clear()
+                raise
+
+        game.mark_version(version + 1)
+        game.mark_clean()
+        self.on_rollback(lambda: game.mark_version(version))
+        self.on_rollback(game.mark_unpersisted)
+        self.on_rollback(game.mark_stale)
+        self.on_rollback(self._cache.clear)
+        # There is only ever one game, so the saved one is all there is
+        self.after_commit(lambda: self._cache.put_saved(game, StateVersion.committed(session), complete=True))
+
+    def _save_all(self, game: Game, session: Session):
+        result: GameModel = session.query(GameModel).filter_by(id=game.id).first()
+        packed: bool = self._deck_repository.storage_format == DeckStorageFormat.PACKED
+        game_model: GameModel = GameModel.from_game(game, include_decks=not packed)
+        game_model.version = game.version + 1
+
+        if result is not None:
+            if result.version != game.version:
+                raise ConcurrentUpdateError("Game {} was changed by someone else.".format(game.id))
 
-            session.add(game_model)
+            session.delete(result)
+
+        session.add(game_model)
+
+        if packed:
+            session.flush()
+            self._deck_repository.save_all(game.program_deck, game.id, session)
+            self._deck_repository.save_all(game.power_deck, game.id, session)
+        else:
+            self._deck_repository.delete_packed(game.id, session)
+
+    # Returns False if the game row is gone and the whole aggregate needs to be written
+    def _save_changes(self, game: Game, session: Session) -> bool:
+        values: Dict = {}
+
+        if "turn" in game.dirty_fields:
+            values['round'] = game.turn
+
+        if "notes" in game.dirty_fields:
+            values['notes'] = game.notes
+
+        if "shuffle_count" in game.dirty_fields:
+            values['shuffle_count'] = game.shuffle_count
+
+        # Dealing only moves the top of deck cursor, the dealt rows stay until something overwrites them.
+        # Packed decks are always written whole, so they have no use for the cursor.
+        if self._is_deck_changed(game.program_deck) and not self._deck_repository.is_packed(game.program_deck):
+            values['program_deck_top'] = game.program_deck.size
+
+        if self._is_deck_changed(game.power_deck) and not self._deck_repository.is_packed(game.power_deck):
+            values['power_deck_top'] = game.power_deck.size
+
+        values['version'] = game.version + 1
+        result = session.execute(update(GameModel)
+                                 .where(GameModel.id == game.id, GameModel.version == game.version)
+                                 .values(values))
+
+        if result.rowcount == 0:
+            if session.execute(select(GameModel.id).where(GameModel.id == game.id)).first() is not None:
+                raise ConcurrentUpdateError("Game {} was changed by someone else.".format(game.id))
+
+            return False
+
+        self._deck_repository.save_changes(game.program_deck, game.id, session, keep_dealt=True)
+        self._deck_repository.save_changes(game.power_deck, game.id, session, keep_dealt=True)
+
+        if "board_state_filenames" in game.dirty_fields:
+            session.execute(delete(BoardStateModel).where(BoardStateModel.parent_id == game.id))
+
+            if len(game.board_state_filenames) > 0:
+                session.execute(insert(BoardStateModel),
+                                [{'parent_id': game.id, 'filename': filename}
+                                 for filename in game.board_state_filenames])
+
+        return True
+
+    @staticmethod
+    def _is_deck_changed(deck: Deck) -> bool:
+        return not deck.is_persisted or deck.dirty_from is not None
 
     def get_game(self) -> Game:
-        with self.get_session_begin() as session:
-            result: GameModel = session.query(GameModel).first()
+        if self.is_reading_uncommitted():
+            return self._load_game()
+
+        version: int = self._cache.validate()
+        games: List[Game] = self._cache.get_all()
+
+        if games is None:
+            game: Game = self._load_game()
+            games = [] if game is None else [game]
+            games = self._cache.put_all(games, version)
+
+        return games[0] if len(games) > 0 else None
 
-            if result is None:
-                return None
+    # The catalog is loaded first, since loading it inside a unit of work's session would detach the model
+    def _load_game(self) -> Game:
+        card_catalog: CardCatalog = self._deck_repository.get_card_catalog()
 
-            return result.to_game()
+        with self.get_read_session_begin() as session:
+            return RowReader.load_game(session, card_catalog)
 
     def get_by_id(self, id: str) -> Game:
         return self.get_game()
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from common.enums import DeckStorageFormat
+from core.game import Game
+from core.game_event import GameEvent
+from core.player import Player
+from domain.card_catalog import CardCatalog
+from domain.game_event_repository import GameEventRepository
+from domain.game_respository import GameRepository
+from domain.models.game_snapshot_model import GameSnapshotModel
+from domain.player_projections import LoadedPlayerProjections
+from domain.player_respository import PlayerRepository
+
+
+# The repositories below keep everything in this process and only write it to the database they were
+# given when checkpoint is called. Saves are never rolled back, and other workers never see them until
+# the next checkpoint, so they are only for a single worker.
+class MemoryPlayerRepository(LoadedPlayerProjections, PlayerRepository):
+    def __init__(self, database: str = None, storage_format: DeckStorageFormat = DeckStorageFormat.ROWS,
+                 on_change: Callable[[], None] = None):
+        super().__init__(database, storage_format)
+
+        self._on_change: Callable[[], None] = on_change
+        self._lock: threading.RLock = threading.RLock()
+        self._players: Optional[Dict[str, Player]] = None
+        self._unsaved: Set[str] = set()
+        self._deleted: Set[str] = set()
+
+    def delete(self, player: Player):
+        self.delete_by_id(player.id)
+
+    def delete_by_id(self, id: str):
+        with self._lock:
+            player: Player = self._all().pop(id, None)
+            self._unsaved.discard(id)
+
+            # Players that never made it to the database have nothing to delete there
+            if player is not None and player.is_persisted:
+                self._deleted.add(id)
+
+        self._changed()
+
+    def save(self, player: Player):
+        with self._lock:
+            self._all()[player.id] = player
+
+            if player.has_changes:
+                self._unsaved.add(player.id)
+
+        self._changed()
+
+    def replace_all(self, players: List[Player]):
+        with self._lock:
+            for id in list(self._all().keys()):
+                self.delete_by_id(id)
+
+            for player in players:
+                self.save(player)
+
+    def get_by_id(self, id: str) -> Player:
+        with self._lock:
+            return self._all().get(id)
+
+    def get_all(self) -> List[Player]:
+        with self._lock:
+            return list(self._all().values())
+
+    # Writes everything changed since the last checkpoint. Joins the current unit of work, and puts the
+    # changes back if it is rolled back.
+    def checkpoint(self):
+        with self._lock:
+            deleted: Set[str] = self._deleted
+            players: List[Player] = [self._players[x] for x in self._unsaved]
+            self._deleted = set()
+            self._unsaved = set()
+
+        self.on_rollback(lambda: self._restore(deleted, players))
+
+        for id in deleted:
+            super().delete_by_id(id)
+
+        for player in players:
+            super().save(player)
+
+    def _restore(self, deleted: Set[str], players: List[Player]):
+        with self._lock:
+            self._deleted.update(deleted)
+            self._unsaved.update(x.id for x in players if x.id in self._players)
+
+    def _all(self) -> Dict[str, Player]:
+        if self._players is None:
+            self._players = {x.id: x for x in self._load_all()}
+
+        return self._players
+
+    def _changed(self):
+        if self._on_change is not None:
+            self._on_change()
+
+
+class MemoryGameRepository(GameRepository):
+    def __init__(self, database: str = None, storage_format: DeckStorageFormat = DeckStorageFormat.ROWS,
+                 on_change: Callable[[], None] = None):
+        super().__init__(database, storage_format)
+
+        self._on_change: Callable[[], None] = on_change
+        self._lock: threading.RLock = threading.RLock()
+        self._game: Optional[Game] = None
+        self._loaded: bool = False
+        self._unsaved: bool = False
+        self._cleared: bool = False
+
+    def clear_all(self):
+        with self._lock:
+            self._game = None
+            self._loaded = True
+            self._unsaved = False
+            self._cleared = True
+
+        self._changed()
+
+    def delete_by_id(self, id: str):
+        with self._lock:
+            if self.get_game() is not None and self._game.id == id:
+                self.clear_all()
+
+    def save(self, game: Game):
+        with self._lock:
+            self._game = game
+            self._loaded = True
+            self._unsaved = self._unsaved or game.has_changes
+
+        self._changed()
+
+    def replace(self, game: Game):
+        with self._lock:
+            self.clear_all()
+            self.save(game)
+
+    def get_game(self) -> Game:
+        with self._lock:
+            if not self._loaded:
+                self._game = self._load_game()
+                self._loaded = True
+
+            return self._game
+
+    def checkpoint(self):
+        with self._lock:
+            cleared: bool = self._cleared
+            game: Optional[Game] = self._game if self._unsaved else None
+            self._cleared = False
+            self._unsaved = False
+
+        self.on_rollback(lambda: self._restore(cleared, game))
+
+        if cleared:
+            super().clear_all()
+
+        if game is not None:
+            super().save(game)
+
+    def _restore(self, cleared: bool, game: Optional[Game]):
+        with self._lock:
+            self._cleared = self._cleared or cleared
+            self._unsaved = self._unsaved or (game is not None and game is self._game)
+
+    def _changed(self):
+        if self._on_change is not None:
+            self._on_change()
+
+
+class MemoryGameEventRepository(GameEventRepository):
+    def __init__(self, database: str = None, on_change: Callable[[], None] = None):
+        super().__init__(database)
+
+        self._on_change: Callable[[], None] = on_change
+        self._lock: threading.RLock = threading.RLock()
+        self._last_sequence: Optional[int] = None
+        self._events: List[GameEvent] = []
+        self._snapshots: List[Dict] = []
+
+    def append(self, event: GameEvent) -> int:
+        with self._lock:
+            self._last_sequence = self.get_last_sequence() + 1
+            self._events.append(GameEvent(event.type, event.payload, self._last_sequence, event.created))
+            sequence: int = self._last_sequence
+
+        self._changed()
+
+        return sequence
+
+    def get_last_sequence(self) -> int:
+        with self._lock:
+            if self._last_sequence is None:
+                self._last_sequence = super().get_last_sequence()
+
+            return self._last_sequence
+
+    # Whatever has not been checkpointed yet always comes after what has
+    def get_after(self, sequence: int) -> List[GameEvent]:
+        with self._lock:
+            events: List[GameEvent] = [x for x in self._events if x.sequence > sequence]
+
+            if len(self._events) > 0 and self._events[0].sequence <= sequence:
+                return events
+
+            return super().get_after(sequence) + events
+
+    def _insert_snapshot(self, values: Dict):
+        with self._lock:
+            self._snapshots.append(values)
+            self._has_snapshot = True
+
+        self._changed()
+
+    def _load_latest_snapshot(self, card_catalog: CardCatalog) -> Optional[Tuple[int, Game, List[Player]]]:
+        with self._lock:
+            if len(self._snapshots) == 0:
+                return super()._load_latest_snapshot(card_catalog)
+
+            snapshot: GameSnapshotModel = GameSnapshotModel(**self._snapshots[-1])
+
+        game, players = snapshot.to_state(card_catalog)
+
+        return snapshot.sequence, game, players
+
+    # Events and snapshots stay here until the checkpoint is committed, so reads never miss them
+    def checkpoint(self):
+        with self._lock:
+            events: List[GameEvent] = list(self._events)
+            snapshots: List[Dict] = list(self._snapshots)
+
+        for event in events:
+            super().append(event)
+
+        for values in snapshots:
+            super()._insert_snapshot(values)
+
+        self.after_commit(lambda: self._forget(len(events), len(snapshots)))
+
+    def _forget(self, num_events: int, num_snapshots: int):
+        with self._lock:
+            self._events = self._events[num_events:]
+            self._snapshots = self._snapshots[num_snapshots:]
+
+    def _changed(self):
+        if self._on_change is not None:
+            self._on_change()
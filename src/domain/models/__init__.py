@@ -3,3 +3,8 @@ import domain.models.deck_model
 import domain.models.game_model
 import domain.models.player_model
 import domain.models.registers_model
+import domain.models.packed_deck_model
+import domain.models.state_version_model
+import domain.models.card_manifest_model
+import domain.models.game_event_model
+import domain.models.game_snapshot_model
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, String, Integer
+
+from application import db
+from core.card_file import CardFile
+
+
+# What the card directories held when the card table was last refreshed from them
+class CardManifestModel(db.Model):
+    __tablename__ = "card_manifest"
+
+    filename = Column(String, nullable=False, primary_key=True)
+    type = Column(String, nullable=False, primary_key=True)
+    size = Column(Integer, nullable=False)
+    modified = Column(Integer, nullable=False)
+    number = Column(Integer, nullable=True)
+
+    def __repr__(self):
+        return self.filename
+
+    @staticmethod
+    def from_card_file(card_file: CardFile) -> CardManifestModel:
+        if card_file is None:
+            return None
+
+        return CardManifestModel(filename=card_file.filename,
+                                 type=card_file.type,
+                                 size=card_file.size,
+                                 modified=card_file.modified,
+                                 number=card_file.number)
+
+    def to_card_file(self) -> CardFile:
+        return CardFile(filename=self.filename,
+                        type=self.type,
+                        size=self.size,
+                        modified=self.modified,
+                        number=self.number)
@@ -52,6 +52,4 @@ class CardModel(db.Model):
                          type=card.type)
 
     def to_card(self) -> Card:
-        return Card(number=self.number,
-                    filename=self.filename,
-                    type=self.type)
+        return Card.hydrate(self.number, self.filename, self.type)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Dict
 
 from sqlalchemy import Column, String, Integer, ForeignKey
 
@@ -11,6 +11,7 @@ from core.card import Card
 from core.deck_card import DeckCard
 from core.deck import Deck
 from core.hand import Hand
+from domain.card_catalog import CardCatalog
 from core.deck_card import DeckCard
 
 
@@ -32,33 +33,39 @@ class DeckModel(db.Model):
 
     @staticmethod
     def from_deck(deck: BaseDeck) -> List[DeckModel]:
-        models: List[DeckModel] = []
-        for i in range(0, deck.size):
+        return [DeckModel(**values) for values in DeckModel.values_from_deck(deck, deck.id)]
+
+    @staticmethod
+    def values_from_deck(deck: BaseDeck, parent_id: str, start: int = 0) -> List[Dict]:
+        values: List[Dict] = []
+        for i in range(start, deck.size):
             cur_card: DeckCard = deck.cards[i]
 
-            if type(cur_card ) is DeckCard:
-                model: DeckModel = DeckModel(parent_id=deck.id,
-                                            type=deck.deck_type,
-                                            card_order=i,
-                                            card_num=deck.cards[i].number,
-                                            card_filename=deck.cards[i].filename,
-                                            card_type=deck.cards[i].type,
-                                            card_orb=deck.cards[i].orb,
-                                            card_num_uses=deck.cards[i].num_uses)
+            row: Dict = {'parent_id': parent_id,
+                         'type': deck.deck_type,
+                         'card_order': i,
+                         'card_num': cur_card.number,
+                         'card_filename': cur_card.filename,
+                         'card_type': cur_card.type}
+
+            if type(cur_card) is DeckCard:
+                row['card_orb'] = cur_card.orb
+                row['card_num_uses'] = cur_card.num_uses
             else:
-                model: DeckModel = DeckModel(parent_id=deck.id,
-                                            type=deck.deck_type,
-                                            card_order=i,
-                                            card_num=deck.cards[i].number,
-                                            card_filename=deck.cards[i].filename,
-                                            card_type=deck.cards[i].type)
+                row['card_orb'] = 0
+                row['card_num_uses'] = 0
 
-            models.append(model)
+            values.append(row)
 
-        return models
+        return values
 
+    # Rows at or above the top of deck cursor were already dealt and are only waiting to be overwritten
     @staticmethod
-    def to_deck(result: List[DeckModel], type: DeckType, parent_id: str) -> Deck:
+    def to_deck(result: List[DeckModel], type: DeckType, parent_id: str, top: int = None,
+                card_catalog: CardCatalog = None) -> Deck:
+        if top is not None:
+            result = [row for row in result if row.card_order < top]
+
         if len(result) == 0:
             return Deck(type, parent_id)
 
@@ -66,8 +73,8 @@ class DeckModel(db.Model):
         for row in result:
             id: str = row.parent_id
             t: str = row.type
-            card: Card = Card(row.card_num, row.card_filename, row.card_type)
-            deck_card: DeckCard = DeckCard(card, row.card_orb, row.card_num_uses)
+            card: Card = DeckModel._to_card(row, card_catalog)
+            deck_card: DeckCard = DeckCard.hydrate(card, row.card_orb, row.card_num_uses)
             cards.append(deck_card)
 
         deck: Deck = Deck(t, id)
@@ -77,7 +84,7 @@ class DeckModel(db.Model):
 
     @staticmethod
     def to_hand(result: List[DeckModel], type: DeckType, parent_id: str,
-                max_size: int = Deck.ABSOLUTE_MAX_DECK_SIZE) -> Hand:
+                max_size: int = Deck.ABSOLUTE_MAX_DECK_SIZE, card_catalog: CardCatalog = None) -> Hand:
         if len(result) == 0:
             return Hand(type, id=parent_id)
 
@@ -85,11 +92,18 @@ class DeckModel(db.Model):
         for row in result:
             id: str = row.parent_id
             type: str = row.type
-            card: Card = Card(row.card_num, row.card_filename, row.card_type)
-            deck_card: DeckCard = DeckCard(card, orb=row.card_orb, num_uses=row.card_num_uses)
+            card: Card = DeckModel._to_card(row, card_catalog)
+            deck_card: DeckCard = DeckCard.hydrate(card, row.card_orb, row.card_num_uses)
             cards.append(deck_card)
 
         hand: Hand = Hand(type, max_size, id)
         hand.populate(cards)
 
         return hand
+
+    @staticmethod
+    def _to_card(row: DeckModel, card_catalog: CardCatalog) -> Card:
+        if card_catalog is None:
+            return Card.hydrate(row.card_num, row.card_filename, row.card_type)
+
+        return card_catalog.intern(row.card_num, row.card_filename, row.card_type)
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import json
+
+from sqlalchemy import Column, String, Integer, Text
+
+from application import db
+from core.game_event import GameEvent
+
+
+# Append only log of everything done to the game, see domain.game_event_applier
+class GameEventModel(db.Model):
+    __tablename__ = "game_event"
+
+    sequence = Column('sequence', Integer, nullable=False, primary_key=True, autoincrement=True)
+    type = Column('type', String, nullable=False)
+    payload = Column('payload', Text, nullable=False)
+    created = Column('created', String, nullable=False)
+
+    def __repr__(self):
+        return "{} {}".format(self.sequence, self.type)
+
+    @staticmethod
+    def values_from_event(event: GameEvent) -> dict:
+        values: dict = {'type': event.type.value,
+                        'payload': json.dumps(event.payload, separators=(",", ":")),
+                        'created': event.created}
+
+        # Events copied from another store keep their place in the log
+        if event.sequence is not None:
+            values['sequence'] = event.sequence
+
+        return values
+
+    def to_event(self) -> GameEvent:
+        return GameEvent(self.type, json.loads(self.payload), self.sequence, self.created)
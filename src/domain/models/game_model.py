@@ -5,9 +5,12 @@ from sqlalchemy.orm import relationship
 
 from application import db
 from common.enums import DeckType
+from core.deck import Deck
 from core.game import Game, GameProps
+from domain.card_catalog import CardCatalog
 from domain.models.board_state_model import BoardStateModel
 from domain.models.deck_model import DeckModel
+from domain.models.packed_deck_model import PackedDeckModel
 
 
 class GameModel(db.Model):
@@ -17,43 +20,79 @@ class GameModel(db.Model):
     round = Column('round', Integer, nullable=False)
     start_date = Column('start_date', String, nullable=False)
     notes = Column('notes', String, nullable=True)
+    program_deck_top = Column('program_deck_top', Integer, nullable=True)
+    power_deck_top = Column('power_deck_top', Integer, nullable=True)
+    seed = Column('seed', Integer, nullable=False, default=0)
+    shuffle_count = Column('shuffle_count', Integer, nullable=False, default=0)
+    version = Column('version', Integer, nullable=False, default=0)
 
     program_deck = relationship("DeckModel",
                                 primaryjoin="and_(GameModel.id == DeckModel.parent_id,DeckModel.type == 'program_deck')",
+                                order_by="DeckModel.card_order",
                                 cascade="all, delete, delete-orphan",
                                 overlaps="power_deck, program_hand, power_hand")
     power_deck = relationship("DeckModel",
                               primaryjoin="and_(GameModel.id == DeckModel.parent_id,DeckModel.type == 'power_deck')",
+                              order_by="DeckModel.card_order",
                               cascade="all, delete, delete-orphan",
                               overlaps="program_deck, program_hand, power_hand")
     board_state_filenames = relationship("BoardStateModel",
                                          primaryjoin="GameModel.id == BoardStateModel.parent_id",
                                          cascade="all, delete, delete-orphan")
+    packed_decks = relationship("PackedDeckModel",
+                                primaryjoin="GameModel.id == PackedDeckModel.parent_id",
+                                foreign_keys="PackedDeckModel.parent_id",
+                                viewonly=True)
 
     def __repr__(self):
         return self.filename
 
     @staticmethod
-    def from_game(game: Game) -> GameModel:
+    def from_game(game: Game, include_decks: bool = True) -> GameModel:
         model: GameModel = GameModel(id=game.id,
                                      round=game.turn,
                                      start_date=game.start_date,
-                                     program_deck=DeckModel.from_deck(game.program_deck),
-                                     power_deck=DeckModel.from_deck(game.power_deck),
                                      board_state_filenames=BoardStateModel.from_board_state_filenames(
                                          game.board_state_filenames, game.id),
-                                     notes=game.notes)
+                                     notes=game.notes,
+                                     program_deck_top=game.program_deck.size,
+                                     power_deck_top=game.power_deck.size,
+                                     seed=game.seed,
+                                     shuffle_count=game.shuffle_count,
+                                     version=game.version)
+
+        if include_decks:
+            model.program_deck = DeckModel.from_deck(game.program_deck)
+            model.power_deck = DeckModel.from_deck(game.power_deck)
+
         return model
 
-    def to_game(self) -> Game:
+    def to_game(self, card_catalog: CardCatalog = None) -> Game:
         props: GameProps = GameProps()
         props.id = self.id
         props.turn = self.round
         props.start_date = self.start_date
-        props.program_deck = DeckModel.to_deck(self.program_deck, DeckType.PROGRAM_DECK, self.id)
-        props.power_deck = DeckModel.to_deck(self.power_deck, DeckType.POWER_DECK, self.id)
+        props.program_deck = self._to_deck(DeckType.PROGRAM_DECK, card_catalog)
+        props.power_deck = self._to_deck(DeckType.POWER_DECK, card_catalog)
         props.board_state_filenames = BoardStateModel.to_board_state_filenames(self.board_state_filenames)
         props.notes = self.notes
+        props.seed = self.seed
+        props.shuffle_count = self.shuffle_count
 
         game: Game = Game(props)
+        game.mark_version(self.version)
+        game.mark_clean()
+
         return game
+
+    # Decks saved in the packed format win over any card rows left from before the switch
+    def _to_deck(self, type: DeckType, card_catalog: CardCatalog) -> Deck:
+        if card_catalog is not None:
+            for packed in self.packed_decks:
+                if packed.type == type:
+                    return packed.to_deck(card_catalog.lookup)
+
+        if type == DeckType.PROGRAM_DECK:
+            return DeckModel.to_deck(self.program_deck, type, self.id, self.program_deck_top, card_catalog)
+
+        return DeckModel.to_deck(self.power_deck, type, self.id, self.power_deck_top, card_catalog)
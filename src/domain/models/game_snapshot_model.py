@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from typing import List, Tuple, Dict
+
+from sqlalchemy import Column, String, Integer, LargeBinary
+
+from application import db
+from core.game import Game
+from core.player import Player
+from domain.aggregate_codec import AggregateCodec
+from domain.card_catalog import CardCatalog
+
+
+# The whole game and every player as of one position in the game log, compressed
+class GameSnapshotModel(db.Model):
+    __tablename__ = "game_snapshot"
+
+    sequence = Column('sequence', Integer, nullable=False, primary_key=True, autoincrement=False)
+    created = Column('created', String, nullable=False)
+    data = Column('data', LargeBinary, nullable=False)
+
+    def __repr__(self):
+        return "{}".format(self.sequence)
+
+    @staticmethod
+    def values_from_state(sequence: int, created: str, game: Game, players: List[Player]) -> Dict:
+        state: Dict = {'game': None if game is None else AggregateCodec.values_from_game(game),
+                       'players': [AggregateCodec.values_from_player(x) for x in players]}
+
+        return {'sequence': sequence,
+                'created': created,
+                'data': AggregateCodec.encode(state)}
+
+    def to_state(self, card_catalog: CardCatalog) -> Tuple[Game, List[Player]]:
+        state: Dict = AggregateCodec.decode(self.data)
+        game: Game = None
+
+        if state['game'] is not None:
+            game = AggregateCodec.to_game(state['game'], card_catalog)
+
+        return game, [AggregateCodec.to_player(x, card_catalog) for x in state['players']]
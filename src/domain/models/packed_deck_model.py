@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import sys
+from array import array
+from typing import List, Dict, Callable, Tuple
+
+from sqlalchemy import Column, String, ForeignKey, LargeBinary
+
+from application import db
+from common.enums import DeckType, CardType
+from core.base_deck import BaseDeck
+from core.card import Card
+from core.deck import Deck
+from core.deck_card import DeckCard
+from core.hand import Hand
+
+
+# A whole deck or hand in one row. Cards are stored as their catalog numbers (unique within a card
+# type) in a little-endian int16 array, with parallel byte arrays for each card's orb and uses.
+class PackedDeckModel(db.Model):
+    __tablename__ = "packed_deck"
+
+    NUMBER_TYPECODE: str = "h"
+    NUMBER_MIN: int = -32768
+    NUMBER_MAX: int = 32767
+    SMALL_TYPECODE: str = "B"
+
+    parent_id = Column('parent_id', String, ForeignKey("player.id"), ForeignKey("game.id"), nullable=False,
+                       primary_key=True)
+    type = Column('type', String, nullable=False, primary_key=True)
+    card_type = Column('card_type', String, nullable=False)
+    cards = Column('cards', LargeBinary, nullable=False)
+    orbs = Column('orbs', LargeBinary, nullable=False)
+    num_uses = Column('num_uses', LargeBinary, nullable=False)
+
+    def __repr__(self):
+        return "{} {}".format(self.parent_id, self.type)
+
+    # Cards of mixed types or without a catalog number that fits cannot be packed
+    @staticmethod
+    def can_pack(deck: BaseDeck) -> bool:
+        card_type: CardType = PackedDeckModel._card_type(deck)
+
+        for card, orb, num_uses in deck.card_values():
+            if card.type != card_type:
+                return False
+
+            if card.number < PackedDeckModel.NUMBER_MIN or card.number > PackedDeckModel.NUMBER_MAX:
+                return False
+
+        return True
+
+    @staticmethod
+    def values_from_deck(deck: BaseDeck, parent_id: str) -> Dict:
+        card_values: List[Tuple[Card, int, int]] = deck.card_values()
+        numbers: array = array(PackedDeckModel.NUMBER_TYPECODE, [x[0].number for x in card_values])
+        orbs: array = array(PackedDeckModel.SMALL_TYPECODE, [x[1] for x in card_values])
+        num_uses: array = array(PackedDeckModel.SMALL_TYPECODE, [x[2] for x in card_values])
+
+        if sys.byteorder == "big":
+            numbers.byteswap()
+
+        return {'parent_id': parent_id,
+                'type': deck.deck_type,
+                'card_type': PackedDeckModel._card_type(deck, card_values),
+                'cards': numbers.tobytes(),
+                'orbs': orbs.tobytes(),
+                'num_uses': num_uses.tobytes()}
+
+    def to_cards(self, card_lookup: Callable[[CardType, int], Card]) -> List[DeckCard]:
+        return PackedDeckModel.cards_from_values(self.card_type, self.cards, self.orbs, self.num_uses, card_lookup)
+
+    # Decks keep the stored values as they are, so no DeckCards are made while loading one
+    @staticmethod
+    def deck_from_values(type: DeckType, parent_id: str, card_type: CardType, cards: bytes, orbs: bytes,
+                         num_uses: bytes, card_lookup: Callable[[CardType, int], Card]) -> Deck:
+        deck: Deck = Deck(type, parent_id)
+        deck.populate_values([card_lookup(card_type, x) for x in PackedDeckModel._numbers(cards)], orbs, num_uses)
+
+        return deck
+
+    @staticmethod
+    def cards_from_values(card_type: CardType, cards: bytes, orbs: bytes, num_uses: bytes,
+                          card_lookup: Callable[[CardType, int], Card]) -> List[DeckCard]:
+        numbers: array = PackedDeckModel._numbers(cards)
+
+        return [DeckCard.hydrate(card_lookup(card_type, numbers[i]), orbs[i], num_uses[i])
+                for i in range(0, len(numbers))]
+
+    def to_deck(self, card_lookup: Callable[[CardType, int], Card]) -> Deck:
+        return PackedDeckModel.deck_from_values(self.type, self.parent_id, self.card_type, self.cards, self.orbs,
+                                                self.num_uses, card_lookup)
+
+    def to_hand(self, card_lookup: Callable[[CardType, int], Card], max_size: int = Deck.ABSOLUTE_MAX_DECK_SIZE) -> Hand:
+        hand: Hand = Hand(self.type, max_size, self.parent_id)
+        hand.populate(self.to_cards(card_lookup))
+
+        return hand
+
+    @staticmethod
+    def _card_type(deck: BaseDeck, card_values: List[Tuple[Card, int, int]] = None) -> CardType:
+        if card_values is None:
+            card_values = deck.card_values()
+
+        if len(card_values) > 0:
+            return card_values[0][0].type
+
+        if deck.deck_type == DeckType.PROGRAM_DECK or deck.deck_type == DeckType.PROGRAM_HAND:
+            return CardType.PROGRAM
+
+        return CardType.POWER
+
+    @staticmethod
+    def _numbers(cards: bytes) -> array:
+        numbers: array = array(PackedDeckModel.NUMBER_TYPECODE)
+        numbers.frombytes(cards)
+
+        if sys.byteorder == "big":
+            numbers.byteswap()
+
+        return numbers
@@ -1,18 +1,25 @@
 from __future__ import annotations
 
+from typing import Dict, Iterable, Tuple
+
 from sqlalchemy import Column, String, Integer, Boolean
 from sqlalchemy.orm import relationship
 
 from application import db
 from common.enums import DeckType
 from core.player import Player, PlayerProps
+from domain.card_catalog import CardCatalog
 from domain.models.deck_model import DeckModel
+from domain.models.packed_deck_model import PackedDeckModel
 from domain.models.registers_model import RegistersModel
 
 
 class PlayerModel(db.Model):
     __tablename__ = "player"
 
+    FIELDS: Tuple[str, ...] = ("id", "name", "damage", "active", "powered_down", "will_power_down", "avatar_filename",
+                               "instructions")
+
     id = Column('id', String, nullable=False, primary_key=True)
     name = Column('name', String, nullable=False)
     damage = Column('damage', Integer, nullable=False)
@@ -21,24 +28,32 @@ class PlayerModel(db.Model):
     avatar_filename = Column('avatar_filename', String, nullable=False)
     instructions = Column('instructions', String)
     active = Column('active', Boolean, nullable=False, default=1)
+    version = Column('version', Integer, nullable=False, default=0)
 
     program_hand = relationship("DeckModel",
                                 primaryjoin="and_(PlayerModel.id == DeckModel.parent_id, DeckModel.type == 'program_hand')",
+                                order_by="DeckModel.card_order",
                                 cascade="all, delete, delete-orphan",
                                 overlaps="power_hand, power_deck, program_deck")
     power_hand = relationship("DeckModel",
                               primaryjoin="and_(PlayerModel.id == DeckModel.parent_id, DeckModel.type == 'power_hand')",
+                              order_by="DeckModel.card_order",
                               cascade="all, delete, delete-orphan",
                               overlaps="program_hand, power_deck, program_deck")
     registers = relationship("RegistersModel",
                              primaryjoin="PlayerModel.id == RegistersModel.parent_id",
+                             order_by="RegistersModel.register_num",
                              cascade="all, delete, delete-orphan")
+    packed_decks = relationship("PackedDeckModel",
+                                primaryjoin="PlayerModel.id == PackedDeckModel.parent_id",
+                                foreign_keys="PackedDeckModel.parent_id",
+                                viewonly=True)
 
     def __repr__(self):
         return self.filename
 
     @staticmethod
-    def from_player(player: Player) -> PlayerModel:
+    def from_player(player: Player, include_hands: bool = True) -> PlayerModel:
         model: PlayerModel = PlayerModel(id=player.id,
                                          name=player.name,
                                          damage=player.damage,
@@ -47,13 +62,29 @@ class PlayerModel(db.Model):
                                          will_power_down=player.will_be_powered_down,
                                          avatar_filename=player.avatar_filename,
                                          instructions=player.instructions,
-                                         program_hand=DeckModel.from_deck(player.program_hand),
-                                         power_hand=DeckModel.from_deck(player.power_hand),
+                                         version=player.version,
                                          registers=RegistersModel.from_registers(player.registers))
 
+        if include_hands:
+            model.program_hand = DeckModel.from_deck(player.program_hand)
+            model.power_hand = DeckModel.from_deck(player.power_hand)
+
         return model
 
-    def to_player(self) -> Player:
+    @staticmethod
+    def values_from_player(player: Player, fields: Iterable[str]) -> Dict:
+        values: Dict = {'id': player.id,
+                        'name': player.name,
+                        'damage': player.damage,
+                        'active': player.is_active,
+                        'powered_down': player.is_powered_down,
+                        'will_power_down': player.will_be_powered_down,
+                        'avatar_filename': player.avatar_filename,
+                        'instructions': player.instructions}
+
+        return {field: values[field] for field in fields}
+
+    def to_player(self, card_catalog: CardCatalog = None) -> Player:
         props: PlayerProps = PlayerProps()
 
         props.id = self.id
@@ -64,11 +95,23 @@ class PlayerModel(db.Model):
         props.will_power_down = self.will_power_down
         props.name = self.name
         props.active = self.active
-        props.program_hand = DeckModel.to_hand(self.program_hand, DeckType.PROGRAM_HAND, self.id,
-                                               Player.MAX_PROGRAM_HAND_SIZE)
-        props.power_hand = DeckModel.to_hand(self.power_hand, DeckType.POWER_HAND, self.id,
-                                             Player.MAX_POWER_HAND_SIZE)
-        props.registers = RegistersModel.to_registers(self.registers, self.id)
+        props.program_hand = self._to_hand(DeckType.PROGRAM_HAND, Player.MAX_PROGRAM_HAND_SIZE, card_catalog)
+        props.power_hand = self._to_hand(DeckType.POWER_HAND, Player.MAX_POWER_HAND_SIZE, card_catalog)
+        props.registers = RegistersModel.to_registers(self.registers, self.id, card_catalog)
 
         player: Player = Player(props)
+        player.mark_version(self.version)
+        player.mark_clean()
+
         return player
+
+    # Hands saved in the packed format win over any card rows left from before the switch
+    def _to_hand(self, type: DeckType, max_size: int, card_catalog: CardCatalog):
+        if card_catalog is not None:
+            for packed in self.packed_decks:
+                if packed.type == type:
+                    return packed.to_hand(card_catalog.lookup, max_size)
+
+        rows = self.program_hand if type == DeckType.PROGRAM_HAND else self.power_hand
+
+        return DeckModel.to_hand(rows, type, self.id, max_size, card_catalog)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Dict
 
 from sqlalchemy import Column, String, Integer, ForeignKey, Boolean
 
@@ -8,6 +8,7 @@ from application import db
 from common.enums import CardType
 from core.card import Card
 from core.registers import Registers
+from domain.card_catalog import CardCatalog
 
 
 class RegistersModel(db.Model):
@@ -25,20 +26,20 @@ class RegistersModel(db.Model):
 
     @staticmethod
     def from_registers(registers: Registers) -> List[RegistersModel]:
-        models: List[RegistersModel] = []
-        for i in range(0, registers.size):
-            model: RegistersModel = RegistersModel(parent_id=registers.id,
-                                                   register_num=i,
-                                                   card_num=registers.cards[i].number,
-                                                   card_filename=registers.cards[i].filename,
-                                                   locked=registers.locks[i],
-                                                   throw=registers.throws[i])
-            models.append(model)
-
-        return models
+        return [RegistersModel(**RegistersModel.values_from_register(registers, registers.id, i))
+                for i in range(0, registers.size)]
 
     @staticmethod
-    def to_registers(result: List[RegistersModel], parent_id: str) -> Registers:
+    def values_from_register(registers: Registers, parent_id: str, index: int) -> Dict:
+        return {'parent_id': parent_id,
+                'register_num': index,
+                'card_num': registers.cards[index].number,
+                'card_filename': registers.cards[index].filename,
+                'locked': registers.locks[index],
+                'throw': registers.throws[index]}
+
+    @staticmethod
+    def to_registers(result: List[RegistersModel], parent_id: str, card_catalog: CardCatalog = None) -> Registers:
         if len(result) == 0:
             return Registers(parent_id)
 
@@ -47,7 +48,10 @@ class RegistersModel(db.Model):
         throws: List[Boolean] = []
         for row in result:
             id: str = row.parent_id
-            card: Card = Card(row.card_num, row.card_filename, CardType.PROGRAM)
+            if card_catalog is None:
+                card: Card = Card.hydrate(row.card_num, row.card_filename, CardType.PROGRAM)
+            else:
+                card: Card = card_catalog.intern(row.card_num, row.card_filename, CardType.PROGRAM)
             cards.append(card)
             locks.append(row.locked)
             throws.append(row.throw)
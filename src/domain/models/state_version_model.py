@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, Integer
+
+from application import db
+
+
+# Single row counter bumped by every committed write, see common.state_version
+class StateVersionModel(db.Model):
+    __tablename__ = "state_version"
+
+    id = Column('id', Integer, nullable=False, primary_key=True)
+    version = Column('version', Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return "{}".format(self.version)
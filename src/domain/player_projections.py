@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from typing import List
+
+from core.card import Card
+from core.player import Player
+
+
+# Read-only view of a player for pages that list players, read without loading their hands and registers
+class PlayerSummary:
+    @property
+    def id(self) -> str:
+        return self._id
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def damage(self) -> int:
+        return self._damage
+
+    @property
+    def avatar_filename(self) -> str:
+        return self._avatar_filename
+
+    @property
+    def is_active(self) -> bool:
+        return self._active
+
+    @property
+    def is_powered_down(self) -> bool:
+        return self._powered_down
+
+    @property
+    def will_be_powered_down(self) -> bool:
+        return self._will_power_down
+
+    def __init__(self, id: str, name: str, damage: int, avatar_filename: str, active: bool, powered_down: bool,
+                 will_power_down: bool):
+        self._id: str = id
+        self._name: str = name
+        self._damage: int = damage
+        self._avatar_filename: str = avatar_filename
+        self._active: bool = active
+        self._powered_down: bool = powered_down
+        self._will_power_down: bool = will_power_down
+
+    @staticmethod
+    def from_player(player: Player) -> PlayerSummary:
+        return PlayerSummary(player.id, player.name, player.damage, player.avatar_filename, player.is_active,
+                             player.is_powered_down, player.will_be_powered_down)
+
+
+# One player's card in one register, as shown while the turn is played. Registers are numbered from 1.
+class TurnRegisterInfo:
+    def __init__(self, id: str, name: str, damage: int, instructions: str, is_powered_down: bool, card_num: int,
+                 card_filename: str, throw: bool):
+        self.name = name
+        self.id = id
+        self.damage = damage
+        self.throw = throw
+        self.instructions = instructions
+        self.card_num = card_num
+        self.card_filename = card_filename
+        self.is_powered_down = is_powered_down
+
+        if self.is_powered_down:
+            self.card_num = Card.NUMBER_POWER_DOWN
+
+    @staticmethod
+    def from_player(player: Player, register: int) -> TurnRegisterInfo:
+        return TurnRegisterInfo(player.id, player.name, player.damage, player.instructions, player.is_powered_down,
+                                player.registers.cards[register - 1].number,
+                                player.registers.cards[register - 1].filename,
+                                player.registers.throws[register - 1])
+
+
+# Projections for player repositories that keep every player in the process, where reading them from the
+# loaded players costs less than going to the database
+class LoadedPlayerProjections:
+    def get_summaries(self) -> List[PlayerSummary]:
+        return [PlayerSummary.from_player(x) for x in sorted(self.get_all(), key=lambda x: x.name)]
+
+    def get_register_infos(self, register: int) -> List[TurnRegisterInfo]:
+        infos: List[TurnRegisterInfo] = [TurnRegisterInfo.from_player(x, register)
+                                         for x in sorted(self.get_all(), key=lambda x: x.name) if x.is_active]
+        infos.sort(key=lambda x: x.card_num, reverse=True)
+
+        return infos
+
+    def count(self) -> int:
+        return len(self.get_all())
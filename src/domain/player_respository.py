@@ -1,51 +1,225 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Dict
 
+from sqlalchemy import update, delete, insert, select
+from sqlalchemy.orm import Session
+
+from common.aggregate_cache import AggregateCache
+from common.enums import DeckStorageFormat, DeckType
 from common.repository import Repository
+from common.state_version import StateVersion
+from common.unit_of_work import ConcurrentUpdateError
 from core.player import Player
+from core.registers import Registers
+from domain.aggregate_codec import AggregateCodec
+from domain.card_catalog import CardCatalog
+from domain.deck_respository import DeckRepository
+from domain.models.deck_model import DeckModel
+from domain.models.packed_deck_model import PackedDeckModel
 from domain.models.player_model import PlayerModel
+from domain.models.registers_model import RegistersModel
+from domain.player_projections import PlayerSummary, TurnRegisterInfo
+from domain.row_reader import RowReader
 
 
 class PlayerRepository(Repository['Player']):
-    def __init__(self, database: str = None):
+    def __init__(self, database: str = None, storage_format: DeckStorageFormat = DeckStorageFormat.ROWS):
         super().__init__(database)
 
+        self._deck_repository: DeckRepository = DeckRepository(self.database, storage_format)
+        self._cache: AggregateCache[Player] = AggregateCache.for_database(
+            self.database, "player", lambda x: AggregateCodec.copy_player(x, self._deck_repository.get_card_catalog()))
+
     def delete(self, player: Player):
         self.delete_by_id(player.id)
 
     def delete_by_id(self, id: str):
-        with self.get_session_begin() as session:
+        with self.get_session_begin(tracked=True) as session:
             result = session.query(PlayerModel).filter_by(id=id).one()
             session.delete(result)
+            self._deck_repository.delete_packed(id, session)
 
+        self.after_commit(lambda: self._cache.evict(id))
+
+    # Saves only if the stored player is still the version this one was loaded at
     def save(self, player: Player):
+        if not player.has_changes:
+            return
+
+        version: int = player.version
+
+        with self.get_session_begin(tracked=True) as session:
+            try:
+                if not player.is_persisted or not self._save_changes(player, session):
+                    self._save_all(player, session)
+            except ConcurrentUpdateError:
+                player.mark_stale()
+                self._cache.evict(player.id)
+                raise
+
+        player.mark_version(version + 1)
+        player.mark_clean()
+        self.on_rollback(lambda: player.mark_version(version))
+        self.on_rollback(player.mark_unpersisted)
+        self.on_rollback(player.mark_stale)
+        self.on_rollback(lambda: self._cache.evict(player.id))
+        self.after_commit(lambda: self._cache.put_saved(player, StateVersion.committed(session)))
+
+    # Swaps every stored player for these, with one insert per table. The players get a version above any
+    # a player could have had before, so copies loaded from the old rows can no longer be saved.
+    def replace_all(self, players: List[Player]):
+        version: int = StateVersion.current(self.database) + 1
+
         with self.get_session_begin() as session:
-            result: PlayerModel = session.query(PlayerModel).filter_by(id=player.id).first()
-            player_model: PlayerModel = PlayerModel.from_player(player)
+            session.execute(delete(RegistersModel))
+            session.execute(delete(DeckModel).where(DeckModel.type.in_([DeckType.PROGRAM_HAND, DeckType.POWER_HAND])))
+            session.execute(delete(PackedDeckModel).where(PackedDeckModel.type.in_([DeckType.PROGRAM_HAND,
+                                                                                    DeckType.POWER_HAND])))
+            session.execute(delete(PlayerModel))
+
+            if len(players) == 0:
+                return
+
+            player_values: List[Dict] = []
+            register_values: List[Dict] = []
+            deck_values: List[Dict] = []
+            packed_values: List[Dict] = []
+
+            for player in players:
+                values: Dict = PlayerModel.values_from_player(player, PlayerModel.FIELDS)
+                values['version'] = version
+                player_values.append(values)
+                register_values.extend(RegistersModel.values_from_register(player.registers, player.id, i)
+                                       for i in range(0, player.registers.size))
+
+                for hand in [player.program_hand, player.power_hand]:
+                    if self._deck_repository.is_packed(hand):
+                        packed_values.append(PackedDeckModel.values_from_deck(hand, player.id))
+                    else:
+                        deck_values.extend(DeckModel.values_from_deck(hand, player.id))
+
+            for model, values in [(PlayerModel, player_values), (RegistersModel, register_values),
+                                  (DeckModel, deck_values), (PackedDeckModel, packed_values)]:
+                if len(values) > 0:
+                    session.execute(insert(model), values)
+
+        for player in players:
+            player.mark_version(version)
+            player.mark_clean()
+
+        self.after_commit(self._cache.clear)
+
+    def _save_all(self, player: Player, session: Session):
+        result: PlayerModel = session.query(PlayerModel).filter_by(id=player.id).first()
+        packed: bool = self._deck_repository.storage_format == DeckStorageFormat.PACKED
+        player_model: PlayerModel = PlayerModel.from_player(player, include_hands=not packed)
+        player_model.version = player.version + 1
+
+        if result is not None:
+            if result.version != player.version:
+                raise ConcurrentUpdateError("Player {} was changed by someone else.".format(player.id))
 
-            if result is not None:
-                session.delete(result)
+            session.delete(result)
 
-            session.add(player_model)
+        session.add(player_model)
+
+        if packed:
+            session.flush()
+            self._deck_repository.save_all(player.program_hand, player.id, session)
+            self._deck_repository.save_all(player.power_hand, player.id, session)
+        else:
+            self._deck_repository.delete_packed(player.id, session)
+
+    # Returns False if the player row is gone and the whole aggregate needs to be written
+    def _save_changes(self, player: Player, session: Session) -> bool:
+        values: Dict = PlayerModel.values_from_player(player, player.dirty_fields)
+        values['version'] = player.version + 1
+        result = session.execute(update(PlayerModel)
+                                 .where(PlayerModel.id == player.id, PlayerModel.version == player.version)
+                                 .values(values))
+
+        if result.rowcount == 0:
+            if session.execute(select(PlayerModel.id).where(PlayerModel.id == player.id)).first() is not None:
+                raise ConcurrentUpdateError("Player {} was changed by someone else.".format(player.id))
+
+            return False
+
+        self._deck_repository.save_changes(player.program_hand, player.id, session)
+        self._deck_repository.save_changes(player.power_hand, player.id, session)
+        self._save_register_changes(player.registers, player.id, session)
+
+        return True
+
+    def _save_register_changes(self, registers: Registers, parent_id: str, session: Session):
+        if not registers.is_persisted:
+            session.execute(delete(RegistersModel).where(RegistersModel.parent_id == parent_id))
+            session.execute(insert(RegistersModel),
+                            [RegistersModel.values_from_register(registers, parent_id, i)
+                             for i in range(0, registers.size)])
+            return
+
+        for i in sorted(registers.dirty_registers):
+            values: Dict = RegistersModel.values_from_register(registers, parent_id, i)
+            result = session.execute(update(RegistersModel)
+                                     .where(RegistersModel.parent_id == parent_id,
+                                            RegistersModel.register_num == i)
+                                     .values(values))
+
+            if result.rowcount == 0:
+                session.execute(insert(RegistersModel), [values])
 
     def get_by_id(self, id: str) -> Player:
-        with self.get_session_begin() as session:
-            result: PlayerModel = session.query(PlayerModel).filter_by(id=id).first()
+        if self.is_reading_uncommitted():
+            return self._load_by_id(id)
+
+        version: int = self._cache.validate()
+        player: Player = self._cache.get(id)
+
+        if player is None:
+            player = self._load_by_id(id)
 
-            if result is None:
-                return None
+            if player is not None:
+                player = self._cache.put(player, version)
 
-            return result.to_player()
+        return player
 
     def get_all(self) -> List[Player]:
-        players: List[Player] = []
+        if self.is_reading_uncommitted():
+            return self._load_all()
 
-        with self.get_session_begin() as session:
-            result: List[PlayerModel] = session.query(PlayerModel).all()
+        version: int = self._cache.validate()
+        players: List[Player] = self._cache.get_all()
 
-            if result is not None:
-                for player in result:
-                    players.append(player.to_player())
+        if players is None:
+            players = self._load_all()
+            players = self._cache.put_all(players, version)
 
         return players
+
+    # Projections read only the columns they show, ordered in the query, and skip the aggregate cache
+    def get_summaries(self) -> List[PlayerSummary]:
+        with self.get_read_session_begin() as session:
+            return RowReader.load_summaries(session)
+
+    def get_register_infos(self, register: int) -> List[TurnRegisterInfo]:
+        with self.get_read_session_begin() as session:
+            return RowReader.load_register_infos(session, register)
+
+    def count(self) -> int:
+        with self.get_read_session_begin() as session:
+            return RowReader.count_players(session)
+
+    # The catalog is loaded first, since loading it inside a unit of work's session would detach the models
+    def _load_by_id(self, id: str) -> Player:
+        card_catalog: CardCatalog = self._deck_repository.get_card_catalog()
+
+        with self.get_read_session_begin() as session:
+            return RowReader.load_player(session, id, card_catalog)
+
+    # Loads the child rows of every player in one query per table instead of one per player
+    def _load_all(self) -> List[Player]:
+        card_catalog: CardCatalog = self._deck_repository.get_card_catalog()
+
+        with self.get_read_session_begin() as session:
+            return RowReader.load_players(session, card_catalog)
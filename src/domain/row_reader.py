@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Select, Table, and_, bindparam, case, func, select
+from sqlalchemy.orm import Session
+
+from common.enums import CardType, DeckType
+from core.card import Card
+from core.deck import Deck
+from core.deck_card import DeckCard
+from core.game import Game, GameProps
+from core.hand import Hand
+from core.player import Player, PlayerProps
+from core.registers import Registers
+from domain.card_catalog import CardCatalog
+from domain.models.board_state_model import BoardStateModel
+from domain.models.deck_model import DeckModel
+from domain.models.game_model import GameModel
+from domain.models.packed_deck_model import PackedDeckModel
+from domain.models.player_model import PlayerModel
+from domain.models.registers_model import RegistersModel
+from domain.player_projections import PlayerSummary, TurnRegisterInfo
+
+_player: Table = PlayerModel.__table__
+_game: Table = GameModel.__table__
+_deck: Table = DeckModel.__table__
+_packed: Table = PackedDeckModel.__table__
+_registers: Table = RegistersModel.__table__
+_board_state: Table = BoardStateModel.__table__
+
+_HAND_TYPES: Tuple[str, ...] = (DeckType.PROGRAM_HAND.value, DeckType.POWER_HAND.value)
+_DECK_TYPES: Tuple[str, ...] = (DeckType.PROGRAM_DECK.value, DeckType.POWER_DECK.value)
+
+
+# Reads players, the game and decks with Core statements on the session's connection, so rows come back
+# as plain tuples and go straight into the domain objects without ORM models or the identity map. The
+# statements are built once, which lets SQLAlchemy reuse their compiled form on every call.
+class RowReader:
+    _player_rows: Select = select(_player.c.id, _player.c.name, _player.c.damage, _player.c.powered_down,
+                                  _player.c.will_power_down, _player.c.avatar_filename, _player.c.instructions,
+                                  _player.c.active, _player.c.version)
+    _hand_rows: Select = select(_deck.c.parent_id, _deck.c.type, _deck.c.card_num, _deck.c.card_filename,
+                                _deck.c.card_type, _deck.c.card_orb, _deck.c.card_num_uses) \
+        .where(_deck.c.type.in_(_HAND_TYPES))
+    _register_rows: Select = select(_registers.c.parent_id, _registers.c.card_num, _registers.c.card_filename,
+                                    _registers.c.locked, _registers.c.throw)
+    _packed_rows: Select = select(_packed.c.parent_id, _packed.c.type, _packed.c.card_type, _packed.c.cards,
+                                  _packed.c.orbs, _packed.c.num_uses)
+
+    _player_by_id: Select = _player_rows.where(_player.c.id == bindparam("id"))
+    _players: Select = _player_rows.order_by(_player.c.name, _player.c.id)
+    _hands_by_id: Select = _hand_rows.where(_deck.c.parent_id == bindparam("id")) \
+        .order_by(_deck.c.type, _deck.c.card_order)
+    _hands: Select = _hand_rows.order_by(_deck.c.parent_id, _deck.c.type, _deck.c.card_order)
+    _registers_by_id: Select = _register_rows.where(_registers.c.parent_id == bindparam("id")) \
+        .order_by(_registers.c.register_num)
+    _all_registers: Select = _register_rows.order_by(_registers.c.parent_id, _registers.c.register_num)
+    _packed_by_id: Select = _packed_rows.where(_packed.c.parent_id == bindparam("id"))
+    _packed_hands: Select = _packed_rows.where(_packed.c.type.in_(_HAND_TYPES))
+
+    _first_game: Select = select(_game.c.id, _game.c.round, _game.c.start_date, _game.c.notes,
+                                 _game.c.program_deck_top, _game.c.power_deck_top, _game.c.seed,
+                                 _game.c.shuffle_count, _game.c.version).limit(1)
+    _game_decks: Select = select(_deck.c.type, _deck.c.card_order, _deck.c.card_num, _deck.c.card_filename,
+                                 _deck.c.card_type, _deck.c.card_orb, _deck.c.card_num_uses) \
+        .where(_deck.c.parent_id == bindparam("id"), _deck.c.type.in_(_DECK_TYPES)) \
+        .order_by(_deck.c.type, _deck.c.card_order)
+    _board_states: Select = select(_board_state.c.filename).where(_board_state.c.parent_id == bindparam("id"))
+
+    _deck_rows: Select = select(_deck.c.type, _deck.c.card_num, _deck.c.card_filename, _deck.c.card_type,
+                                _deck.c.card_orb, _deck.c.card_num_uses) \
+        .where(_deck.c.parent_id == bindparam("id")) \
+        .order_by(_deck.c.card_order)
+    _packed_deck: Select = _packed_rows.where(_packed.c.parent_id == bindparam("id"),
+                                              _packed.c.type == bindparam("type"))
+
+    _summaries: Select = select(_player.c.id, _player.c.name, _player.c.damage, _player.c.avatar_filename,
+                                _player.c.active, _player.c.powered_down, _player.c.will_power_down) \
+        .order_by(_player.c.name, _player.c.id)
+    _count: Select = select(func.count()).select_from(_player)
+
+    # Players without a row for the register show it empty, and powered down players sort as powering down
+    _register_card_num = func.coalesce(_registers.c.card_num, Card.NUMBER_EMPTY)
+    _register_infos: Select = select(_player.c.id, _player.c.name, _player.c.damage, _player.c.instructions,
+                                     _player.c.powered_down, _register_card_num,
+                                     func.coalesce(_registers.c.card_filename, ""),
+                                     func.coalesce(_registers.c.throw, False)) \
+        .select_from(_player.outerjoin(_registers, and_(_registers.c.parent_id == _player.c.id,
+                                                         _registers.c.register_num == bindparam("register_num")))) \
+        .where(_player.c.active.is_(True)) \
+        .order_by(case((_player.c.powered_down.is_(True), Card.NUMBER_POWER_DOWN),
+                       else_=_register_card_num).desc(), _player.c.name)
+
+    @staticmethod
+    def load_summaries(session: Session) -> List[PlayerSummary]:
+        return [PlayerSummary(*row) for row in session.connection().execute(RowReader._summaries)]
+
+    @staticmethod
+    def load_register_infos(session: Session, register: int) -> List[TurnRegisterInfo]:
+        return [TurnRegisterInfo(*row)
+                for row in session.connection().execute(RowReader._register_infos, {'register_num': register - 1})]
+
+    @staticmethod
+    def count_players(session: Session) -> int:
+        return session.connection().execute(RowReader._count).scalar()
+
+    @staticmethod
+    def load_player(session: Session, id: str, card_catalog: CardCatalog) -> Optional[Player]:
+        connection = session.connection()
+        row = connection.execute(RowReader._player_by_id, {'id': id}).first()
+
+        if row is None:
+            return None
+
+        params: Dict = {'id': id}
+        hands = RowReader._group_hands(connection.execute(RowReader._hands_by_id, params), card_catalog)
+        registers = RowReader._group_registers(connection.execute(RowReader._registers_by_id, params),
+                                               card_catalog)
+        packed = RowReader._group_packed(connection.execute(RowReader._packed_by_id, params), card_catalog)
+
+        return RowReader._to_player(row, hands, registers, packed)
+
+    # One statement per table however many players there are
+    @staticmethod
+    def load_players(session: Session, card_catalog: CardCatalog) -> List[Player]:
+        connection = session.connection()
+        rows = connection.execute(RowReader._players).all()
+
+        if len(rows) == 0:
+            return []
+
+        hands = RowReader._group_hands(connection.execute(RowReader._hands), card_catalog)
+        registers = RowReader._group_registers(connection.execute(RowReader._all_registers), card_catalog)
+        packed = RowReader._group_packed(connection.execute(RowReader._packed_hands), card_catalog)
+
+        return [RowReader._to_player(row, hands, registers, packed) for row in rows]
+
+    @staticmethod
+    def load_game(session: Session, card_catalog: CardCatalog) -> Optional[Game]:
+        connection = session.connection()
+        row = connection.execute(RowReader._first_game).first()
+
+        if row is None:
+            return None
+
+        id, turn, start_date, notes, program_deck_top, power_deck_top, seed, shuffle_count, version = row
+        params: Dict = {'id': id}
+        tops: Dict[str, Optional[int]] = {DeckType.PROGRAM_DECK.value: program_deck_top,
+                                          DeckType.POWER_DECK.value: power_deck_top}
+        cards: Dict[str, List[DeckCard]] = {x: [] for x in _DECK_TYPES}
+        intern = RowReader._interner(card_catalog)
+        packed = RowReader._group_packed_decks(connection.execute(RowReader._packed_by_id, params), card_catalog)
+
+        # Rows at or above the top of deck cursor were already dealt and are only waiting to be overwritten
+        if any((id, x) not in packed for x in _DECK_TYPES):
+            for type, card_order, card_num, card_filename, card_type, card_orb, card_num_uses in \
+                    connection.execute(RowReader._game_decks, params):
+                top: Optional[int] = tops[type]
+
+                if top is None or card_order < top:
+                    cards[type].append(DeckCard.hydrate(intern(card_num, card_filename, card_type), card_orb,
+                                                        card_num_uses))
+
+        props: GameProps = GameProps()
+        props.id = id
+        props.turn = turn
+        props.start_date = start_date
+        props.program_deck = RowReader._deck(DeckType.PROGRAM_DECK, id, packed, cards)
+        props.power_deck = RowReader._deck(DeckType.POWER_DECK, id, packed, cards)
+        props.board_state_filenames = list(connection.execute(RowReader._board_states, params).scalars())
+        props.notes = notes
+        props.seed = seed
+        props.shuffle_count = shuffle_count
+
+        game: Game = Game(props)
+        game.mark_version(version)
+        game.mark_clean()
+
+        return game
+
+    # Packed decks win over any card rows left from before the switch. Card rows are read like they always
+    # were, every row under the parent whatever its type, and the deck takes the type of its rows.
+    @staticmethod
+    def load_deck(session: Session, id: str, type: DeckType, card_catalog: CardCatalog) -> Deck:
+        connection = session.connection()
+        packed = connection.execute(RowReader._packed_deck, {'id': id, 'type': type}).first()
+
+        if packed is not None:
+            return PackedDeckModel.deck_from_values(type, id, packed.card_type, packed.cards, packed.orbs,
+                                                    packed.num_uses, card_catalog.lookup)
+
+        intern = RowReader._interner(card_catalog)
+        cards: List[DeckCard] = []
+
+        for type, card_num, card_filename, card_type, card_orb, card_num_uses in \
+                connection.execute(RowReader._deck_rows, {'id': id}):
+            cards.append(DeckCard.hydrate(intern(card_num, card_filename, card_type), card_orb, card_num_uses))
+
+        deck = Deck(type, id)
+
+        if len(cards) > 0:
+            deck.populate(cards)
+
+        return deck
+
+    @staticmethod
+    def _to_player(row, hands: Dict[Tuple[str, str], List[DeckCard]], registers: Dict[str, Registers],
+                   packed: Dict[Tuple[str, str], List[DeckCard]]) -> Player:
+        id, name, damage, powered_down, will_power_down, avatar_filename, instructions, active, version = row
+        props: PlayerProps = PlayerProps()
+
+        props.id = id
+        props.avatar_filename = avatar_filename
+        props.instructions = instructions
+        props.damage = damage
+        props.powered_down = powered_down
+        props.will_power_down = will_power_down
+        props.name = name
+        props.active = active
+        props.program_hand = RowReader._hand(DeckType.PROGRAM_HAND, id, Player.MAX_PROGRAM_HAND_SIZE, packed, hands)
+        props.power_hand = RowReader._hand(DeckType.POWER_HAND, id, Player.MAX_POWER_HAND_SIZE, packed, hands)
+        props.registers = registers.get(id)
+
+        if props.registers is None:
+            props.registers = Registers(id)
+
+        player: Player = Player(props)
+        player.mark_version(version)
+        player.mark_clean()
+
+        return player
+
+    @staticmethod
+    def _hand(type: DeckType, parent_id: str, max_size: int, packed: Dict[Tuple[str, str], List[DeckCard]],
+              hands: Dict[Tuple[str, str], List[DeckCard]]) -> Hand:
+        key: Tuple[str, str] = (parent_id, type.value)
+        cards: Optional[List[DeckCard]] = packed.get(key)
+
+        if cards is None:
+            cards = hands.get(key)
+
+            if cards is None:
+                return Hand(type, id=parent_id)
+
+        hand: Hand = Hand(type, max_size, parent_id)
+        hand.populate(cards)
+
+        return hand
+
+    @staticmethod
+    def _deck(type: DeckType, parent_id: str, packed: Dict[Tuple[str, str], Deck],
+              cards: Dict[str, List[DeckCard]]) -> Deck:
+        deck: Optional[Deck] = packed.get((parent_id, type.value))
+
+        if deck is not None:
+            return deck
+
+        deck = Deck(type, parent_id)
+
+        if len(cards[type.value]) > 0:
+            deck.populate(cards[type.value])
+
+        return deck
+
+    @staticmethod
+    def _group_hands(rows, card_catalog: CardCatalog) -> Dict[Tuple[str, str], List[DeckCard]]:
+        hands: Dict[Tuple[str, str], List[DeckCard]] = {}
+        intern = RowReader._interner(card_catalog)
+
+        for parent_id, type, card_num, card_filename, card_type, card_orb, card_num_uses in rows:
+            cards: List[DeckCard] = hands.get((parent_id, type))
+
+            if cards is None:
+                cards = []
+                hands[(parent_id, type)] = cards
+
+            cards.append(DeckCard.hydrate(intern(card_num, card_filename, card_type), card_orb, card_num_uses))
+
+        return hands
+
+    @staticmethod
+    def _group_registers(rows, card_catalog: CardCatalog) -> Dict[str, Registers]:
+        values: Dict[str, Tuple[List[Card], List[bool], List[bool]]] = {}
+        intern = RowReader._interner(card_catalog)
+
+        for parent_id, card_num, card_filename, locked, throw in rows:
+            cards, locks, throws = values.setdefault(parent_id, ([], [], []))
+            cards.append(intern(card_num, card_filename, CardType.PROGRAM))
+            locks.append(locked)
+            throws.append(throw)
+
+        return {id: Registers(id, cards, locks, throws) for id, (cards, locks, throws) in values.items()}
+
+    @staticmethod
+    def _group_packed_decks(rows, card_catalog: CardCatalog) -> Dict[Tuple[str, str], Deck]:
+        return {(parent_id, type): PackedDeckModel.deck_from_values(DeckType(type), parent_id, card_type, cards, orbs,
+                                                                    num_uses, card_catalog.lookup)
+                for parent_id, type, card_type, cards, orbs, num_uses in rows}
+
+    @staticmethod
+    def _group_packed(rows, card_catalog: CardCatalog) -> Dict[Tuple[str, str], List[DeckCard]]:
+        return {(parent_id, type): PackedDeckModel.cards_from_values(card_type, cards, orbs, num_uses,
+                                                                     card_catalog.lookup)
+                for parent_id, type, card_type, cards, orbs, num_uses in rows}
+
+    @staticmethod
+    def _interner(card_catalog: CardCatalog):
+        if card_catalog is None:
+            return Card.hydrate
+
+        return card_catalog.intern
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import threading
+import time
+from abc import ABC
+
+from common.enums import DeckStorageFormat, StorageBackendType
+from common.repository import Repository
+from common.unit_of_work import UnitOfWork
+from domain.file_repositories import FilePlayerRepository, FileGameRepository, FileGameEventRepository
+from domain.game_event_repository import GameEventRepository
+from domain.game_respository import GameRepository
+from domain.memory_repositories import MemoryPlayerRepository, MemoryGameRepository, MemoryGameEventRepository
+from domain.player_respository import PlayerRepository
+
+
+# Where the game, the players and the game log live. Cards always come from the database, since they
+# are only ever rebuilt from the card directories.
+class StorageBackend(ABC):
+    @property
+    def player_repository(self) -> PlayerRepository:
+        return self._player_repository
+
+    @property
+    def game_repository(self) -> GameRepository:
+        return self._game_repository
+
+    @property
+    def event_repository(self) -> GameEventRepository:
+        return self._event_repository
+
+    def __init__(self, player_repository: PlayerRepository, game_repository: GameRepository,
+                 event_repository: GameEventRepository):
+        self._player_repository: PlayerRepository = player_repository
+        self._game_repository: GameRepository = game_repository
+        self._event_repository: GameEventRepository = event_repository
+
+    @staticmethod
+    def create(type: StorageBackendType, database: str = None,
+               storage_format: DeckStorageFormat = DeckStorageFormat.ROWS, directory: str = None,
+               checkpoint_interval_s: float = None) -> StorageBackend:
+        if type == StorageBackendType.MEMORY:
+            if checkpoint_interval_s is None:
+                checkpoint_interval_s = MemoryStorageBackend.DEFAULT_CHECKPOINT_INTERVAL_S
+
+            return MemoryStorageBackend(database, storage_format, checkpoint_interval_s)
+
+        if type == StorageBackendType.FILE:
+            return FileStorageBackend(directory, database, storage_format)
+
+        if type == StorageBackendType.SQLITE:
+            return SqliteStorageBackend(database, storage_format)
+
+        raise AttributeError("Invalid storage backend: " + str(type))
+
+    # Makes sure everything saved so far is durable
+    def checkpoint(self):
+        pass
+
+    def close(self):
+        self.checkpoint()
+
+
+class SqliteStorageBackend(StorageBackend):
+    def __init__(self, database: str = None, storage_format: DeckStorageFormat = DeckStorageFormat.ROWS):
+        player_repository: PlayerRepository = PlayerRepository(database, storage_format)
+
+        super().__init__(player_repository,
+                         GameRepository(player_repository.database, storage_format),
+                         GameEventRepository(player_repository.database))
+
+
+# Keeps the game in this process and writes what changed to the database once the unit of work that
+# changed it commits, at most once per interval. Anything since the last checkpoint is lost if the
+# process dies, and only one worker may use it.
+class MemoryStorageBackend(StorageBackend):
+    DEFAULT_CHECKPOINT_INTERVAL_S: float = 30.0
+
+    def __init__(self, database: str = None, storage_format: DeckStorageFormat = DeckStorageFormat.ROWS,
+                 checkpoint_interval_s: float = DEFAULT_CHECKPOINT_INTERVAL_S):
+        player_repository: MemoryPlayerRepository = MemoryPlayerRepository(database, storage_format,
+                                                                           self._changed)
+
+        super().__init__(player_repository,
+                         MemoryGameRepository(player_repository.database, storage_format, self._changed),
+                         MemoryGameEventRepository(player_repository.database, self._changed))
+
+        self._checkpoint_interval_s: float = checkpoint_interval_s
+        self._lock: threading.RLock = threading.RLock()
+        self._last_checkpoint: float = time.monotonic()
+
+    def checkpoint(self):
+        with self._lock:
+            self._last_checkpoint = time.monotonic()
+
+            with UnitOfWork():
+                self._game_repository.checkpoint()
+                self._player_repository.checkpoint()
+                self._event_repository.checkpoint()
+
+    def _changed(self):
+        Repository.after_commit(self._checkpoint_if_due)
+
+    def _checkpoint_if_due(self):
+        if time.monotonic() - self._last_checkpoint < self._checkpoint_interval_s:
+            return
+
+        try:
+            self.checkpoint()
+        except Exception as err:
+            print("Checkpoint failed, will try again after the next change: {}".format(err))
+
+
+class FileStorageBackend(StorageBackend):
+    def __init__(self, directory: str, database: str = None,
+                 storage_format: DeckStorageFormat = DeckStorageFormat.ROWS):
+        if directory is None:
+            raise ValueError("The file storage backend needs a directory")
+
+        player_repository: FilePlayerRepository = FilePlayerRepository(directory, database, storage_format)
+
+        super().__init__(player_repository,
+                         FileGameRepository(directory, player_repository.database, storage_format),
+                         FileGameEventRepository(directory, player_repository.database))
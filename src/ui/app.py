@@ -1,24 +1,41 @@
+import atexit
 import os
 import secrets
+from functools import wraps
 from json import JSONEncoder
 from secrets import token_hex
-from typing import List
+from typing import List, Tuple, Callable
 
-from flask import Flask, render_template, flash, url_for, send_from_directory, request
+import click
+from flask import Flask, render_template, flash, url_for, send_from_directory, request, g, session, abort, \
+    has_app_context
 from flask_cors import CORS
 from flask_wtf import FlaskForm
 from flask_wtf.file import FileRequired, FileAllowed
+from werkzeug.local import LocalProxy
 from werkzeug.utils import secure_filename, redirect
 from wtforms import StringField, FileField, SubmitField, TextAreaField
 from wtforms.validators import InputRequired, DataRequired, Length
 
 from application import db, migrate
+from application.game_registry import GameRegistry
 from application.game_service import GameService, GameStats
-from common.enums import CardType, DeckType
+from application.write_behind_queue import WriteBehindQueue
+from common.aggregate_cache import AggregateCache
+from common.engine_registry import EngineRegistry
+from common.enums import CardType, DeckStorageFormat, ShuffleType, StorageBackendType
+from common.sql_profiler import SqlProfiler, SqlProfile
+from common.unit_of_work import UnitOfWork, ConcurrentUpdateError
 from core.card import Card
-from core.hand import Hand
+from core.card_move import CardMove
 from core.player import Player
-from core.deck_card import DeckCard
+from core.shuffle_engine import ShuffleEngine
+from domain.card_catalog import CardCatalog
+from domain.card_respository import CardRepository
+from domain.deck_factory import DeckFactory
+from domain.deck_respository import DeckRepository
+from domain.player_projections import PlayerSummary
+from domain.storage_backend import StorageBackend, MemoryStorageBackend
 
 base_dir: str = os.path.abspath(os.path.dirname(__file__))
 db_dir: str = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))), "database")
@@ -34,6 +51,34 @@ app.config["ALLOWED_IMAGE_EXTENSIONS"] = ["jpeg", "jpg", "png", "gif"]
 app.config["MAX_CONTENT_LENGTH"] = 16 * 1024 * 1024
 app.config["AVATAR_UPLOADS"] = os.path.join(base_dir, "static", "images", "avatars")
 app.config["BOARD_UPLOADS"] = os.path.join(base_dir, "static", "images", "board_states")
+app.config["SQLITE_CACHE_SIZE_KB"] = 16 * 1024
+app.config["SQLITE_MMAP_SIZE"] = 64 * 1024 * 1024
+app.config["SQLITE_BUSY_TIMEOUT_MS"] = 5000
+app.config["DECK_STORAGE_FORMAT"] = DeckStorageFormat.PACKED
+app.config["GAME_SHARDS"] = os.path.join(db_dir, "games")
+app.config["GAME_IDLE_TTL_S"] = GameRegistry.DEFAULT_IDLE_TTL_S
+app.config["SHUFFLE_TYPE"] = ShuffleType.RIFFLE
+
+# Starting a new game first archives the old one here, see the import-game command to bring one back
+app.config["RESTORE_POINTS"] = os.path.join(db_dir, "restore_points")
+
+# Gunicorn takes its worker count from the same variable, see resources/ec2/roborally.service
+app.config["WORKERS"] = int(os.environ.get("WEB_CONCURRENCY", 1))
+
+# Memory and file storage keep the game in this process, so they need gunicorn to run a single worker
+app.config["STORAGE_BACKEND"] = StorageBackendType.SQLITE
+app.config["STORAGE_DIRECTORY"] = os.path.join(db_dir, "storage")
+app.config["CHECKPOINT_INTERVAL_S"] = MemoryStorageBackend.DEFAULT_CHECKPOINT_INTERVAL_S
+
+# Counts the SQL each request and GameService method runs, see the Server-Timing header and /debug/sql
+app.config["SQL_PROFILING"] = False
+app.config["SQL_PROFILING_TOP_N"] = 20
+
+# Card moves are acknowledged before they are saved, and may be lost if the process dies within the window,
+# so this needs a single worker too
+app.config["WRITE_BEHIND"] = False
+app.config["WRITE_BEHIND_WINDOW_MS"] = WriteBehindQueue.DEFAULT_WINDOW_MS
+app.config["WRITE_BEHIND_MAX_PENDING"] = WriteBehindQueue.DEFAULT_MAX_PENDING
 
 # Uncomment for local
 #cors = CORS(app, origins=["http://localhost:5000", "http://127.0.0.1:5000"])
@@ -42,11 +87,293 @@ app.config["BOARD_UPLOADS"] = os.path.join(base_dir, "static", "images", "board_
 app.config['SERVER_NAME'] = "roborally"
 cors = CORS(app, origins=["http://roborally.mylio-internal.com"])
 
+if app.config["WORKERS"] > 1 and (app.config["STORAGE_BACKEND"] != StorageBackendType.SQLITE
+                                 or app.config["WRITE_BEHIND"]):
+    raise RuntimeError("{} storage{} only works with a single worker, not {}".format(
+        app.config["STORAGE_BACKEND"].value, " with write behind" if app.config["WRITE_BEHIND"] else "",
+        app.config["WORKERS"]))
+
 db.init_app(app)
 migrate.init_app(app, db, directory=migration_dir)
 
+EngineRegistry.configure(cache_size_kb=app.config["SQLITE_CACHE_SIZE_KB"],
+                         mmap_size=app.config["SQLITE_MMAP_SIZE"],
+                         busy_timeout_ms=app.config["SQLITE_BUSY_TIMEOUT_MS"])
+
+if app.config["SQL_PROFILING"]:
+    SqlProfiler.enable()
+
+
+
+# Every game but the default one lives in a database of its own, so games never wait on each other's writes
+def game_database(game_id: str) -> str:
+    if game_id == GameRegistry.DEFAULT_GAME_ID:
+        return os.path.join(db_dir, "roborally.db")
+
+    return os.path.join(app.config["GAME_SHARDS"], "{}.db".format(game_id))
+
+
+def board_directory(game_id: str) -> str:
+    if game_id == GameRegistry.DEFAULT_GAME_ID:
+        return app.config["BOARD_UPLOADS"]
+
+    return os.path.join(app.config["BOARD_UPLOADS"], game_id)
+
+
+def restore_point_directory(game_id: str) -> str:
+    if game_id == GameRegistry.DEFAULT_GAME_ID:
+        return app.config["RESTORE_POINTS"]
+
+    return os.path.join(app.config["RESTORE_POINTS"], game_id)
+
+
+def open_game(game_id: str) -> Tuple[GameService, Callable[[], None]]:
+    database: str = game_database(game_id)
+    storage_directory: str = app.config["STORAGE_DIRECTORY"]
+
+    if game_id != GameRegistry.DEFAULT_GAME_ID:
+        storage_directory = os.path.join(storage_directory, game_id)
+
+        # New games get their tables straight from the models, the default one is kept up to date by alembic
+        if not os.path.exists(database):
+            os.makedirs(app.config["GAME_SHARDS"], exist_ok=True)
+            db.metadata.create_all(EngineRegistry.get_engine(database))
+
+    storage: StorageBackend = StorageBackend.create(app.config["STORAGE_BACKEND"], database,
+                                                    storage_format=app.config["DECK_STORAGE_FORMAT"],
+                                                    directory=storage_directory,
+                                                    checkpoint_interval_s=app.config["CHECKPOINT_INTERVAL_S"])
+    write_behind: WriteBehindQueue = None
+
+    if app.config["WRITE_BEHIND"]:
+        write_behind = WriteBehindQueue(storage.player_repository.save,
+                                        window_ms=app.config["WRITE_BEHIND_WINDOW_MS"],
+                                        max_pending=app.config["WRITE_BEHIND_MAX_PENDING"])
+
+    card_repository: CardRepository = CardRepository(database)
+    service: GameService = GameService(base_dir, board_directory(game_id),
+                                       card_repository=card_repository,
+                                       deck_repository=DeckRepository(database, app.config["DECK_STORAGE_FORMAT"]),
+                                       deck_factory=DeckFactory(card_repository,
+                                                                ShuffleEngine.create(app.config["SHUFFLE_TYPE"])),
+                                       player_repository=storage.player_repository,
+                                       game_repository=storage.game_repository,
+                                       event_repository=storage.event_repository,
+                                       write_behind=write_behind,
+                                       board_state_path=os.path.relpath(board_directory(game_id),
+                                                                        os.path.join(base_dir, "static")),
+                                       restore_point_directory=restore_point_directory(game_id))
+
+    def close():
+        if write_behind is not None:
+            write_behind.close()
+
+        storage.close()
+        CardCatalog.invalidate(database)
+        AggregateCache.discard(database)
+        EngineRegistry.dispose(database)
+
+    return service, close
+
+
+def game_exists(game_id: str) -> bool:
+    return os.path.exists(game_database(game_id))
+
+
+games: GameRegistry = GameRegistry(open_game, game_exists, idle_ttl_s=app.config["GAME_IDLE_TTL_S"])
+atexit.register(games.close)
+
+
+# The game the current request is for, or the default one outside of requests
+def current_game() -> GameService:
+    if has_app_context():
+        return games.get(g.get("game_id", GameRegistry.DEFAULT_GAME_ID))
+
+    return games.get()
+
+
+game_service: GameService = LocalProxy(current_game)
+
 # Comment when running alembic commands
-game_service: GameService = GameService(base_dir, app.config["BOARD_UPLOADS"])
+games.get()
+
+
+def existing_game(game_id: str) -> GameService:
+    service: GameService = games.get(game_id)
+
+    if service is None:
+        raise click.ClickException("There is no game {}".format(game_id))
+
+    return service
+
+
+@app.cli.command("create-game")
+@click.argument("game_id")
+def create_game_command(game_id: str):
+    try:
+        games.create(game_id)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    print("Created game {}".format(game_id))
+
+
+@app.cli.command("export-game")
+@click.argument("path")
+@click.option("--game", "game_id", default=GameRegistry.DEFAULT_GAME_ID, help="Game to export")
+def export_game_command(path: str, game_id: str):
+    service: GameService = existing_game(game_id)
+
+    with open(path, "wb") as file:
+        service.export_game(file)
+
+    print("Exported game {} to {}".format(game_id, path))
+
+
+@app.cli.command("import-game")
+@click.argument("path")
+@click.option("--game", "game_id", default=GameRegistry.DEFAULT_GAME_ID, help="Game to replace")
+def import_game_command(path: str, game_id: str):
+    service: GameService = existing_game(game_id)
+
+    with open(path, "rb") as file:
+        try:
+            service.import_game(file)
+        except ValueError as e:
+            raise click.ClickException("{}: {}".format(path, e))
+
+    print("Imported {} into game {}".format(path, game_id))
+
+
+# Game pages and API calls take an optional /games/<game_id> prefix, without it they are for the default game
+def game_route(rule: str, **options):
+    def decorator(view):
+        # The prefixed rule goes first so url_for picks it whenever there is a game id to fill in
+        app.add_url_rule("/games/<game_id>" + rule, view_func=view, **options)
+        app.add_url_rule(rule, view_func=view, **options)
+
+        return view
+
+    return decorator
+
+
+@app.url_value_preprocessor
+def pull_game_id(endpoint, values):
+    game_id: str = GameRegistry.DEFAULT_GAME_ID
+
+    if values is not None:
+        game_id = values.pop("game_id", game_id)
+
+    if not GameRegistry.is_valid_id(game_id):
+        abort(404)
+
+    g.game_id = game_id
+
+
+@app.url_defaults
+def add_game_id(endpoint, values):
+    game_id: str = g.get("game_id", GameRegistry.DEFAULT_GAME_ID)
+
+    if game_id != GameRegistry.DEFAULT_GAME_ID and "game_id" not in values and \
+            app.url_map.is_endpoint_expecting(endpoint, "game_id"):
+        values["game_id"] = game_id
+
+
+# Lets the pages point their API calls at the same game
+@app.context_processor
+def inject_game_path():
+    game_id: str = g.get("game_id", GameRegistry.DEFAULT_GAME_ID)
+
+    return {'game_path': "" if game_id == GameRegistry.DEFAULT_GAME_ID else "/games/{}".format(game_id)}
+
+
+# Games that have not been created are not found, and a game is not closed as idle while a request uses it
+@app.before_request
+def hold_game():
+    if games.acquire(g.game_id) is None:
+        abort(404)
+
+    g.game_held = True
+
+
+@app.teardown_request
+def release_game(err):
+    if g.pop("game_held", False):
+        games.release(g.game_id)
+
+
+# Registered before the unit of work hooks, so the commit is part of what gets measured
+@app.before_request
+def begin_sql_profile():
+    if SqlProfiler.is_enabled():
+        g.sql_profile = SqlProfile(request.endpoint).begin()
+
+
+@app.after_request
+def end_sql_profile(response):
+    profile: SqlProfile = g.pop("sql_profile", None)
+
+    if profile is not None:
+        profile.end()
+        response.headers.add("Server-Timing", profile.server_timing())
+
+    return response
+
+
+@app.teardown_request
+def discard_sql_profile(err):
+    profile: SqlProfile = g.pop("sql_profile", None)
+
+    if profile is not None:
+        profile.end()
+
+
+# Everything a request saves is committed together, before the response goes out
+@app.before_request
+def begin_unit_of_work():
+    g.unit_of_work = UnitOfWork().begin()
+
+
+@app.after_request
+def commit_unit_of_work(response):
+    unit_of_work: UnitOfWork = g.pop("unit_of_work", None)
+
+    if unit_of_work is not None:
+        unit_of_work.commit()
+
+    return response
+
+
+@app.teardown_request
+def rollback_unit_of_work(err):
+    unit_of_work: UnitOfWork = g.pop("unit_of_work", None)
+
+    if unit_of_work is not None:
+        unit_of_work.rollback()
+
+
+# Runs the view again with fresh players and game when one of its saves lost a race with another
+# worker. The views catch their own errors, so look at what the unit of work ran into instead.
+def retry_on_conflict(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        flashes = list(session.get("_flashes", []))
+
+        for attempt in range(1, UnitOfWork.MAX_ATTEMPTS + 1):
+            try:
+                response = view(*args, **kwargs)
+            except ConcurrentUpdateError:
+                if attempt == UnitOfWork.MAX_ATTEMPTS:
+                    raise
+            else:
+                if g.unit_of_work.conflict is None or attempt == UnitOfWork.MAX_ATTEMPTS:
+                    return response
+
+            g.unit_of_work.rollback()
+            g.unit_of_work = UnitOfWork().begin()
+            session["_flashes"] = list(flashes)
+
+    return wrapper
 
 
 class NewPlayerForm(FlaskForm):
@@ -96,15 +423,15 @@ class PlayerDetailsForm(FlaskForm):
                                  validators=[Length(max=1000, message="Input must be under 1000 characters")])
 
 
-@app.route("/")
+@game_route("/")
 def home_page():
-    players: List[Player] = game_service.players
+    players: List[PlayerSummary] = game_service.player_summaries
     stats: GameStats = game_service.get_game_stats()
 
     return render_template("home.html", players=players, stats=stats, version=VERSION)
 
 
-@app.route("/cards/<type>")
+@game_route("/cards/<type>")
 def cards_page(type):
     cards: List[Card] = game_service.get_cards(type)
     stats: GameStats = game_service.get_game_stats()
@@ -118,7 +445,8 @@ def cards_page(type):
     return render_template("cards.html", cards=cards, prefix=prefix, stats=stats, version=VERSION, type=type)
 
 
-@app.route("/public-cards", methods=["GET", "POST"])
+@game_route("/public-cards", methods=["GET", "POST"])
+@retry_on_conflict
 def public_cards_page():
     for player in game_service.active_players:
         setattr(PublicCardForm, "draw_{}".format(player.id), SubmitField("Draw"))
@@ -142,8 +470,7 @@ def public_cards_page():
                         player = _get_player(id)
 
                         try:
-                            player.draw_power_card(game_service.game.power_deck)
-                            game_service.save_game()
+                            game_service.draw_power_card(player)
 
                             flash("Power card drawn for {}".format(player.name), "success")
                         except IndexError as err:
@@ -153,15 +480,10 @@ def public_cards_page():
                         card_number: int = int(parts[2])
                         player = _get_player(player_id)
 
-                        from_hand: Hand = player.get_hand_by_name(DeckType.POWER_HAND)
-                        to_hand: Hand = game_service.discard_pile
-                        from_hand.transfer_card_by_number(card_number, to_hand)
-                        game_service.save_player(player)
+                        game_service.discard_power_card(player, card_number)
 
                         flash("Power card discarded for {}".format(player.name), "success")
 
-                    game_service.save_player(player)
-
                     break
 
             return redirect(url_for("public_cards_page"))
@@ -169,14 +491,15 @@ def public_cards_page():
     return render_template("public_cards.html", form=form, players=players, stats=stats, version=VERSION)
 
 
-@app.route("/new-game", methods=["GET", "POST"])
+@game_route("/new-game", methods=["GET", "POST"])
+@retry_on_conflict
 def new_game_page():
     form = NewGameForm()
     stats: GameStats = game_service.get_game_stats()
 
     if form.validate_on_submit():
         if form.doit.data:
-            game_service.start_new_game(app.config["BOARD_UPLOADS"])
+            game_service.start_new_game(board_directory(g.game_id))
 
             flash("New game started", "success")
 
@@ -185,9 +508,10 @@ def new_game_page():
     return render_template("new_game.html", form=form, stats=stats, version=VERSION)
 
 
-@app.route("/play-turn/<register>", methods=["GET", "POST"])
+@game_route("/play-turn/<register>", methods=["GET", "POST"])
+@retry_on_conflict
 def play_turn_page(register):
-    for player in game_service.players:
+    for player in game_service.player_summaries:
         setattr(PlayTurnForm, "inc_damage_{}".format(player.id), SubmitField("+"))
         setattr(PlayTurnForm, "dec_damage_{}".format(player.id), SubmitField("-"))
 
@@ -212,14 +536,12 @@ def play_turn_page(register):
 
                     if player is not None:
                         if action == "inc":
-                            player.inc_damage()
+                            game_service.inc_damage(player)
                             flash("Damage for {} increased by 1".format(player.name), "success")
                         else:
-                            player.dec_damage()
+                            game_service.dec_damage(player)
                             flash("Damager for {} decreased by 1".format(player.name), "success")
 
-                    game_service.save_player(player)
-
                     break
 
             return redirect(url_for("play_turn_page", register=register))
@@ -237,7 +559,8 @@ def _get_player(id: str) -> Player:
     return player
 
 
-@app.route("/players/<player_id>", methods=["GET", "POST"])
+@game_route("/players/<player_id>", methods=["GET", "POST"])
+@retry_on_conflict
 def player_page(player_id):
     stats: GameStats = game_service.get_game_stats()
     player: Player = game_service.get_player(player_id)
@@ -256,31 +579,30 @@ def player_page(player_id):
             if player.registers.any_empty:
                 flash("You must fill all registers!", "warning")
             else:
-                player.lock_choices()
+                game_service.lock_choices(player)
 
         if form.active.data:
-            player.is_active = not player.is_active
+            game_service.set_active(player, not player.is_active)
 
         if form.power_down.data:
-            player.will_power_down()
+            game_service.will_power_down(player)
             flash("Will power down next turn", "info")
 
         if form.power_up.data:
-            player.will_power_up()
+            game_service.will_power_up(player)
             flash("Will power up next turn", "info")
 
         if form.inc_damage.data:
-            player.inc_damage()
+            game_service.inc_damage(player)
 
         if form.dec_damage.data:
-            player.dec_damage()
+            game_service.dec_damage(player)
 
         if form.instructions.data:
-            player.instructions = form.instructions.data
+            game_service.set_instructions(player, form.instructions.data)
         else:
-            player.instructions = ""
+            game_service.set_instructions(player, "")
 
-        game_service.save_player(player)
         return redirect(url_for("player_page", player_id=player.id))
 
     if player.is_destroyed:
@@ -292,7 +614,8 @@ def player_page(player_id):
     return render_template("player.html", player=player, stats=stats, version=VERSION, form=form)
 
 
-@app.route("/add", methods=["GET", "POST"])
+@game_route("/add", methods=["GET", "POST"])
+@retry_on_conflict
 def add_page():
     form = NewPlayerForm()
     stats: GameStats = game_service.get_game_stats()
@@ -314,11 +637,13 @@ def add_page():
     return render_template("add.html", form=form, stats=stats, version=VERSION)
 
 
-@app.route("/delete", methods=["GET", "POST"])
+@game_route("/delete", methods=["GET", "POST"])
+@retry_on_conflict
 def delete_page():
     stats: GameStats = game_service.get_game_stats()
+    players: List[PlayerSummary] = game_service.player_summaries
 
-    for player in game_service.players:
+    for player in players:
         setattr(DeletePlayerForm, player.id, SubmitField("Delete"))
     form: DeletePlayerForm = DeletePlayerForm()
 
@@ -348,12 +673,11 @@ def delete_page():
 
         return redirect(url_for("delete_page"))
 
-    players: List[Player] = game_service.players
-
     return render_template("delete.html", players=players, stats=stats, version=VERSION, form=form)
 
 
-@app.route("/board-state", methods=["GET", "POST"])
+@game_route("/board-state", methods=["GET", "POST"])
+@retry_on_conflict
 def board_state_page():
     form = BoardStateForm()
     stats: GameStats = game_service.get_game_stats()
@@ -368,9 +692,9 @@ def board_state_page():
             filename = "{}_{}".format(random_string, form.add.data.filename)
             filename = secure_filename(filename)
 
-            if not os.path.exists(app.config["BOARD_UPLOADS"]):
-                os.mkdir(app.config["BOARD_UPLOADS"])
-            form.add.data.save(os.path.join(app.config["BOARD_UPLOADS"], filename))
+            if not os.path.exists(board_directory(g.game_id)):
+                os.makedirs(board_directory(g.game_id))
+            form.add.data.save(os.path.join(board_directory(g.game_id), filename))
 
             game_service.add_board_state(filename)
             flash("Board image has been added", "success")
@@ -381,7 +705,6 @@ def board_state_page():
             else:
                 game_service.add_game_notes("")
 
-            game_service.save_game()
             flash("Notes saved", "success")
 
         return redirect(url_for("board_state_page"))
@@ -397,9 +720,9 @@ def avatar(filename):
     return send_from_directory(app.config["AVATAR_UPLOADS"], filename)
 
 
-@app.route("/board/<filename>")
+@game_route("/board/<filename>")
 def board_state(filename):
-    return send_from_directory(app.config["BOARD_UPLOADS"], filename)
+    return send_from_directory(board_directory(g.game_id), filename)
 
 
 # --------------------
@@ -415,7 +738,7 @@ class CustomJsonEncoder(JSONEncoder):
                 return {}
 
 
-@app.route("/api/players")
+@game_route("/api/players")
 def api_all_players():
     try:
         players: list[Player] = game_service.players
@@ -427,7 +750,7 @@ def api_all_players():
     return data
 
 
-@app.route("/api/players/<player_id>")
+@game_route("/api/players/<player_id>")
 def api_player(player_id):
     try:
         player: Player = game_service.get_player(player_id)
@@ -439,15 +762,14 @@ def api_player(player_id):
     return data
 
 
-@app.route("/api/players/<player_id>/deal")
+@game_route("/api/players/<player_id>/deal")
+@retry_on_conflict
 def api_player_deal(player_id):
     ret_val: str = "Success"
 
     try:
         player: Player = game_service.get_player(player_id)
-        player.reset_program_hand(game_service.game.program_deck)
-        game_service.save_player(player)
-        game_service.save_game()
+        game_service.deal(player)
     except Exception as err:
         ret_val = "Problem dealing new program hand to player ID {}: {}".format(player_id, err)
         print(ret_val)
@@ -455,7 +777,8 @@ def api_player_deal(player_id):
     return ret_val
 
 
-@app.route("/api/players/<player_id>/drawPowerCard")
+@game_route("/api/players/<player_id>/drawPowerCard")
+@retry_on_conflict
 def api_draw_power_card(player_id):
     try:
         player = game_service.get_player(player_id)
@@ -464,9 +787,7 @@ def api_draw_power_card(player_id):
         return ""
 
     try:
-        player.draw_power_card(game_service.game.power_deck)
-        game_service.save_game()
-        game_service.save_player(player)
+        game_service.draw_power_card(player)
     except Exception as err:
         print("Problem drawing power card for player ID {}: {}".format(player_id, err))
 
@@ -474,7 +795,8 @@ def api_draw_power_card(player_id):
     return data
 
 
-@app.route("/api/players/<player_id>/transferCard", methods=["POST"])
+@game_route("/api/players/<player_id>/transferCard", methods=["POST"])
+@retry_on_conflict
 def api_transfer_card(player_id):
     data = request.get_json()
     to_id = data['toId'] if data.get('toId') else ""
@@ -483,99 +805,111 @@ def api_transfer_card(player_id):
     from_index = data['fromIndex']
     to_index = data['toIndex']
 
-    try:
-        from_player: Player = game_service.get_player(player_id)
-    except Exception as err:
-        print("Problem finding 'from' player ID {}: {}".format(player_id, err))
-        return ""
+    with game_service.changing_players():
+        try:
+            from_player: Player = game_service.get_player(player_id)
+        except Exception as err:
+            print("Problem finding 'from' player ID {}: {}".format(player_id, err))
+            return ""
 
-    try:
-        if len(to_id) > 0:
-            to_player: Player = game_service.get_player(to_id)
+        try:
+            if len(to_id) > 0:
+                to_player: Player = game_service.get_player(to_id)
+            else:
+                to_player = from_player
+        except Exception as err:
+            print("Problem finding 'to' player ID {}: {}".format(player_id, err))
+            return ""
+
+        try:
+            game_service.transfer_card(from_player, from_name, from_index, to_player, to_name, to_index, later=True)
+        except Exception as err:
+            print("Problem transferring {} card to {} for player ID {}: {}".format(from_name, to_name, player_id, err))
+            from_player = game_service.get_player(player_id)
+
+            if len(to_id) > 0:
+                to_player = game_service.get_player(to_id)
+
+        if from_player == to_player:
+            data: str = CustomJsonEncoder().encode(from_player).replace('"_', '"')
         else:
-            to_player = from_player
-    except Exception as err:
-        print("Problem finding 'to' player ID {}: {}".format(player_id, err))
-        return ""
+            data: str = CustomJsonEncoder().encode([from_player, to_player]).replace('"_', '"')
+        
+    return data
 
-    try:
-        from_hand: Hand = from_player.get_hand_by_name(from_name)
-        to_hand: Hand = to_player.get_hand_by_name(to_name)
-        from_hand.transfer_card(from_index, to_hand, to_index)
-        game_service.save_player(from_player)
 
-        if from_player != to_player:
-            game_service.save_player(to_player)
-    except Exception as err:
-        print("Problem transferring {} card to {} for player ID {}: {}".format(from_name, to_name, player_id, err))
-        from_player = game_service.get_player(player_id)
+@game_route("/api/players/<player_id>/moveCards", methods=["POST"])
+@retry_on_conflict
+def api_move_cards(player_id):
+    data = request.get_json()
+    moves: List[CardMove] = [CardMove(x['fromHand'], x['fromIndex'], x['toHand'], x['toIndex'])
+                             for x in data['moves']]
 
-        if len(to_id) > 0:
-            to_player = game_service.get_player(to_id)
+    with game_service.changing_players():
+        try:
+            player: Player = game_service.get_player(player_id)
+        except Exception as err:
+            print("Problem finding player ID {}: {}".format(player_id, err))
+            return ""
+
+        try:
+            game_service.move_cards(player, moves, later=True)
+        except Exception as err:
+            print("Problem moving {} cards for player ID {}: {}".format(len(moves), player_id, err))
+            player = game_service.get_player(player_id)
+
+        data: str = CustomJsonEncoder().encode(player).replace('"_', '"')
 
-    if from_player == to_player:
-        data: str = CustomJsonEncoder().encode(from_player).replace('"_', '"')
-    else:
-        data: str = CustomJsonEncoder().encode([from_player, to_player]).replace('"_', '"')
-        
     return data
 
 
-@app.route("/api/players/<player_id>/discardCard", methods=["POST"])
+@game_route("/api/players/<player_id>/discardCard", methods=["POST"])
+@retry_on_conflict
 def api_discard_card(player_id):
     data = request.get_json()
     from_name = data['fromHand']
     from_index = data['fromIndex']
 
-    try:
-        player = game_service.get_player(player_id)
-    except Exception as err:
-        print("Problem finding player ID {}: {}".format(player_id, err))
-        return ""
+    with game_service.changing_players():
+        try:
+            player = game_service.get_player(player_id)
+        except Exception as err:
+            print("Problem finding player ID {}: {}".format(player_id, err))
+            return ""
 
-    try:
-        from_hand: Hand = player.get_hand_by_name(from_name)
-        to_hand: Hand = game_service.discard_pile
-        from_hand.transfer_card(from_index, to_hand)
-        game_service.save_player(player)
-    except Exception as err:
-        print("Problem discarding {} card for player ID {}: {}".format(from_name, player_id, err))
+        try:
+            game_service.discard_card(player, from_name, from_index, later=True)
+        except Exception as err:
+            print("Problem discarding {} card for player ID {}: {}".format(from_name, player_id, err))
 
-    data: str = CustomJsonEncoder().encode(player).replace('"_', '"')
+        data: str = CustomJsonEncoder().encode(player).replace('"_', '"')
     return data
 
 
-@app.route("/api/players/<player_id>/powerCard/<filename>", methods=["PUT"])
+@game_route("/api/players/<player_id>/powerCard/<filename>", methods=["PUT"])
+@retry_on_conflict
 def api_update_power_card(player_id, filename):
     data = request.get_json()
     orb = data.get("orb")
     num_uses = data.get("numUses")
 
-    try:
-        player = game_service.get_player(player_id)
-    except Exception as err:
-        print("Problem finding player ID {}: {}".format(player_id, err))
-        return ""
-
-    try:
-        from_hand: Hand = player.get_hand_by_name(DeckType.POWER_HAND)
-        card: DeckCard = from_hand.getCardByFilename(filename)
-        
-        if orb is not None:
-            card.orb = orb
-
-        if num_uses is not None:
-            card.num_uses = num_uses
+    with game_service.changing_players():
+        try:
+            player = game_service.get_player(player_id)
+        except Exception as err:
+            print("Problem finding player ID {}: {}".format(player_id, err))
+            return ""
 
-        game_service.save_player(player)
-    except Exception as err:
-        print("Problem updating  card {} for player ID {}: {}".format(filename, player_id, err))
+        try:
+            game_service.update_power_card(player, filename, orb, num_uses, later=True)
+        except Exception as err:
+            print("Problem updating  card {} for player ID {}: {}".format(filename, player_id, err))
 
-    data: str = CustomJsonEncoder().encode(player).replace('"_', '"')
+        data: str = CustomJsonEncoder().encode(player).replace('"_', '"')
     return data
 
 
-@app.route("/api/turn/register/<register>")
+@game_route("/api/turn/register/<register>")
 def api_turn_register(register):
     data = request.get_json()
     register = data['register']
@@ -590,27 +924,58 @@ def api_turn_register(register):
     return data
 
 
-@app.route("/api/players/<player_id>/throw", methods=["POST"])
+@game_route("/api/players/<player_id>/throw", methods=["POST"])
+@retry_on_conflict
 def api_throw(player_id):
     data = request.get_json()
     register = data['index']
 
-    try:
-        player = game_service.get_player(player_id)
-    except Exception as err:
-        print("Problem finding player ID {}: {}".format(player_id, err))
-        return ""
+    with game_service.changing_players():
+        try:
+            player = game_service.get_player(player_id)
+        except Exception as err:
+            print("Problem finding player ID {}: {}".format(player_id, err))
+            return ""
 
-    try:
-        player.registers.throw(register)
-        game_service.save_player(player)
-    except Exception as err:
-        print("Problem changing throw value for register {}: {}".format(register, err))
-        return ""
+        try:
+            game_service.throw(player, register, later=True)
+        except Exception as err:
+            print("Problem changing throw value for register {}: {}".format(register, err))
+            return ""
 
-    data: str = CustomJsonEncoder().encode(player).replace('"_', '"')
+        data: str = CustomJsonEncoder().encode(player).replace('"_', '"')
     return data
 
 
+# The only way, besides the create-game command, that a game other than the default one comes to be
+@app.route("/api/games", methods=["POST"])
+def api_create_game():
+    data = request.get_json(silent=True) or {}
+    game_id: str = data.get('gameId')
+
+    try:
+        games.create(game_id)
+    except ValueError as err:
+        return str(err), 409 if GameRegistry.is_valid_id(game_id) else 400
+
+    return CustomJsonEncoder().encode({'id': game_id, 'path': "/games/{}".format(game_id)}), 201
+
+
+# Not found unless profiling is on. Statements that run many times per request are loading row by row.
+@app.route("/debug/sql")
+def debug_sql():
+    if not SqlProfiler.is_enabled():
+        return "SQL profiling is off", 404
+
+    top_n: int = request.args.get("top", app.config["SQL_PROFILING_TOP_N"], type=int)
+    report = {'statements': SqlProfiler.top_statements(top_n),
+              'methods': SqlProfiler.methods()}
+
+    if request.args.get("reset") is not None:
+        SqlProfiler.reset()
+
+    return CustomJsonEncoder().encode(report)
+
+
 if __name__ == "__main__":
     app.run(host='0.0.0.0')
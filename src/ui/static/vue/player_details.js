@@ -156,6 +156,8 @@ const apiThrow = async (id, index, urlbase) => {
 Vue.component('player-details', {
     props: {
         id: '',
+        // Path of the game the page is for, empty for the default game
+        game: {type: String, default: ''},
     },
     data() {
         return {
@@ -174,9 +176,12 @@ Vue.component('player-details', {
         };
     },
     async created() {
-        await this.loadPlayer(this.id, this.hostname);
+        await this.loadPlayer(this.id, this.api_host);
     },
     computed: {
+        api_host: function () {
+            return this.hostname + this.game;
+        },
         program_hand_filenames: function () {
             return this.program_hand.map(x => this.url_base + "program_cards/" + x.filename);
         },
@@ -187,11 +192,11 @@ Vue.component('player-details', {
     },
     methods: {
         async loadPlayer(id) {
-            this.player = await apiGetPlayer(id, this.hostname);
+            this.player = await apiGetPlayer(id, this.api_host);
             [this.program_hand, this.power_hand, this.registers] = fixupPlayer(this.player);
         },
         async drawPowerCard() {
-            this.player = await apiDrawPowerCard(this.player.id, this.hostname);
+            this.player = await apiDrawPowerCard(this.player.id, this.api_host);
             [this.program_hand, this.power_hand, this.registers] = fixupPlayer(this.player);
         },
         startDrag(evt, index, list) {
@@ -206,29 +211,29 @@ Vue.component('player-details', {
 
             if ((fromList == "registers" && toList == "program_hand") ||
                 (fromList == "program_hand" && toList == "registers")) {
-                this.player = await apiTransferCard(this.player.id, fromList, fromIndex, toList, toIndex, this.hostname);
+                this.player = await apiTransferCard(this.player.id, fromList, fromIndex, toList, toIndex, this.api_host);
                 [this.program_hand, this.power_hand, this.registers] = fixupPlayer(this.player);
             }
         },
         async discardCard(fromIndex, fromList) {
-            this.player = await apiDiscardCard(this.player.id, fromList, fromIndex, this.hostname);
+            this.player = await apiDiscardCard(this.player.id, fromList, fromIndex, this.api_host);
             [this.program_hand, this.power_hand, this.registers] = fixupPlayer(this.player);
         },
         async setOrb(evt) {
             var value = JSON.parse(evt.target.value);
-            this.player = await apiSetOrb(this.player.id, value.filename, value.index, this.hostname);
+            this.player = await apiSetOrb(this.player.id, value.filename, value.index, this.api_host);
             [this.program_hand, this.power_hand, this.registers] = fixupPlayer(this.player);
         },
         async setNumUses(evt) {
             var value = JSON.parse(evt.target.value);
-            this.player = await apiSetNumUses(this.player.id, value.filename, value.index, this.hostname);
+            this.player = await apiSetNumUses(this.player.id, value.filename, value.index, this.api_host);
             [this.program_hand, this.power_hand, this.registers] = fixupPlayer(this.player);
         },
         openInNewTab: function (url) {
             window.open(url, "_blank");
         },
         async onCheck(index) {
-            this.player = await apiThrow(this.player.id, index, this.hostname);
+            this.player = await apiThrow(this.player.id, index, this.api_host);
             [this.program_hand, this.power_hand, this.registers] = fixupPlayer(this.player);
         }
     },
@@ -86,6 +86,10 @@ const updatePlayer = function (player, players) {
 }
 
 Vue.component('public-cards', {
+    props: {
+        // Path of the game the page is for, empty for the default game
+        game: {type: String, default: ''},
+    },
     data() {
         return {
             players: [],
@@ -102,13 +106,18 @@ Vue.component('public-cards', {
     async created() {
         await this.loadPlayers();
     },
+    computed: {
+        api_host: function () {
+            return this.hostname + this.game;
+        },
+    },
     methods: {
         async loadPlayers() {
-            var players = await apiGetPlayers(this.hostname);
+            var players = await apiGetPlayers(this.api_host);
             players.map(x => this.players.push(getPowerCardsAndRegisters(x)));
         },
         async drawPowerCard(id) {
-            var player = await apiDrawPowerCard(id, this.hostname);
+            var player = await apiDrawPowerCard(id, this.api_host);
             updatePlayer(player, this.players);
         },
         startDrag(evt, index, id) {
@@ -121,22 +130,22 @@ Vue.component('public-cards', {
             const fromId = evt.dataTransfer.getData('fromId');
             const fromIndex = parseInt(evt.dataTransfer.getData('fromIndex'));
 
-            var [fromPlayer, toPlayer] = await apiTransferCardBetweenPlayers(fromId, fromIndex, toId, toIndex, this.hostname);
+            var [fromPlayer, toPlayer] = await apiTransferCardBetweenPlayers(fromId, fromIndex, toId, toIndex, this.api_host);
             updatePlayer(fromPlayer, this.players);
             updatePlayer(toPlayer, this.players);
         },
         async discardCard(fromIndex, fromId) {
-            var player = await apiDiscardCardById(fromId, fromIndex, this.hostname);
+            var player = await apiDiscardCardById(fromId, fromIndex, this.api_host);
             updatePlayer(player, this.players);
         },
         async setOrb(evt) {
             var value = JSON.parse(evt.target.value);
-            var player = await apiSetOrb(value.id, value.filename, value.index, this.hostname);
+            var player = await apiSetOrb(value.id, value.filename, value.index, this.api_host);
             updatePlayer(player, this.players);
         },
         async setNumUses(evt) {
             var value = JSON.parse(evt.target.value);
-            var player = await apiSetNumUses(value.id, value.filename, value.index, this.hostname);
+            var player = await apiSetNumUses(value.id, value.filename, value.index, this.api_host);
             updatePlayer(player, this.players);
         },
         openInNewTab: function (url) {
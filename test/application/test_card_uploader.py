@@ -1,9 +1,14 @@
 import os
+import shutil
 
+import pytest
 from assertpy import assert_that
 
 from application.card_uploader import CardUploader
+from common.engine_registry import EngineRegistry
 from common.enums import CardType
+from domain.card_respository import CardRepository
+from support.database import create_database, StatementCounter
 from support.fake_card_repository import FakeCardRepository
 
 
@@ -17,3 +22,44 @@ def test_refresh_all_cards_valid():
     assert_that(prog_cards).extracting('number').is_equal_to([90, 1070])
     prog_cards = repo.get_all_by_type(CardType.POWER)
     assert_that(prog_cards).extracting('number').is_equal_to([1, 55, 107, 1004])
+
+
+@pytest.fixture
+def card_directory(tmp_path):
+    shutil.copytree(os.path.join(os.getcwd(), "support", "images"), str(tmp_path / "images" / CardUploader.IMAGE_DIRECTORY))
+    database: str = create_database(str(tmp_path))
+
+    yield str(tmp_path / "images"), CardRepository(database)
+
+    EngineRegistry.dispose(database)
+
+
+def test_refresh_unchanged_skipped(card_directory):
+    base_dir, repo = card_directory
+    uploader = CardUploader(base_dir, repo)
+    uploader.refresh_all_cards()
+
+    with StatementCounter(repo.database) as counter:
+        uploader.refresh_all_cards()
+
+    assert_that(counter.statements).is_length(1)
+    assert_that(counter.statements[0]).starts_with("SELECT")
+    assert_that(repo.get_all_by_type(CardType.POWER)).extracting('number').is_equal_to([1, 55, 107, 1004])
+
+
+def test_refresh_applies_changes(card_directory):
+    base_dir, repo = card_directory
+    uploader = CardUploader(base_dir, repo)
+    uploader.refresh_all_cards()
+
+    power_dir: str = os.path.join(base_dir, CardUploader.IMAGE_DIRECTORY, "power_cards")
+    os.remove(os.path.join(power_dir, "055_TwistAndTurnLaser.png"))
+    shutil.copy(os.path.join(power_dir, "001_Functor.png"), os.path.join(power_dir, "042_Answer.png"))
+
+    with StatementCounter(repo.database) as counter:
+        uploader.refresh_all_cards()
+
+    assert_that([x for x in counter.statements if x.startswith("INSERT")]).is_length(2)
+    assert_that(repo.get_all_by_type(CardType.POWER)).extracting('number').is_equal_to([1, 42, 107, 1004])
+    assert_that(repo.get_all_by_type(CardType.PROGRAM)).extracting('number').is_equal_to([90, 1070])
+    assert_that(repo.get_manifest()).contains_key((CardType.POWER, "042_Answer.png"))
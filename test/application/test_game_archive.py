@@ -0,0 +1,79 @@
+import io
+import os
+
+import pytest
+from assertpy import assert_that
+
+from common.engine_registry import EngineRegistry
+from common.enums import DeckStorageFormat
+from domain.aggregate_codec import AggregateCodec
+from domain.card_catalog import CardCatalog
+from domain.game_archive import GameArchive
+from support.database import create_database, create_game_service
+
+
+@pytest.fixture
+def service(tmp_path, request):
+    storage_format: DeckStorageFormat = getattr(request, "param", DeckStorageFormat.ROWS)
+    database: str = create_database(str(tmp_path))
+
+    yield create_game_service(str(tmp_path), database, storage_format,
+                              restore_point_directory=str(tmp_path / "restore_points"))
+
+    CardCatalog.invalidate(database)
+    EngineRegistry.dispose(database)
+
+
+def _state(game, players):
+    return AggregateCodec.values_from_game(game), [AggregateCodec.values_from_player(x) for x in players]
+
+
+# ------------------
+
+@pytest.mark.parametrize("service", [DeckStorageFormat.ROWS, DeckStorageFormat.PACKED], indirect=True)
+def test_export_import(service, tmp_path):
+    for name in ["Cloud", "Tifa"]:
+        service.add_player(name, name.lower() + ".gif")
+
+    service.start_new_turn()
+    service.inc_damage(service.players[0])
+    service.throw(service.players[1], 2)
+    service.add_game_notes("Midgar")
+    service.add_board_state("sector_7.png")
+    expected = _state(service.game, service.players)
+    archive = io.BytesIO()
+    service.export_game(archive)
+
+    service.start_new_game(str(tmp_path / "board_states"))
+    service.add_player("Barret", "barret.gif")
+    service.import_game(io.BytesIO(archive.getvalue()))
+
+    assert_that(_state(service.game, service.players)).is_equal_to(expected)
+    assert_that(_state(*service.rebuild_from_history())).is_equal_to(expected)
+    assert_that(os.listdir(str(tmp_path / "restore_points"))).is_length(1)
+
+    service.inc_damage(service.players[0])
+    assert_that(service.players[0].damage).is_equal_to(2)
+
+
+def test_restore_point(service, tmp_path):
+    service.add_player("Cloud", "cloud.gif")
+    expected = _state(service.game, service.players)
+    service.start_new_game(str(tmp_path / "board_states"))
+
+    filename: str = os.listdir(str(tmp_path / "restore_points"))[0]
+    with open(str(tmp_path / "restore_points" / filename), "rb") as file:
+        game, players = GameArchive.read(file)
+
+    assert_that(_state(game, players)).is_equal_to(expected)
+
+
+def test_not_an_archive(service):
+    with pytest.raises(ValueError):
+        service.import_game(io.BytesIO(b"roborally.db"))
+
+    archive = io.BytesIO()
+    service.export_game(archive)
+
+    with pytest.raises(ValueError):
+        service.import_game(io.BytesIO(archive.getvalue()[:-10]))
@@ -0,0 +1,227 @@
+import threading
+from typing import List
+
+import pytest
+from assertpy import assert_that
+
+from application.game_service import GameService
+from common.engine_registry import EngineRegistry
+from common.enums import GameEventType
+from common.unit_of_work import UnitOfWork
+from core.card import Card
+from core.card_move import CardMove
+from core.game_event import GameEvent
+from domain.card_catalog import CardCatalog
+from support.database import create_database, create_game_service
+
+
+@pytest.fixture
+def service(tmp_path):
+    database: str = create_database(str(tmp_path))
+
+    yield create_game_service(str(tmp_path), database)
+
+    CardCatalog.invalidate(database)
+    EngineRegistry.dispose(database)
+
+
+def _numbers(deck):
+    return [x.number for x in deck.cards]
+
+
+def _assert_same(rebuilt, service):
+    game, players = rebuilt
+    saved = service.players
+
+    assert_that(game.turn).is_equal_to(service.game.turn)
+    assert_that(game.notes).is_equal_to(service.game.notes)
+    assert_that(_numbers(game.program_deck)).is_equal_to(_numbers(service.game.program_deck))
+    assert_that(_numbers(game.power_deck)).is_equal_to(_numbers(service.game.power_deck))
+    assert_that(players).extracting('id').is_equal_to([x.id for x in saved])
+
+    for player, saved_player in zip(players, saved):
+        assert_that(player.damage).is_equal_to(saved_player.damage)
+        assert_that(player.is_active).is_equal_to(saved_player.is_active)
+        assert_that(_numbers(player.program_hand)).is_equal_to(_numbers(saved_player.program_hand))
+        assert_that(_numbers(player.power_hand)).is_equal_to(_numbers(saved_player.power_hand))
+        assert_that(player.registers.cards).extracting('number') \
+            .is_equal_to([x.number for x in saved_player.registers.cards])
+        assert_that(player.registers.locks).is_equal_to(saved_player.registers.locks)
+
+
+def test_event_round_trip():
+    event = GameEvent(GameEventType.THROW, {'player_id': "abc", 'register': 2}, 7)
+
+    assert_that(GameEvent("throw", {'player_id': "abc", 'register': 2}, 7, event.created)).is_equal_to(event)
+    assert_that(event.get("register")).is_equal_to(2)
+
+
+def test_rebuild_matches_saved(service):
+    cloud = service.add_player("Cloud", "cloud.gif")
+    tifa = service.add_player("Tifa", "tifa.gif")
+    service.inc_damage(cloud)
+    service.inc_damage(cloud)
+    service.transfer_card(cloud, "program_hand", 0, cloud, "registers", 0)
+    service.draw_power_card(tifa)
+    service.add_game_notes("Watch the pit")
+    service.start_new_turn()
+    service.set_active(service.get_player(tifa.id), False)
+
+    _assert_same(service.rebuild_from_history(), service)
+    assert_that(service.get_history()).extracting('type').contains(GameEventType.NEW_TURN, GameEventType.SET_ACTIVE)
+
+
+def test_rebuild_from_snapshot(service):
+    cloud = service.add_player("Cloud", "cloud.gif")
+
+    for _ in range(GameService.SNAPSHOT_INTERVAL):
+        service.inc_damage(cloud)
+        service.dec_damage(cloud)
+
+    service.inc_damage(cloud)
+    events = service.get_history(GameService.SNAPSHOT_INTERVAL)
+
+    assert_that(events).is_not_empty()
+    assert_that(events[0].sequence).is_equal_to(GameService.SNAPSHOT_INTERVAL + 1)
+    _assert_same(service.rebuild_from_history(), service)
+
+
+def test_seed_replays_game(service, tmp_path):
+    for name in ["Cloud", "Tifa"]:
+        service.add_player(name, name.lower() + ".gif")
+
+    dealt = []
+
+    for _ in range(2):
+        service.start_new_game(str(tmp_path / "board_states"), seed=7)
+        service.start_new_turn()
+        dealt.append([_numbers(x.program_hand) + _numbers(x.power_hand) for x in service.players] +
+                     [_numbers(service.game.program_deck), _numbers(service.game.power_deck)])
+
+    game, players = service.rebuild_from_history()
+
+    assert_that(dealt[1]).is_equal_to(dealt[0])
+    assert_that(service.game.seed).is_equal_to(7)
+    assert_that(service.game.shuffle_count).is_equal_to(3)
+    assert_that(game.shuffle_count).is_equal_to(3)
+
+
+def test_move_cards(service):
+    cloud = service.add_player("Cloud", "cloud.gif")
+    service.start_new_turn()
+    cloud = service.get_player(cloud.id)
+    hand = _numbers(cloud.program_hand)
+    moves = [CardMove("program_hand", 0, "registers", i) for i in range(0, 5)] + \
+        [CardMove("registers", 4, "program_hand", 0)]
+
+    service.move_cards(cloud, moves)
+    saved = service.get_player(cloud.id)
+
+    assert_that(saved.registers.cards).extracting('number').is_equal_to(hand[0:4] + [Card.NUMBER_EMPTY])
+    assert_that(_numbers(saved.program_hand)).is_equal_to([hand[4]] + hand[5:])
+    assert_that(service.get_history()[-1].type).is_equal_to(GameEventType.MOVE_CARDS)
+    _assert_same(service.rebuild_from_history(), service)
+
+
+def test_move_cards_all_or_nothing(service):
+    cloud = service.add_player("Cloud", "cloud.gif")
+    service.start_new_turn()
+    cloud = service.get_player(cloud.id)
+    hand = _numbers(cloud.program_hand)
+    moves = [CardMove("program_hand", 0, "registers", 0), CardMove("program_hand", 0, "registers", 1),
+             CardMove("program_hand", 20, "registers", 2)]
+
+    with pytest.raises(IndexError):
+        service.move_cards(cloud, moves)
+
+    assert_that(_numbers(cloud.program_hand)).is_equal_to(hand)
+    assert_that(cloud.registers.cards).extracting('number').is_equal_to([Card.NUMBER_EMPTY] * 5)
+    assert_that(_numbers(service.get_player(cloud.id).program_hand)).is_equal_to(hand)
+
+
+def test_lock_choices(service):
+    cloud = service.add_player("Cloud", "cloud.gif")
+    service.start_new_turn()
+    cloud = service.get_player(cloud.id)
+
+    for i in range(0, 5):
+        service.inc_damage(cloud)
+
+    service.move_cards(cloud, [CardMove("program_hand", 0, "registers", i) for i in range(0, 4)])
+    service.lock_choices(cloud)
+
+    assert_that(service.get_player(cloud.id).registers.locks).is_equal_to([True] * 5)
+    assert_that(service.get_history()[-1].type).is_equal_to(GameEventType.LOCK_CHOICES)
+    _assert_same(service.rebuild_from_history(), service)
+
+    service.start_new_turn()
+    cloud = service.get_player(cloud.id)
+
+    assert_that(cloud.registers.locks).is_equal_to([False] * 4 + [True])
+    assert_that(cloud.registers.cards).extracting('number').is_equal_to([Card.NUMBER_EMPTY] * 5)
+    _assert_same(service.rebuild_from_history(), service)
+
+
+def test_unlock_choices(service):
+    cloud = service.add_player("Cloud", "cloud.gif")
+    service.start_new_turn()
+    cloud = service.get_player(cloud.id)
+    service.inc_damage(cloud)
+    service.lock_choices(cloud)
+    service.unlock_choices(cloud)
+
+    assert_that(service.get_player(cloud.id).registers.locks).is_equal_to([False] * 5)
+    assert_that(service.get_history()[-1].type).is_equal_to(GameEventType.UNLOCK_CHOICES)
+    _assert_same(service.rebuild_from_history(), service)
+
+
+def test_threads_take_turns(service):
+    players = [service.add_player("Player {}".format(i), "avatar.gif") for i in range(0, 4)]
+    before: int = len(service.get_history())
+    errors: List[Exception] = []
+
+    def play(id: str):
+        try:
+            for i in range(0, 10):
+                service.add_game_notes("{} {}".format(id, i))
+                service.set_instructions(service.get_player(id), "Turn {}".format(i))
+        except Exception as err:
+            errors.append(err)
+
+    threads = [threading.Thread(target=play, args=(x.id,)) for x in players]
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert_that(errors).is_empty()
+    assert_that(service.get_history()).is_length(before + 80)
+    _assert_same(service.rebuild_from_history(), service)
+
+
+def test_threads_take_turns_in_requests(service):
+    players = [service.add_player("Player {}".format(i), "avatar.gif") for i in range(0, 4)]
+    before: int = len(service.get_history())
+    errors: List[Exception] = []
+
+    def play(id: str):
+        try:
+            for i in range(0, 5):
+                # Like a request, nothing is committed until the unit of work ends after several changes
+                with UnitOfWork():
+                    service.add_game_notes("{} {}".format(id, i))
+                    service.set_instructions(service.get_player(id), "Turn {}".format(i))
+        except Exception as err:
+            errors.append(err)
+
+    threads = [threading.Thread(target=play, args=(x.id,)) for x in players]
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert_that(errors).is_empty()
+    assert_that(service.get_history()).is_length(before + 40)
+    _assert_same(service.rebuild_from_history(), service)
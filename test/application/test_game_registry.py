@@ -0,0 +1,94 @@
+import pytest
+from assertpy import assert_that
+
+from application.game_registry import GameRegistry
+
+
+class FakeGames:
+    def __init__(self, existing=None):
+        self.opened = []
+        self.closed = []
+        self.existing = set(["table-2"] if existing is None else existing)
+
+    def open_game(self, game_id: str):
+        self.opened.append(game_id)
+        self.existing.add(game_id)
+
+        return "service for {}".format(game_id), lambda: self.closed.append(game_id)
+
+    def exists(self, game_id: str) -> bool:
+        return game_id in self.existing
+
+
+def test_opened_once():
+    games = FakeGames()
+    registry = GameRegistry(games.open_game, games.exists)
+
+    assert_that(registry.get("table-2")).is_equal_to("service for table-2")
+    assert_that(registry.get("table-2")).is_equal_to("service for table-2")
+    assert_that(registry.get()).is_equal_to("service for default")
+    assert_that(games.opened).is_equal_to(["table-2", "default"])
+    assert_that(registry.game_ids).is_equal_to(["default", "table-2"])
+
+
+def test_invalid_id():
+    registry = GameRegistry(FakeGames().open_game, FakeGames().exists)
+
+    for game_id in ["", "../roborally", "a b", "abc\n", "x" * 65, None]:
+        with pytest.raises(ValueError):
+            registry.get(game_id)
+
+
+def test_idle_games_closed():
+    games = FakeGames()
+    registry = GameRegistry(games.open_game, games.exists, idle_ttl_s=0)
+    registry.get()
+    registry.get("table-2")
+
+    assert_that(registry.evict_idle()).is_equal_to(["table-2"])
+    assert_that(games.closed).is_equal_to(["table-2"])
+    assert_that(registry.game_ids).is_equal_to(["default"])
+
+    registry.get("table-2")
+    registry.close()
+
+    assert_that(games.opened).is_equal_to(["default", "table-2", "table-2"])
+    assert_that(games.closed).contains_only("table-2", "default")
+    assert_that(registry.game_ids).is_empty()
+
+
+def test_only_created_games_opened():
+    games = FakeGames(existing=[])
+    registry = GameRegistry(games.open_game, games.exists)
+
+    assert_that(registry.get("table-3")).is_none()
+    assert_that(registry.acquire("table-3")).is_none()
+    assert_that(games.opened).is_empty()
+
+    assert_that(registry.create("table-3")).is_equal_to("service for table-3")
+    assert_that(registry.get("table-3")).is_equal_to("service for table-3")
+    assert_that(games.opened).is_equal_to(["table-3"])
+
+    with pytest.raises(ValueError):
+        registry.create("table-3")
+
+    with pytest.raises(ValueError):
+        registry.create(GameRegistry.DEFAULT_GAME_ID)
+
+
+def test_games_in_use_not_closed():
+    games = FakeGames()
+    registry = GameRegistry(games.open_game, games.exists, idle_ttl_s=0)
+    registry.acquire("table-2")
+
+    assert_that(registry.evict_idle()).is_empty()
+
+    registry.release("table-2")
+
+    assert_that(registry.evict_idle()).is_equal_to(["table-2"])
+    assert_that(games.closed).is_equal_to(["table-2"])
+
+
+def test_is_valid_id():
+    assert_that(GameRegistry.is_valid_id("table-2")).is_true()
+    assert_that(GameRegistry.is_valid_id("abc\n")).is_false()
@@ -0,0 +1,167 @@
+import logging
+import threading
+from typing import List
+
+import pytest
+from assertpy import assert_that
+from sqlalchemy import event
+
+from application.write_behind_queue import WriteBehindQueue
+from common.engine_registry import EngineRegistry
+from common.entity import Entity
+from common.unit_of_work import ConcurrentUpdateError
+from core.player import Player, PlayerProps
+from domain.player_factory import PlayerFactory
+from domain.player_respository import PlayerRepository
+from support.database import create_database
+
+
+def _new_player(name: str) -> Player:
+    props: PlayerProps = PlayerProps()
+    props.name = name
+    props.avatar_filename = "one.jpg"
+
+    return PlayerFactory.new_player(props)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    database: str = create_database(str(tmp_path))
+
+    yield PlayerRepository(database)
+
+    EngineRegistry.dispose(database)
+
+
+def test_coalesces_changes():
+    saved: List[Entity] = []
+    queue = WriteBehindQueue(saved.append, window_ms=10000)
+    player: Player = _new_player("Lance Uppercut")
+
+    for i in range(0, 3):
+        with queue.lock:
+            player.inc_damage()
+            queue.enqueue(player)
+
+    assert_that(queue.pending(player.id)).is_same_as(player)
+    assert_that(queue.pending_count).is_equal_to(1)
+
+    queue.close()
+
+    assert_that(saved).is_equal_to([player])
+    assert_that(queue.pending_count).is_equal_to(0)
+
+
+def test_full_queue_flushes():
+    saved: List[Entity] = []
+    queue = WriteBehindQueue(saved.append, window_ms=10000, max_pending=2)
+
+    queue.enqueue(_new_player("Lance Uppercut"))
+    assert_that(saved).is_empty()
+
+    queue.enqueue(_new_player("Wingus"))
+    assert_that(saved).is_length(2)
+
+    queue.close()
+
+
+def test_writes_in_background():
+    written = threading.Event()
+    queue = WriteBehindQueue(lambda x: written.set(), window_ms=1)
+
+    queue.enqueue(_new_player("Lance Uppercut"))
+
+    assert_that(written.wait(5)).is_true()
+    queue.close()
+
+
+def test_batch_committed_once(repo):
+    commits = []
+    event.listen(EngineRegistry.get_engine(repo.database), "commit", lambda conn: commits.append(conn))
+    queue = WriteBehindQueue(repo.save, window_ms=10000)
+    players: List[Player] = [_new_player("Lance Uppercut"), _new_player("Wingus")]
+
+    for player in players:
+        queue.enqueue(player)
+
+    queue.close()
+
+    assert_that(commits).is_length(1)
+    assert_that(repo.get_all()).is_length(2)
+
+
+def test_failed_save_keeps_others(repo):
+    bad: Player = _new_player("Lance Uppercut")
+    good: Player = _new_player("Wingus")
+
+    def save(player: Player):
+        if player is bad:
+            raise ValueError("Boom")
+
+        repo.save(player)
+
+    queue = WriteBehindQueue(save, window_ms=10000)
+    queue.enqueue(bad)
+    queue.enqueue(good)
+    queue.close()
+
+    assert_that(repo.get_all()).extracting('name').is_equal_to(["Wingus"])
+
+
+def test_failed_save_tried_again(repo):
+    player: Player = _new_player("Lance Uppercut")
+    failures: List[int] = [2]
+
+    def save(aggregate: Player):
+        if failures[0] > 0:
+            failures[0] -= 1
+            raise ValueError("Database is locked")
+
+        repo.save(aggregate)
+
+    queue = WriteBehindQueue(save, window_ms=10000)
+    queue.enqueue(player)
+    queue.flush()
+
+    assert_that(queue.pending(player.id)).is_same_as(player)
+
+    queue.close()
+
+    assert_that(repo.get_all()).extracting('name').is_equal_to(["Lance Uppercut"])
+    assert_that(player.is_stale).is_false()
+
+
+def test_failed_save_given_up(caplog):
+    player: Player = _new_player("Lance Uppercut")
+    attempts: List[Player] = []
+
+    def save(aggregate: Player):
+        attempts.append(aggregate)
+        raise ValueError("Boom")
+
+    queue = WriteBehindQueue(save, window_ms=10000)
+    queue.enqueue(player)
+
+    with caplog.at_level(logging.WARNING):
+        queue.close()
+
+    assert_that(attempts).is_length(WriteBehindQueue.MAX_ATTEMPTS)
+    assert_that(player.is_stale).is_true()
+    assert_that(queue.pending_count).is_equal_to(0)
+    assert_that(caplog.records).extracting('levelname').is_equal_to(["WARNING", "WARNING", "ERROR"])
+
+
+def test_conflict_not_tried_again():
+    player: Player = _new_player("Lance Uppercut")
+    attempts: List[Player] = []
+
+    def save(aggregate: Player):
+        attempts.append(aggregate)
+        raise ConcurrentUpdateError("Changed by someone else")
+
+    queue = WriteBehindQueue(save, window_ms=10000)
+    queue.enqueue(player)
+    queue.close()
+
+    assert_that(attempts).is_length(1)
+    assert_that(player.is_stale).is_true()
@@ -0,0 +1,143 @@
+import sqlite3
+
+import pytest
+from assertpy import assert_that
+from sqlalchemy import update
+
+from common.engine_registry import EngineRegistry
+from common.state_version import StateVersion
+from common.unit_of_work import UnitOfWork
+from core.player import Player, PlayerProps
+from domain.player_factory import PlayerFactory
+from domain.models.player_model import PlayerModel
+from domain.player_respository import PlayerRepository
+from support.database import create_database, StatementCounter
+
+
+@pytest.fixture
+def saved_player(tmp_path):
+    database: str = create_database(str(tmp_path))
+    repo = PlayerRepository(database)
+
+    props: PlayerProps = PlayerProps()
+    props.name = "Lance Uppercut"
+    props.avatar_filename = "one.jpg"
+    player: Player = PlayerFactory.new_player(props)
+    repo.save(player)
+
+    yield player, repo, database
+
+    EngineRegistry.dispose(database)
+
+
+def test_get_cached(saved_player):
+    player, repo, database = saved_player
+
+    with StatementCounter(database) as counter:
+        repo_player: Player = repo.get_by_id(player.id)
+        players = repo.get_all()
+        players_again = repo.get_all()
+
+    assert_that(repo_player).is_equal_to(player)
+    assert_that(players_again[0]).is_equal_to(players[0])
+    assert_that(players[0]).is_equal_to(player)
+    assert_that(counter.count).is_greater_than(0)
+
+    with StatementCounter(database) as counter:
+        cached: Player = repo.get_by_id(player.id)
+        assert_that(repo.get_all()[0]).is_equal_to(player)
+
+    assert_that(counter.count).is_equal_to(0)
+    assert_that(cached).is_not_same_as(player)
+    assert_that(cached.name).is_equal_to(player.name)
+    assert_that(cached.version).is_equal_to(player.version)
+    assert_that(cached.has_changes).is_false()
+
+
+def test_changes_to_cached_not_shared(saved_player):
+    player, repo, database = saved_player
+    first: Player = repo.get_by_id(player.id)
+    first.inc_damage()
+    first.program_hand.populate([])
+
+    second: Player = repo.get_by_id(player.id)
+
+    assert_that(second).is_not_same_as(first)
+    assert_that(second.damage).is_equal_to(0)
+    assert_that(second.has_changes).is_false()
+    assert_that(repo.get_all()[0].damage).is_equal_to(0)
+
+
+def test_write_from_other_worker(saved_player):
+    player, repo, database = saved_player
+    repo.get_all()
+
+    with sqlite3.connect(database) as conn:
+        conn.execute("UPDATE player SET damage = 3 WHERE id = ?", (player.id,))
+        conn.execute("UPDATE state_version SET version = version + 1")
+
+    assert_that(repo.get_by_id(player.id).damage).is_equal_to(3)
+    assert_that(repo.get_all()).extracting('damage').is_equal_to([3])
+
+
+def test_unsaved_changes_not_served(saved_player):
+    player, repo, database = saved_player
+    player.inc_damage()
+
+    repo_player: Player = repo.get_by_id(player.id)
+
+    assert_that(repo_player).is_not_same_as(player)
+    assert_that(repo_player.damage).is_equal_to(0)
+
+
+def test_rollback_evicts(saved_player):
+    player, repo, database = saved_player
+
+    with pytest.raises(ValueError):
+        with UnitOfWork():
+            player.inc_damage()
+            repo.save(player)
+            raise ValueError("Boom")
+
+    assert_that(repo.get_by_id(player.id).damage).is_equal_to(0)
+
+
+def test_one_version_per_commit(saved_player):
+    player, repo, database = saved_player
+    version: int = StateVersion.current(database)
+
+    with UnitOfWork():
+        player.inc_damage()
+        repo.save(player)
+        repo.save(PlayerFactory.new_player(PlayerProps()))
+
+    assert_that(StateVersion.current(database)).is_equal_to(version + 1)
+
+    repo.get_all()
+    assert_that(StateVersion.current(database)).is_equal_to(version + 1)
+
+
+def test_own_save_keeps_cache(saved_player):
+    player, repo, database = saved_player
+    other: Player = PlayerFactory.new_player(PlayerProps())
+    repo.save(other)
+    repo.get_all()
+
+    player.inc_damage()
+    repo.save(player)
+
+    with StatementCounter(database) as counter:
+        players = repo.get_all()
+
+    assert_that(counter.count).is_equal_to(0)
+    assert_that(players).contains(player, other)
+
+
+def test_untracked_write_clears_cache(saved_player):
+    player, repo, database = saved_player
+    repo.get_all()
+
+    with repo.get_session_begin() as session:
+        session.execute(update(PlayerModel).where(PlayerModel.id == player.id).values(damage=2))
+
+    assert_that(repo.get_by_id(player.id).damage).is_equal_to(2)
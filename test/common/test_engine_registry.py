@@ -0,0 +1,76 @@
+import os
+
+import pytest
+import sqlalchemy.exc
+from assertpy import assert_that
+from sqlalchemy import text
+
+from common.engine_registry import EngineRegistry
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = os.path.join(str(tmp_path), "registry.db")
+    yield path
+
+    EngineRegistry.dispose(path)
+
+
+def test_get_engine_shared_by_path(database):
+    engine = EngineRegistry.get_engine(database)
+
+    assert_that(EngineRegistry.get_engine(database)).is_same_as(engine)
+    assert_that(EngineRegistry.get_engine(os.path.join(os.path.dirname(database), ".", "registry.db"))) \
+        .is_same_as(engine)
+    assert_that(EngineRegistry.get_engine(database, read_only=True)).is_not_same_as(engine)
+
+
+def test_pragmas(database):
+    with EngineRegistry.get_engine(database).connect() as conn:
+        assert_that(conn.exec_driver_sql("PRAGMA journal_mode").scalar()).is_equal_to("wal")
+        assert_that(conn.exec_driver_sql("PRAGMA synchronous").scalar()).is_equal_to(1)  # NORMAL
+        assert_that(conn.exec_driver_sql("PRAGMA query_only").scalar()).is_equal_to(0)
+
+    with EngineRegistry.get_engine(database, read_only=True).connect() as conn:
+        assert_that(conn.exec_driver_sql("PRAGMA query_only").scalar()).is_equal_to(1)
+
+
+def test_configure_reaches_existing_engines(database):
+    engine = EngineRegistry.get_engine(database)
+
+    with engine.connect():
+        pass
+
+    try:
+        EngineRegistry.configure(cache_size_kb=1234, busy_timeout_ms=777)
+
+        with EngineRegistry.get_engine(database).connect() as conn:
+            assert_that(conn.exec_driver_sql("PRAGMA cache_size").scalar()).is_equal_to(-1234)
+            assert_that(conn.exec_driver_sql("PRAGMA busy_timeout").scalar()).is_equal_to(777)
+    finally:
+        EngineRegistry.configure(cache_size_kb=EngineRegistry.DEFAULT_CACHE_SIZE_KB,
+                                 busy_timeout_ms=EngineRegistry.DEFAULT_BUSY_TIMEOUT_MS)
+
+
+def test_read_only_rejects_writes(database):
+    with EngineRegistry.get_engine(database).begin() as conn:
+        conn.execute(text("CREATE TABLE item (value INTEGER)"))
+        conn.execute(text("INSERT INTO item VALUES (1)"))
+
+    with EngineRegistry.get_engine(database, read_only=True).connect() as conn:
+        assert_that(conn.execute(text("SELECT value FROM item")).scalar()).is_equal_to(1)
+
+        with pytest.raises(sqlalchemy.exc.OperationalError):
+            conn.execute(text("INSERT INTO item VALUES (2)"))
+
+
+def test_reader_runs_alongside_writer(database):
+    with EngineRegistry.get_engine(database).begin() as conn:
+        conn.execute(text("CREATE TABLE item (value INTEGER)"))
+        conn.execute(text("INSERT INTO item VALUES (1)"))
+
+    with EngineRegistry.get_engine(database).begin() as writer:
+        writer.execute(text("INSERT INTO item VALUES (2)"))
+
+        with EngineRegistry.get_engine(database, read_only=True).connect() as reader:
+            assert_that(reader.execute(text("SELECT COUNT(*) FROM item")).scalar()).is_equal_to(1)
@@ -0,0 +1,81 @@
+import os
+
+import pytest
+from assertpy import assert_that
+from sqlalchemy import text
+
+from common.engine_registry import EngineRegistry
+from common.sql_profiler import SqlProfiler, SqlProfile
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = os.path.join(str(tmp_path), "profiler.db")
+
+    with EngineRegistry.get_engine(path).begin() as conn:
+        conn.execute(text("CREATE TABLE item (id INTEGER, value INTEGER)"))
+
+    SqlProfiler.reset()
+    SqlProfiler.enable()
+
+    yield path
+
+    SqlProfiler.disable()
+    SqlProfiler.reset()
+    EngineRegistry.dispose(path)
+
+
+@SqlProfiler.profile_methods
+class ItemStore:
+    def __init__(self, database: str):
+        self._database = database
+
+    @property
+    def count(self) -> int:
+        with EngineRegistry.get_engine(self._database).connect() as conn:
+            return conn.execute(text("SELECT count(*) FROM item")).scalar()
+
+    def add(self, ids):
+        with EngineRegistry.get_engine(self._database).begin() as conn:
+            for id in ids:
+                conn.execute(text("INSERT INTO item VALUES (:id, 0)"), {'id': id})
+
+
+def test_request_profile(database):
+    with SqlProfile("request") as profile:
+        ItemStore(database).add([1, 2, 3])
+        count = ItemStore(database).count
+
+    insert = [x for x in SqlProfiler.top_statements() if x.name.startswith("INSERT")][0]
+
+    assert_that(count).is_equal_to(3)
+    assert_that(profile.statements).is_equal_to(6)  # BEGINs included, since that is where lock waits show
+    assert_that(profile.rows).is_equal_to(3)
+    assert_that(profile.server_timing()).starts_with("sql;dur=").ends_with('desc="6 statements, 3 rows"')
+    assert_that(insert.statements).is_equal_to(3)
+    assert_that(insert.max_per_request).is_equal_to(3)
+
+
+def test_methods(database):
+    store = ItemStore(database)
+    store.add([1])
+    store.add([2, 3])
+    store.count
+
+    methods = {x.name: x for x in SqlProfiler.methods()}
+
+    assert_that(methods).contains_only("ItemStore.add", "ItemStore.count")
+    assert_that(methods["ItemStore.add"].calls).is_equal_to(2)
+    assert_that(methods["ItemStore.add"].statements).is_equal_to(5)  # with a BEGIN each
+    assert_that(methods["ItemStore.count"].attributes()).contains_entry({'calls': 1})
+
+
+def test_in_lists_grouped(database):
+    with EngineRegistry.get_engine(database).connect() as conn:
+        conn.exec_driver_sql("SELECT * FROM item WHERE id IN (?, ?)", (1, 2))
+        conn.exec_driver_sql("SELECT * FROM item WHERE id IN (?, ?, ?)", (1, 2, 3))
+
+    selects = [x for x in SqlProfiler.top_statements() if "WHERE id IN" in x.name]
+
+    assert_that(selects).extracting('name').is_equal_to(["SELECT * FROM item WHERE id IN (?, ...)"])
+    assert_that(selects[0].statements).is_equal_to(2)
@@ -0,0 +1,149 @@
+import sqlite3
+
+import pytest
+from assertpy import assert_that
+from sqlalchemy import event
+
+from common.engine_registry import EngineRegistry
+from common.unit_of_work import UnitOfWork, ConcurrentUpdateError
+from core.player import Player, PlayerProps
+from domain.player_factory import PlayerFactory
+from domain.player_respository import PlayerRepository
+from support.database import create_database
+
+
+def _new_player(name: str) -> Player:
+    props: PlayerProps = PlayerProps()
+    props.name = name
+    props.avatar_filename = "one.jpg"
+
+    return PlayerFactory.new_player(props)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    database: str = create_database(str(tmp_path))
+
+    yield PlayerRepository(database)
+
+    EngineRegistry.dispose(database)
+
+
+def test_commit_once(repo):
+    commits = []
+    event.listen(EngineRegistry.get_engine(repo.database), "commit", lambda conn: commits.append(conn))
+
+    with UnitOfWork():
+        repo.save(_new_player("Lance Uppercut"))
+        repo.save(_new_player("Wingus"))
+
+        assert_that(commits).is_empty()
+        assert_that(repo.get_all()).is_length(2)
+        assert_that(PlayerRepository(repo.database).get_all()).is_length(2)
+
+    assert_that(commits).is_length(1)
+    assert_that(repo.get_all()).is_length(2)
+
+
+def test_not_visible_until_commit(repo):
+    unit_of_work: UnitOfWork = UnitOfWork().begin()
+    repo.save(_new_player("Lance Uppercut"))
+
+    with EngineRegistry.get_engine(repo.database, read_only=True).connect() as conn:
+        assert_that(conn.exec_driver_sql("SELECT COUNT(*) FROM player").scalar()).is_equal_to(0)
+
+    unit_of_work.commit()
+
+    assert_that(repo.get_all()).is_length(1)
+    assert_that(UnitOfWork.current()).is_none()
+
+
+def test_rollback_on_error(repo):
+    player: Player = _new_player("Lance Uppercut")
+    repo.save(player)
+
+    with pytest.raises(ValueError):
+        with UnitOfWork():
+            player.inc_damage()
+            repo.save(player)
+            repo.save(_new_player("Wingus"))
+            raise ValueError("Boom")
+
+    assert_that(repo.get_all()).extracting('damage').is_equal_to([0])
+    assert_that(player.is_persisted).is_false()
+
+    repo.save(player)
+    assert_that(repo.get_by_id(player.id).damage).is_equal_to(1)
+
+
+def test_nested_joins_outer(repo):
+    with UnitOfWork() as outer:
+        with UnitOfWork():
+            repo.save(_new_player("Lance Uppercut"))
+
+        assert_that(UnitOfWork.current()).is_same_as(outer)
+
+        with EngineRegistry.get_engine(repo.database, read_only=True).connect() as conn:
+            assert_that(conn.exec_driver_sql("SELECT COUNT(*) FROM player").scalar()).is_equal_to(0)
+
+    assert_that(repo.get_all()).is_length(1)
+
+
+def test_nested_error_rolls_back_outer(repo):
+    with UnitOfWork() as outer:
+        repo.save(_new_player("Lance Uppercut"))
+
+        try:
+            with UnitOfWork():
+                raise ValueError("Boom")
+        except ValueError:
+            pass
+
+        assert_that(outer.is_rollback_only).is_true()
+
+    assert_that(repo.get_all()).is_empty()
+
+
+def test_run_retries_conflict(repo):
+    player: Player = _new_player("Lance Uppercut")
+    repo.save(player)
+    attempts = []
+
+    def operation():
+        current: Player = repo.get_by_id(player.id)
+
+        if len(attempts) == 0:
+            # Another worker saves the same player between this load and the save below
+            with sqlite3.connect(repo.database) as conn:
+                conn.execute("UPDATE player SET damage = damage + 1, version = version + 1 WHERE id = ?",
+                             (player.id,))
+                conn.execute("UPDATE state_version SET version = version + 1")
+
+        attempts.append(current)
+        current.inc_damage()
+        repo.save(current)
+
+    UnitOfWork.run(operation)
+
+    assert_that(attempts).is_length(2)
+    assert_that(attempts[0].is_stale).is_true()
+    assert_that(repo.get_by_id(player.id).damage).is_equal_to(2)
+
+
+def test_commit_raises_swallowed_conflict(repo):
+    player: Player = _new_player("Lance Uppercut")
+    repo.save(player)
+
+    with sqlite3.connect(repo.database) as conn:
+        conn.execute("UPDATE player SET version = version + 1 WHERE id = ?", (player.id,))
+
+    with pytest.raises(ConcurrentUpdateError):
+        with UnitOfWork() as unit_of_work:
+            player.inc_damage()
+
+            try:
+                repo.save(player)
+            except ConcurrentUpdateError:
+                pass
+
+            assert_that(unit_of_work.conflict).is_not_none()
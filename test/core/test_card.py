@@ -52,3 +52,14 @@ def test_equals_core(other: Card, expected: bool):
     result: bool = card == other
 
     assert_that(result).is_equal_to(expected)
+
+
+def test_hydrate():
+    card: Card = Card.hydrate(123, "somefile/image.png", CardType.POWER)
+
+    assert_that(card).is_equal_to(Card(123, "somefile/image.png", CardType.POWER))
+    assert_that(card.attributes()).is_equal_to({"number": 123, "filename": "somefile/image.png",
+                                                "type": CardType.POWER})
+
+    with pytest.raises(AttributeError):
+        card.extra = 1
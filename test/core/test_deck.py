@@ -1,3 +1,4 @@
+from random import Random
 from typing import Tuple
 
 import pytest
@@ -7,6 +8,9 @@ from common.enums import DeckType, CardType
 from core.base_deck import BaseDeck
 from core.card import Card
 from core.deck import Deck
+from core.deck_card import DeckCard
+from core.hand import Hand
+from core.shuffle_engine import RiffleShuffleEngine
 from support.fake_card_repository import FakeCardRepository
 from support.mock_hand import MockHand
 
@@ -111,6 +115,106 @@ def test_deal_card_target_problem(deck_with_cards):
 
 def test_shuffle(deck_with_cards):
     deck, c_repo = deck_with_cards(DeckType.PROGRAM_DECK)
+    deck.shuffle(1, RiffleShuffleEngine(Random(1)))
+
+    assert_that(deck.cards).extracting('number').is_equal_to([15, 12, 344, 954, 0])
+
+
+def test_deal_cards(deck_with_cards):
+    deck, c_repo = deck_with_cards(DeckType.PROGRAM_DECK)
+    hand: Hand = Hand(DeckType.PROGRAM_HAND, 3)
+    expected = list(reversed(deck.cards))[:3]
+
+    dealt = deck.deal_cards(hand, 3)
+
+    assert_that(dealt).is_equal_to(expected)
+    assert_that(hand.cards).is_equal_to(expected)
+    assert_that(deck.size).is_equal_to(2)
+
+
+@pytest.mark.parametrize("count,hand_size,expected_size", [
+    (6, 9, 5),
+    (4, 3, 3)])
+def test_deal_cards_runs_out(deck_with_cards, count, hand_size, expected_size):
+    deck, c_repo = deck_with_cards(DeckType.PROGRAM_DECK)
+    hand: Hand = Hand(DeckType.PROGRAM_HAND, hand_size)
+
+    with pytest.raises(IndexError):
+        deck.deal_cards(hand, count)
+
+    assert_that(hand.size).is_equal_to(expected_size)
+    assert_that(deck.size).is_equal_to(5 - expected_size)
+
+
+def test_deal_cards_target_full(deck_with_cards):
+    deck, c_repo = deck_with_cards(DeckType.POWER_DECK)
+    hand: Hand = Hand(DeckType.POWER_HAND, 1)
+    deck.deal_card(hand)
+    original_numbers = deck.numbers()
+
+    with pytest.raises(IndexError):
+        deck.deal_cards(hand, 1)
+
+    assert_that(deck.numbers()).is_equal_to(original_numbers)
+
+
+def test_cards_stay_with_deck(deck_with_cards):
+    deck, c_repo = deck_with_cards(DeckType.PROGRAM_DECK)
+    card: DeckCard = deck.cards[0]
+    card.orb = 2
+    deck.shuffle(1)
+
+    assert_that(deck.cards).contains(card)
+    assert_that(deck.card_values()).contains((card.card, 2, 0))
+
+
+def test_populate_values():
+    cards = [Card(1, "one.png", CardType.POWER), Card(2, "two.png", CardType.POWER)]
+    deck = Deck(DeckType.POWER_DECK)
+    deck.populate_values(cards, bytes([1, 0]), bytes([0, 3]))
+    discard: Deck = Deck(DeckType.POWER_DECK)
+
+    deck.deal_card(discard)
+    deck.clear_cards()
+    discard.deal_card(deck)
+
+    assert_that(deck.card_values()).is_equal_to([(cards[0], 0, 0), (cards[1], 0, 3)])
+    assert_that(deck.numbers()).is_equal_to([1, 2])
+    assert_that(deck.dirty_from).is_equal_to(0)
+
+
+def test_rollback(deck_with_cards):
+    deck, c_repo = deck_with_cards(DeckType.PROGRAM_DECK)
+    original_numbers = deck.numbers()
+    checkpoint = deck.checkpoint()
+
+    deck.deal_cards(Hand(DeckType.PROGRAM_HAND, 9), 2)
+    deck.add_card(Card(99, "ninety_nine.png", CardType.PROGRAM), 0)
+    deck.shuffle(1)
+    deck.rollback(checkpoint)
+
+    assert_that(deck.numbers()).is_equal_to(original_numbers)
+    assert_that(deck.positions_of_number(99)).is_empty()
+    assert_that(deck.dirty_from).is_equal_to(0)
+
+
+def test_lookups_follow_cards(deck_with_cards):
+    deck, c_repo = deck_with_cards(DeckType.PROGRAM_DECK)
+    numbers = deck.numbers()
+    top = deck.getCardByFilename(deck.cards[-1].filename)
+
+    assert_that(deck.positions_of_number(numbers[0])).is_equal_to([0])
+
+    dealt = deck.deal_card(Hand(DeckType.PROGRAM_HAND, 9))
+    card = Card(99, "ninety_nine.png", CardType.PROGRAM)
+    deck.add_card(card, 0)
+
+    assert_that(dealt).is_same_as(top)
+    assert_that(deck.getCardByFilename(top.filename)).is_none()
+    assert_that(deck.getCardByFilename(card.filename)).is_same_as(card)
+    assert_that(deck.positions_of_number(numbers[0])).is_equal_to([1])
+    assert_that(deck.positions_of_number(99)).is_equal_to([0])
+
     deck.shuffle(1)
 
-    assert_that(deck.cards).extracting('number').is_equal_to([12, 344, 954, 0, 15])
+    assert_that(deck.positions_of_number(99)).is_equal_to([deck.numbers().index(99)])
@@ -0,0 +1,38 @@
+from assertpy import assert_that
+
+from common.enums import CardType
+from core.card import Card
+from core.deck_card import DeckCard
+
+
+def test_hydrate():
+    card: Card = Card(123, "somefile/image.png", CardType.POWER)
+    deck_card: DeckCard = DeckCard.hydrate(card, 2, 5)
+
+    assert_that(deck_card.attributes()).is_equal_to(DeckCard(card, orb=2, num_uses=5).attributes())
+    assert_that(deck_card.card).is_same_as(card)
+    assert_that(deck_card.is_dirty).is_false()
+    assert_that(deck_card.is_persisted).is_false()
+
+
+def test_id_made_once():
+    deck_card: DeckCard = DeckCard.hydrate(Card(123, "image.png", CardType.POWER), 0, 0)
+
+    assert_that(deck_card.id).is_not_none()
+    assert_that(deck_card.id).is_equal_to(deck_card.id)
+    assert_that(DeckCard(deck_card.card, id="given").id).is_equal_to("given")
+
+
+def test_dirty_fields_not_shared():
+    first: DeckCard = DeckCard.hydrate(Card(1, "one.png", CardType.POWER), 0, 0)
+    second: DeckCard = DeckCard.hydrate(Card(2, "two.png", CardType.POWER), 0, 0)
+    first.orb = 1
+
+    assert_that(first.dirty_fields).contains("orb")
+    assert_that(second.is_dirty).is_false()
+
+    first.mark_clean()
+    second.num_uses = 3
+
+    assert_that(first.is_dirty).is_false()
+    assert_that(second.dirty_fields).is_equal_to({"num_uses"})
@@ -144,3 +144,59 @@ def test_transfer_card_target_problem(hand_factory):
         source.transfer_card(1, target)
 
     assert_that(source.size).is_equal_to(2)
+
+
+def test_lookups_follow_transfers(hand_factory):
+    source, repo = hand_factory(5)
+    target, repo = hand_factory(5)
+    cards = [Card(i, "card_{}.png".format(i), CardType.POWER) for i in range(0, 4)]
+    source.populate(list(cards))
+
+    assert_that(source.getCardByFilename("card_2.png")).is_same_as(cards[2])
+
+    source.transfer_card(1, target)
+    source.transfer_card(0, source, 2)
+    source.add_card(cards[1], 0)
+
+    for cur_card in source.cards:
+        assert_that(source.getCardByFilename(cur_card.filename)).is_same_as(cur_card)
+
+    assert_that(source.numbers()).is_equal_to([1, 2, 3, 0])
+    assert_that(target.getCardByFilename("card_1.png")).is_same_as(cards[1])
+    assert_that(source.getCardByFilename("missing.png")).is_none()
+
+    source.transfer_card_by_number(3, target)
+
+    assert_that(source.numbers()).is_equal_to([1, 2, 0])
+    assert_that(target.numbers()).is_equal_to([1, 3])
+
+    with pytest.raises(ValueError):
+        source.transfer_card_by_number(3, target)
+
+
+def test_lookup_duplicates(hand_factory):
+    hand, repo = hand_factory(3)
+    card: Card = Card(434, "woo.jpg", CardType.POWER)
+    hand.add_card(card)
+    hand.getCardByFilename("woo.jpg")
+    hand.add_card(card)
+
+    with pytest.raises(IndexError):
+        hand.getCardByFilename("woo.jpg")
+
+    hand.transfer_card(0, Hand(DeckType.POWER_HAND))
+
+    assert_that(hand.getCardByFilename("woo.jpg")).is_same_as(card)
+
+
+def test_lookups_after_target_problem(hand_factory):
+    hand, repo = hand_factory(3)
+    cards = [Card(i, "card_{}.png".format(i), CardType.POWER) for i in range(0, 3)]
+    hand.populate(list(cards))
+    hand.getCardByFilename("card_0.png")
+
+    with pytest.raises(IndexError):
+        hand.transfer_card(0, MockHand())
+
+    assert_that(hand.getCardByFilename("card_0.png")).is_same_as(cards[0])
+    assert_that(hand.positions_of_number(2)).is_equal_to([2])
@@ -0,0 +1,61 @@
+from random import Random
+
+import pytest
+from assertpy import assert_that
+
+from common.enums import ShuffleType
+from core.shuffle_engine import RiffleShuffleEngine, ShuffleEngine
+
+
+# The riffle the engine replaced, kept here to check the engine still shuffles the same way
+def insert_riffle(cards, times, rng):
+    deck = list(cards)
+
+    for i in range(0, times):
+        cut_index = rng.randint(10, len(deck) - 10)
+        deck, second_deck = deck[:cut_index], deck[cut_index:]
+
+        for index, item in enumerate(second_deck):
+            deck.insert(index * 2 + 1, item)
+
+    cut_index = rng.randint(10, len(deck) - 10)
+
+    return deck[cut_index:] + deck[:cut_index]
+
+
+# -------------------
+@pytest.mark.parametrize("cut_index,expected", [
+    (2, [0, 2, 1, 3, 4, 5]),
+    (4, [0, 4, 1, 5, 2, 3]),
+    (0, [0, 1, 2, 3, 4, 5]),
+    (6, [0, 1, 2, 3, 4, 5])])
+def test_riffle(cut_index, expected):
+    assert_that(RiffleShuffleEngine.riffle(list(range(0, 6)), cut_index)).is_equal_to(expected)
+
+
+@pytest.mark.parametrize("size", [20, 84, 999])
+def test_riffle_matches_insert_riffle(size):
+    cards = list(range(0, size))
+    expected = insert_riffle(cards, 12, Random(size))
+
+    assert_that(RiffleShuffleEngine(Random(size)).shuffle(cards, 12)).is_equal_to(expected)
+
+
+@pytest.mark.parametrize("type", list(ShuffleType))
+def test_small_decks(type):
+    engine = ShuffleEngine.create(type, Random(3))
+
+    for size in range(0, 20):
+        cards = list(range(0, size))
+
+        assert_that(sorted(engine.shuffle(cards))).is_equal_to(cards)
+
+
+@pytest.mark.parametrize("type", list(ShuffleType))
+def test_seeded(type):
+    cards = list(range(0, 84))
+    shuffled = ShuffleEngine.create(type, Random(42)).shuffle(cards)
+
+    assert_that(shuffled).is_not_equal_to(cards)
+    assert_that(ShuffleEngine.create(type, Random(42)).shuffle(cards)).is_equal_to(shuffled)
+    assert_that(cards).is_equal_to(list(range(0, 84)))
@@ -0,0 +1,64 @@
+import pytest
+from assertpy import assert_that
+
+from common.engine_registry import EngineRegistry
+from common.enums import CardType, DeckType
+from core.card import Card
+from core.deck import Deck
+from domain.card_catalog import CardCatalog
+from domain.card_respository import CardRepository
+from domain.deck_factory import DeckFactory
+from support.database import create_database, StatementCounter, add_cards
+
+
+@pytest.fixture
+def card_repo(tmp_path):
+    database: str = create_database(str(tmp_path))
+    add_cards(database, [Card(n, "card_{}.png".format(n), CardType.PROGRAM) for n in range(110, 120)] +
+              [Card(7, "seven.png", CardType.POWER),
+               Card(3, "three.png", CardType.POWER),
+               Card(9999, "back.png", CardType.POWER)])
+
+    yield CardRepository(database)
+
+    CardCatalog.invalidate(database)
+    EngineRegistry.dispose(database)
+
+
+def test_lookups():
+    catalog = CardCatalog([Card(7, "seven.png", CardType.POWER),
+                           Card(3, "three.png", CardType.POWER),
+                           Card(7, "seven.png", CardType.PROGRAM),
+                           Card(9999, "back.png", CardType.POWER)])
+
+    assert_that(catalog.by_type(CardType.POWER)).extracting('number').is_equal_to([3, 7])
+    assert_that(catalog.by_number(CardType.POWER, 7)).is_same_as(catalog.by_filename(CardType.POWER, "seven.png"))
+    assert_that(catalog.by_number(CardType.PROGRAM, 7)).is_not_same_as(catalog.by_number(CardType.POWER, 7))
+    assert_that(catalog.by_number(CardType.POWER, 8)).is_none()
+    assert_that(catalog.card_back(CardType.POWER).filename).is_equal_to("back.png")
+    assert_that(catalog.lookup(CardType.POWER, 8).filename).is_equal_to("")
+    assert_that(catalog.intern(3, "three.png", CardType.POWER)).is_same_as(catalog.by_number(CardType.POWER, 3))
+    assert_that(catalog.intern(3, "renamed.png", CardType.POWER).filename).is_equal_to("renamed.png")
+
+
+def test_loaded_once(card_repo):
+    factory = DeckFactory(card_repo)
+    deck: Deck = factory.new_deck(DeckType.POWER_DECK)
+
+    with StatementCounter(card_repo.database) as counter:
+        other: Deck = factory.new_deck(DeckType.POWER_DECK)
+        cards = card_repo.get_all_by_type(CardType.POWER)
+
+    assert_that(counter.count).is_equal_to(0)
+    assert_that(deck.cards).extracting('number').is_equal_to([3, 7])
+    assert_that(other.cards[0].card).is_same_as(deck.cards[0].card)
+    assert_that(cards[0]).is_same_as(deck.cards[0].card)
+
+
+def test_invalidated_by_change(card_repo):
+    catalog: CardCatalog = card_repo.get_catalog()
+
+    card_repo.create(Card(5, "five.png", CardType.POWER))
+
+    assert_that(card_repo.get_catalog()).is_not_same_as(catalog)
+    assert_that(card_repo.get_all_by_type(CardType.POWER)).extracting('number').is_equal_to([3, 5, 7])
@@ -0,0 +1,132 @@
+import pytest
+from assertpy import assert_that
+
+from common.engine_registry import EngineRegistry
+from common.enums import DeckType, CardType, DeckStorageFormat
+from core.card import Card
+from core.deck import Deck
+from core.game import Game, GameProps
+from core.hand import Hand
+from domain.game_respository import GameRepository
+from support.database import create_database, StatementCounter, add_cards
+
+
+def _make_deck(type: DeckType, card_type: CardType, numbers) -> Deck:
+    deck: Deck = Deck(type)
+    deck.fill([Card(n, "card_{}.png".format(n), card_type) for n in numbers])
+
+    return deck
+
+
+@pytest.fixture
+def saved_game(tmp_path):
+    database: str = create_database(str(tmp_path))
+    repo = GameRepository(database)
+
+    props: GameProps = GameProps()
+    props.program_deck = _make_deck(DeckType.PROGRAM_DECK, CardType.PROGRAM, range(100, 140))
+    props.power_deck = _make_deck(DeckType.POWER_DECK, CardType.POWER, range(1, 30))
+    game: Game = Game(props)
+    repo.save(game)
+
+    yield repo.get_game(), repo, database
+
+    EngineRegistry.dispose(database)
+
+
+def test_save_deal_moves_cursor(saved_game):
+    game, repo, database = saved_game
+    hand: Hand = Hand(DeckType.POWER_HAND)
+    game.power_deck.deal_card(hand)
+    game.power_deck.deal_card(hand)
+
+    with StatementCounter(database) as counter:
+        repo.save(game)
+
+    assert_that(counter.statements).is_length(1)
+    assert_that(counter.statements[0]).starts_with("UPDATE game SET power_deck_top")
+
+    repo_game: Game = repo.get_game()
+    assert_that(repo_game.power_deck.cards).extracting('number').is_equal_to(list(range(1, 28)))
+    assert_that(repo_game.program_deck.size).is_equal_to(40)
+
+
+def test_save_notes(saved_game):
+    game, repo, database = saved_game
+    game.notes = "Flag 2 is on the conveyor"
+
+    with StatementCounter(database) as counter:
+        repo.save(game)
+
+    assert_that(counter.statements).is_length(1)
+    assert_that(repo.get_game().notes).is_equal_to("Flag 2 is on the conveyor")
+
+
+def test_save_shuffle_count(saved_game):
+    game, repo, database = saved_game
+    game.count_shuffle()
+
+    with StatementCounter(database) as counter:
+        repo.save(game)
+
+    repo_game: Game = repo.get_game()
+    assert_that(counter.statements).is_length(1)
+    assert_that(repo_game.seed).is_equal_to(game.seed)
+    assert_that(repo_game.shuffle_count).is_equal_to(1)
+
+
+def test_save_after_deal_and_return(saved_game):
+    game, repo, database = saved_game
+    hand: Hand = Hand(DeckType.PROGRAM_HAND)
+    game.program_deck.deal_card(hand)
+    game.program_deck.deal_card(hand)
+    repo.save(game)
+
+    hand.transfer_card(0, game.program_deck)
+    game.inc_turn()
+    game.add_board_state("board.png")
+    repo.save(game)
+
+    repo_game: Game = repo.get_game()
+    assert_that(repo_game.turn).is_equal_to(2)
+    assert_that(repo_game.board_state_filenames).is_equal_to(["board.png"])
+    assert_that(repo_game.program_deck.cards).extracting('number').is_equal_to(list(range(100, 138)) + [139])
+
+
+def test_save_new_program_deck(saved_game):
+    game, repo, database = saved_game
+    game.program_deck = _make_deck(DeckType.PROGRAM_DECK, CardType.PROGRAM, range(200, 210))
+
+    repo.save(game)
+
+    assert_that(repo.get_game().program_deck.cards).extracting('number').is_equal_to(list(range(200, 210)))
+
+
+def test_save_packed_deal(tmp_path):
+    database: str = create_database(str(tmp_path))
+    program_deck: Deck = _make_deck(DeckType.PROGRAM_DECK, CardType.PROGRAM, range(100, 140))
+    power_deck: Deck = _make_deck(DeckType.POWER_DECK, CardType.POWER, range(1, 30))
+    add_cards(database, program_deck.cards + power_deck.cards)
+    repo = GameRepository(database, DeckStorageFormat.PACKED)
+
+    props: GameProps = GameProps()
+    props.program_deck = program_deck
+    props.power_deck = power_deck
+    repo.save(Game(props))
+    game: Game = repo.get_game()
+    game.power_deck.deal_card(Hand(DeckType.POWER_HAND))
+
+    with StatementCounter(database) as counter:
+        repo.save(game)
+
+    assert_that(counter.statements).is_length(2)
+    assert_that(counter.statements[0]).starts_with("UPDATE game SET version")
+    assert_that(counter.statements[1]).starts_with("INSERT INTO packed_deck")
+
+    repo_game: Game = repo.get_game()
+    assert_that(repo_game.power_deck.cards).extracting('number').is_equal_to(list(range(1, 29)))
+    assert_that(repo_game.power_deck.cards).extracting('filename').is_equal_to(
+        ["card_{}.png".format(n) for n in range(1, 29)])
+    assert_that(repo_game.program_deck.size).is_equal_to(40)
+
+    EngineRegistry.dispose(database)
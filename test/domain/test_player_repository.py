@@ -1,8 +1,19 @@
+import sqlite3
+
+import pytest
 from assertpy import assert_that
 
-from common.enums import CardType, DeckType
+from common.engine_registry import EngineRegistry
+from common.enums import CardType, DeckType, DeckStorageFormat
+from common.unit_of_work import ConcurrentUpdateError
 from core.card import Card
-from core.player import Player
+from core.deck import Deck
+from core.deck_card import DeckCard
+from core.hand import Hand
+from core.player import Player, PlayerProps
+from domain.player_factory import PlayerFactory
+from domain.player_respository import PlayerRepository
+from support.database import create_database, StatementCounter, add_cards
 from support.fake_player_repository import FakePlayerRepository
 
 
@@ -92,3 +103,229 @@ def test_delete():
     assert_that(repo.are_registers_present(player.registers.id)).is_false()
     assert_that(repo.is_deck_present(player.program_hand.id, DeckType.PROGRAM_HAND)).is_false()
     assert_that(repo.is_deck_present(player.power_hand.id, DeckType.POWER_HAND)).is_false()
+
+
+@pytest.fixture
+def saved_player(tmp_path):
+    database: str = create_database(str(tmp_path))
+    repo = PlayerRepository(database)
+
+    props: PlayerProps = PlayerProps()
+    props.name = "Lance Uppercut"
+    props.avatar_filename = "one.jpg"
+    player: Player = PlayerFactory.new_player(props)
+    deck: Deck = Deck(DeckType.PROGRAM_DECK)
+    deck.fill([Card(n, "card_{}.png".format(n), CardType.PROGRAM) for n in range(100, 120)])
+    player.reset_program_hand(deck)
+    player.power_hand.add_card(DeckCard(Card(7, "seven.png", CardType.POWER)))
+    repo.save(player)
+
+    yield repo.get_by_id(player.id), repo, database
+
+    EngineRegistry.dispose(database)
+
+
+def test_save_damage_only(saved_player):
+    player, repo, database = saved_player
+    player.inc_damage()
+
+    with StatementCounter(database) as counter:
+        repo.save(player)
+
+    assert_that(counter.statements).is_length(1)
+    assert_that(counter.statements[0]).starts_with("UPDATE player SET damage")
+    assert_that(repo.get_by_id(player.id).damage).is_equal_to(1)
+
+
+def test_save_no_changes(saved_player):
+    player, repo, database = saved_player
+
+    with StatementCounter(database) as counter:
+        repo.save(player)
+
+    assert_that(counter.count).is_equal_to(0)
+
+
+def test_save_conflict(saved_player):
+    player, repo, database = saved_player
+
+    with sqlite3.connect(database) as conn:
+        conn.execute("UPDATE player SET damage = 4, version = version + 1 WHERE id = ?", (player.id,))
+
+    player.inc_damage()
+
+    with pytest.raises(ConcurrentUpdateError):
+        repo.save(player)
+
+    assert_that(player.is_stale).is_true()
+    assert_that(repo.get_by_id(player.id).damage).is_equal_to(4)
+
+
+def test_save_throw_only(saved_player):
+    player, repo, database = saved_player
+    player.registers.throw(2)
+
+    with StatementCounter(database) as counter:
+        repo.save(player)
+
+    assert_that(counter.statements).is_length(2)
+    assert_that(counter.statements[0]).starts_with("UPDATE player SET version")
+    assert_that(counter.statements[1]).starts_with("UPDATE registers")
+    assert_that(repo.get_by_id(player.id).registers.throws).is_equal_to([False, False, True, False, False])
+
+
+def test_save_card_changes(saved_player):
+    player, repo, database = saved_player
+    player.move_card_to_register(8, 4)
+    player.power_hand.cards[0].orb = 2
+
+    repo.save(player)
+
+    repo_player: Player = repo.get_by_id(player.id)
+    assert_that(repo_player.program_hand.cards).extracting('number').is_equal_to(
+        [x.number for x in player.program_hand.cards])
+    assert_that(repo_player.registers.cards).extracting('number').is_equal_to(
+        [x.number for x in player.registers.cards])
+    assert_that(repo_player.power_hand.cards).extracting('orb').is_equal_to([2])
+
+
+@pytest.fixture
+def packed_player(tmp_path):
+    database: str = create_database(str(tmp_path))
+    program_cards = [Card(n, "card_{}.png".format(n), CardType.PROGRAM) for n in range(100, 120)]
+    power_cards = [Card(7, "seven.png", CardType.POWER), Card(8, "eight.png", CardType.POWER)]
+    add_cards(database, program_cards + power_cards)
+    repo = PlayerRepository(database, DeckStorageFormat.PACKED)
+
+    props: PlayerProps = PlayerProps()
+    props.name = "Lance Uppercut"
+    props.avatar_filename = "one.jpg"
+    player: Player = PlayerFactory.new_player(props)
+    deck: Deck = Deck(DeckType.PROGRAM_DECK)
+    deck.fill(program_cards)
+    player.reset_program_hand(deck)
+    player.power_hand.add_card(DeckCard(power_cards[0], orb=1, num_uses=2))
+    repo.save(player)
+
+    yield repo.get_by_id(player.id), repo, database
+
+    EngineRegistry.dispose(database)
+
+
+def test_save_packed_round_trip(packed_player):
+    player, repo, database = packed_player
+
+    assert_that(player.program_hand.cards).extracting('number').is_equal_to(list(range(119, 110, -1)))
+    assert_that(player.program_hand.cards).extracting('filename').is_equal_to(
+        ["card_{}.png".format(n) for n in range(119, 110, -1)])
+    assert_that(player.power_hand.cards).extracting('filename').is_equal_to(["seven.png"])
+    assert_that(player.power_hand.cards).extracting('orb').is_equal_to([1])
+    assert_that(player.power_hand.cards).extracting('num_uses').is_equal_to([2])
+
+
+def test_save_packed_hand_change(packed_player):
+    player, repo, database = packed_player
+    player.power_hand.add_card(DeckCard(Card(8, "eight.png", CardType.POWER)))
+
+    with StatementCounter(database) as counter:
+        repo.save(player)
+
+    assert_that(counter.statements).is_length(2)
+    assert_that(counter.statements[0]).starts_with("UPDATE player SET version")
+    assert_that(counter.statements[1]).starts_with("INSERT INTO packed_deck")
+    assert_that(repo.get_by_id(player.id).power_hand.cards).extracting('filename').is_equal_to(
+        ["seven.png", "eight.png"])
+
+
+def test_load_rows_with_packed_format(saved_player):
+    player, repo, database = saved_player
+    packed_repo = PlayerRepository(database, DeckStorageFormat.PACKED)
+
+    packed_player: Player = packed_repo.get_by_id(player.id)
+    assert_that(packed_player.program_hand.cards).extracting('number').is_equal_to(
+        [x.number for x in player.program_hand.cards])
+
+    expected = [x.number for x in packed_player.program_hand.cards[1:]]
+    packed_player.program_hand.transfer_card(0, Hand(DeckType.PROGRAM_HAND))
+    packed_repo.save(packed_player)
+
+    assert_that(packed_repo.get_by_id(player.id).program_hand.cards).extracting('number').is_equal_to(expected)
+
+
+@pytest.mark.parametrize("storage_format", [DeckStorageFormat.ROWS, DeckStorageFormat.PACKED])
+def test_get_all_query_count(tmp_path, storage_format):
+    database: str = create_database(str(tmp_path))
+    repo = PlayerRepository(database, storage_format)
+    counts = []
+
+    for num_players in [1, 5]:
+        while len(repo.get_all()) < num_players:
+            props: PlayerProps = PlayerProps()
+            props.name = "Player {}".format(len(repo.get_all()))
+            props.avatar_filename = "one.jpg"
+            player: Player = PlayerFactory.new_player(props)
+            player.power_hand.add_card(DeckCard(Card(7, "seven.png", CardType.POWER)))
+            repo.save(player)
+
+        with StatementCounter(database) as counter:
+            players = repo.get_all()
+
+        assert_that(players).is_length(num_players)
+        counts.append(counter.count)
+
+    assert_that(counts[1]).is_equal_to(counts[0])
+
+    EngineRegistry.dispose(database)
+
+
+@pytest.fixture
+def players(tmp_path):
+    database: str = create_database(str(tmp_path))
+    repo = PlayerRepository(database)
+
+    for name, card_num in [("Zangief", 300), ("Blanka", 100), ("Ryu", 200), ("Guile", 400)]:
+        props: PlayerProps = PlayerProps()
+        props.name = name
+        props.avatar_filename = name.lower() + ".jpg"
+        player: Player = PlayerFactory.new_player(props)
+        player.registers.add_card(Card(card_num, "card_{}.png".format(card_num), CardType.PROGRAM), 1)
+        player.registers.throws[1] = name == "Ryu"
+
+        if name == "Zangief":
+            player.power_down()
+
+        if name == "Guile":
+            player.is_active = False
+
+        repo.save(player)
+
+    yield repo, database
+
+    EngineRegistry.dispose(database)
+
+
+def test_summaries(players):
+    repo, database = players
+
+    with StatementCounter(database) as counter:
+        summaries = repo.get_summaries()
+
+    assert_that(counter.count).is_equal_to(1)
+    assert_that(summaries).extracting('name').is_equal_to(["Blanka", "Guile", "Ryu", "Zangief"])
+    assert_that(summaries).extracting('avatar_filename').is_equal_to(
+        ["blanka.jpg", "guile.jpg", "ryu.jpg", "zangief.jpg"])
+    assert_that(summaries).extracting('is_active').is_equal_to([True, False, True, True])
+    assert_that(summaries).extracting('is_powered_down').is_equal_to([False, False, False, True])
+    assert_that(repo.count()).is_equal_to(4)
+
+
+def test_register_infos(players):
+    repo, database = players
+
+    infos = repo.get_register_infos(2)
+
+    assert_that(infos).extracting('name').is_equal_to(["Ryu", "Blanka", "Zangief"])
+    assert_that(infos).extracting('card_num').is_equal_to([200, 100, Card.NUMBER_POWER_DOWN])
+    assert_that(infos).extracting('throw').is_equal_to([True, False, False])
+    assert_that(repo.get_register_infos(1)).extracting('card_num').is_equal_to(
+        [Card.NUMBER_POWER_DOWN, Card.NUMBER_EMPTY, Card.NUMBER_EMPTY])
@@ -0,0 +1,68 @@
+import pytest
+from assertpy import assert_that
+
+from common.engine_registry import EngineRegistry
+from common.enums import DeckStorageFormat, DeckType
+from domain.aggregate_codec import AggregateCodec
+from domain.card_catalog import CardCatalog
+from domain.card_respository import CardRepository
+from domain.game_respository import GameRepository
+from domain.models.game_model import GameModel
+from domain.models.player_model import PlayerModel
+from domain.player_respository import PlayerRepository
+from domain.row_reader import RowReader
+from support.database import create_database, create_game_service
+
+
+@pytest.fixture
+def game(tmp_path, request):
+    storage_format: DeckStorageFormat = request.param
+    database: str = create_database(str(tmp_path))
+    service = create_game_service(str(tmp_path), database, storage_format)
+
+    for name in ["Cloud", "Tifa", "Barret"]:
+        service.add_player(name, name.lower() + ".gif")
+
+    service.start_new_turn()
+    service.draw_power_card(service.players[0])
+    service.inc_damage(service.players[1])
+
+    yield database, CardRepository(database).get_catalog()
+
+    CardCatalog.invalidate(database)
+    EngineRegistry.dispose(database)
+
+
+# ------------------
+
+@pytest.mark.parametrize("game", [DeckStorageFormat.ROWS, DeckStorageFormat.PACKED], indirect=True)
+def test_players_match_orm(game):
+    database, card_catalog = game
+    session = PlayerRepository(database).get_session()
+
+    expected = [AggregateCodec.values_from_player(x.to_player(card_catalog))
+                for x in session.query(PlayerModel).order_by(PlayerModel.id)]
+    players = sorted(RowReader.load_players(session, card_catalog), key=lambda x: x.id)
+    player = RowReader.load_player(session, players[0].id, card_catalog)
+
+    assert_that([AggregateCodec.values_from_player(x) for x in players]).is_equal_to(expected)
+    assert_that(AggregateCodec.values_from_player(player)).is_equal_to(expected[0])
+    assert_that(player.has_changes).is_false()
+    assert_that(RowReader.load_player(session, "missing", card_catalog)).is_none()
+    session.close()
+
+
+@pytest.mark.parametrize("game", [DeckStorageFormat.ROWS, DeckStorageFormat.PACKED], indirect=True)
+def test_game_matches_orm(game):
+    database, card_catalog = game
+    session = GameRepository(database).get_session()
+
+    expected = session.query(GameModel).first().to_game(card_catalog)
+    game = RowReader.load_game(session, card_catalog)
+    deck = RowReader.load_deck(session, game.id, DeckType.POWER_DECK, card_catalog)
+
+    assert_that(AggregateCodec.values_from_game(game)).is_equal_to(AggregateCodec.values_from_game(expected))
+    assert_that(game.version).is_equal_to(expected.version)
+    assert_that(game.has_changes).is_false()
+    assert_that(deck.cards).extracting('number').contains(*[x.number for x in expected.power_deck.cards])
+    session.close()
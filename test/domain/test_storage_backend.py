@@ -0,0 +1,76 @@
+import os
+
+import pytest
+from assertpy import assert_that
+
+from application.game_service import GameService
+from common.engine_registry import EngineRegistry
+from common.enums import StorageBackendType
+from domain.card_catalog import CardCatalog
+from domain.storage_backend import StorageBackend, MemoryStorageBackend
+from support.database import create_database, create_game_service, StatementCounter
+
+
+@pytest.fixture
+def directory(tmp_path):
+    database: str = create_database(str(tmp_path))
+
+    yield str(tmp_path), database
+
+    CardCatalog.invalidate(database)
+    EngineRegistry.dispose(database)
+
+
+def _service(directory: str, database: str, storage: StorageBackend) -> GameService:
+    return create_game_service(directory, database, storage=storage)
+
+
+def _storage(type: StorageBackendType, directory: str, database: str) -> StorageBackend:
+    return StorageBackend.create(type, database, directory=os.path.join(directory, "storage"),
+                                 checkpoint_interval_s=3600)
+
+
+@pytest.mark.parametrize("type", list(StorageBackendType))
+def test_survives_restart(directory, type):
+    directory, database = directory
+    storage = _storage(type, directory, database)
+    service = _service(directory, database, storage)
+    cloud = service.add_player("Cloud", "cloud.gif")
+    service.inc_damage(cloud)
+    service.draw_power_card(cloud)
+    service.start_new_turn()
+    storage.close()
+
+    reopened = _service(directory, database, _storage(type, directory, database))
+    player = reopened.get_player(cloud.id)
+
+    assert_that(reopened.game.turn).is_equal_to(service.game.turn)
+    assert_that(reopened.game.program_deck.cards).extracting('number') \
+        .is_equal_to([x.number for x in service.game.program_deck.cards])
+    assert_that(player.damage).is_equal_to(1)
+    assert_that(player.power_hand.cards).extracting('number') \
+        .is_equal_to([x.number for x in cloud.power_hand.cards])
+    assert_that(reopened.rebuild_from_history()[1][0].damage).is_equal_to(1)
+
+
+def test_memory_writes_on_checkpoint(directory):
+    directory, database = directory
+    storage: MemoryStorageBackend = _storage(StorageBackendType.MEMORY, directory, database)
+    service = _service(directory, database, storage)
+    cloud = service.add_player("Cloud", "cloud.gif")
+    storage.checkpoint()
+
+    with StatementCounter(database) as counter:
+        service.inc_damage(cloud)
+        service.deal(cloud)
+
+    assert_that(counter.count).is_equal_to(0)
+    assert_that(_storage(StorageBackendType.SQLITE, directory, database).player_repository.get_by_id(cloud.id)
+                .damage).is_equal_to(0)
+
+    storage.checkpoint()
+    sqlite = _storage(StorageBackendType.SQLITE, directory, database)
+
+    assert_that(sqlite.player_repository.get_by_id(cloud.id).damage).is_equal_to(1)
+    assert_that(sqlite.event_repository.get_after(0)).extracting('sequence') \
+        .is_equal_to([x.sequence for x in service.get_history()])
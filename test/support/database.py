@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import os
+from typing import List
+
+from sqlalchemy import event, insert
+
+from application import db
+from application.card_uploader import CardUploader
+from application.game_service import GameService
+from common.engine_registry import EngineRegistry
+from common.enums import DeckStorageFormat
+from core.card import Card
+from domain.card_respository import CardRepository
+from domain.deck_respository import DeckRepository
+from domain.game_event_repository import GameEventRepository
+from domain.game_respository import GameRepository
+from domain.models.card_model import CardModel
+from domain.player_respository import PlayerRepository
+from domain.storage_backend import StorageBackend
+import domain.models
+import domain.models.board_state_model
+
+
+def create_database(directory: str, name: str = "roborally.db") -> str:
+    path: str = os.path.join(directory, name)
+    db.metadata.create_all(EngineRegistry.get_engine(path))
+
+    return path
+
+
+# Empty card images under base_dir, enough for decks that can be shuffled
+def create_card_images(base_dir: str, num_cards: int = 40):
+    image_dir: str = os.path.join(base_dir, "static", "images")
+    os.makedirs(os.path.join(image_dir, "power_cards"))
+    os.makedirs(os.path.join(image_dir, "program_cards"))
+
+    for n in range(1, num_cards):
+        open(os.path.join(image_dir, "power_cards", "{:03d}_Power.png".format(n)), "w").close()
+        open(os.path.join(image_dir, "program_cards", "Card_1_{}.png".format(n * 10)), "w").close()
+
+
+# A GameService with every repository on the given database, its card images under directory/images and its
+# board states in directory/board_states. Players, games and events come from storage when there is one.
+def create_game_service(directory: str, database: str, storage_format: DeckStorageFormat = DeckStorageFormat.ROWS,
+                        storage: StorageBackend = None, restore_point_directory: str = None) -> GameService:
+    image_dir: str = os.path.join(directory, "images")
+    board_dir: str = os.path.join(directory, "board_states")
+
+    if not os.path.isdir(image_dir):
+        create_card_images(image_dir)
+
+    os.makedirs(board_dir, exist_ok=True)
+    card_repository = CardRepository(database)
+
+    if storage is None:
+        player_repository = PlayerRepository(database, storage_format)
+        game_repository = GameRepository(database, storage_format)
+        event_repository = GameEventRepository(database)
+    else:
+        player_repository = storage.player_repository
+        game_repository = storage.game_repository
+        event_repository = storage.event_repository
+
+    return GameService(image_dir, board_dir,
+                       card_repository=card_repository,
+                       deck_repository=DeckRepository(database, storage_format),
+                       player_repository=player_repository,
+                       game_repository=game_repository,
+                       card_uploader=CardUploader(image_dir, card_repository),
+                       event_repository=event_repository,
+                       restore_point_directory=restore_point_directory)
+
+
+def add_cards(database: str, cards: List[Card]):
+    with EngineRegistry.get_engine(database).begin() as conn:
+        conn.execute(insert(CardModel), [{'number': x.number, 'filename': x.filename, 'type': x.type} for x in cards])
+
+
+# Records every statement sent to a database, ignoring transaction control and the state version
+# bookkeeping that comes with every commit
+class StatementCounter:
+    @property
+    def statements(self) -> List[str]:
+        return self._statements
+
+    @property
+    def count(self) -> int:
+        return len(self._statements)
+
+    def __init__(self, database: str):
+        self._engines = [EngineRegistry.get_engine(database), EngineRegistry.get_engine(database, read_only=True)]
+        self._statements: List[str] = []
+
+    def __enter__(self) -> StatementCounter:
+        for engine in self._engines:
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        for engine in self._engines:
+            event.remove(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith("BEGIN") and "state_version" not in statement:
+            self._statements.append(statement)